@@ -1,296 +1,635 @@
 # nfe-suite/apps/combo_app/app.py
 # XML: gera o MESMO Excel do xml_app (colunas e formatação).
 # PDF: usa extractor por PYZBAR (código de barras) + pdf2image (Poppler) para achar chaves 44.
+# Os lotes rodam em segundo plano (processors.jobs): o resultado sobrevive aos reruns.
+# Partida rápida: pandas, pipeline/xlsx e o extrator de PDF (pdf2image, libzbar) só são
+# importados quando um job ou painel precisa deles; processors.aquecimento os carrega em
+# segundo plano uma vez por processo, sem segurar a primeira renderização.
 
+from __future__ import annotations
 import io
-import zipfile
-import tempfile
+import json
+import os
+import shutil
+import sqlite3
+import time
+import uuid
+import weakref
+from contextlib import contextmanager
 from pathlib import Path
-from datetime import datetime
-from io import BytesIO
-import xml.etree.ElementTree as ET
+from datetime import date, datetime
+from typing import IO, TYPE_CHECKING
 
-import pandas as pd
 import streamlit as st
-from openpyxl import load_workbook
 
 # ====== Config ======
 st.set_page_config(page_title="NFe Suite", layout="wide")
 st.title("NFe Suite – Upload e Processamento")
 
 # ====== Helpers de arquivo ======
-def save_uploaded_files(files, dest_dir: Path) -> list[Path]:
-    dest_dir.mkdir(parents=True, exist_ok=True)
-    saved = []
-    for f in files:
-        p = dest_dir / f.name
-        with open(p, "wb") as out:
-            out.write(f.getbuffer())
-        saved.append(p)
-    return saved
-
-def extract_zip_to(zip_bytes: bytes, dest_dir: Path) -> list[Path]:
-    dest_dir.mkdir(parents=True, exist_ok=True)
-    saved = []
-    with zipfile.ZipFile(io.BytesIO(zip_bytes)) as zf:
-        for member in zf.infolist():
-            if member.is_dir():
-                continue
-            target = dest_dir / Path(member.filename).name
-            with zf.open(member, "r") as src, open(target, "wb") as dst:
-                dst.write(src.read())
-            saved.append(target)
-    return saved
-
-# ====== Excel helpers ======
-def df_to_excel_bytes(sheets: dict[str, pd.DataFrame]) -> bytes:
-    buf = BytesIO()
-    with pd.ExcelWriter(buf, engine="openpyxl") as writer:
-        for name, df in sheets.items():
-            safe = (name or "Planilha")[:31]
-            (df if not df.empty else pd.DataFrame()).to_excel(writer, index=False, sheet_name=safe)
-    buf.seek(0)
-    return buf.getvalue()
-
-def excel_filename(prefix: str = "resultado") -> str:
-    return f"{prefix}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.xlsx"
+# Uploads vão para a área da sessão (processors.sessao): em memória até o limite, senão
+# numa pasta só desta sessão. PDFs e ZIPs vão direto para o disco (Poppler e os workers
+# do ZIP leem por caminho); XMLs seguem em bytes para os extratores.
+from processors.sessao import AreaSessao, ArquivoSessao, limpar_orfas
+from processors.base_notas import BaseNotas, so_digitos
+
+def guardar_uploads(area: AreaSessao, files, em_disco: bool = False) -> list[ArquivoSessao]:
+    return [area.guardar(f.name, f.getbuffer(), em_disco=em_disco) for f in files]
+
+# ====== Métricas por estágio ======
+# Cada job mede seus estágios (processors.metricas); o painel mostra o detalhamento e,
+# se configurado, cada lote vira uma linha JSON e o acumulado do processo um arquivo
+# Prometheus (textfile collector):
+#   NFE_METRICAS_JSONL  arquivo .jsonl (uma linha por lote)
+#   NFE_METRICAS_PROM   arquivo .prom, reescrito ao fim de cada lote
+from processors import metricas
+
+METRICAS_JSONL = os.environ.get("NFE_METRICAS_JSONL")
+METRICAS_PROM = os.environ.get("NFE_METRICAS_PROM")
+
+# ====== Saída (xlsx / CSV / Parquet) ======
+# escrita em disco aos poucos (processors.exportacao.abrir_escritor), não num BytesIO:
+# xlsx com abas divididas no limite de linhas do Excel; CSV/Parquet soltos ou num .zip
+from processors.exportacao import MIME, abrir_escritor, parquet_disponivel
+
+FORMATOS_SAIDA = {"Excel (.xlsx)": ("xlsx", False), "CSV (.zip)": ("csv", True), "CSV": ("csv", False)}
+if parquet_disponivel():
+    FORMATOS_SAIDA.update({"Parquet (.zip)": ("parquet", True), "Parquet": ("parquet", False)})
+
+def escrever_planilhas(escritor, sheets: dict[str, pd.DataFrame]):
+    for name, df in sheets.items():
+        with metricas.medir(metricas.ESCRITA) as m:
+            escritor.planilha(name, [str(c) for c in df.columns], formatos={}).escrever_df(df)
+            m["itens"] = len(df)
+
+def abrir_saida(pasta: Path, prefix: str, opcoes: dict):
+    """Escritor no formato escolhido; `escritor.arquivos` são os arquivos para baixar."""
+    base = pasta / f"{prefix}-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+    return abrir_escritor(base, opcoes["formato"], compactar=opcoes["compactar"])
+
+def baixar_arquivo(rotulo: str, caminho: Path, file_name: str, mime: str = MIME["xlsx"], key: str | None = None):
+    with open(caminho, "rb") as f:
+        st.download_button(rotulo, data=f, file_name=file_name, mime=mime, use_container_width=True, key=key)
 
 # ====== XML — MESMO layout do xml_app ======
-def get_text_or_zero(elem):
-    return elem.text if elem is not None and elem.text else "0"
+# (extrator de passada única com iterparse; mesmas 25 colunas, tipadas bloco a bloco e
+#  escritas no xlsx em blocos: memória limitada pelo bloco, não pelo lote)
+# processors.pipeline (pandas) é importado dentro dos jobs
+from processors.xml_nfe import COLUNAS_NFE
 
-def extract_info_from_xml(file, result_list):
-    root = ET.parse(file).getroot()
-    ns = {"ns": "http://www.portalfiscal.inf.br/nfe"}
+if TYPE_CHECKING:
+    import pandas as pd
+    from processors.pipeline import ResumoExportacao
 
-    nfe = root.find("./ns:NFe/ns:infNFe/ns:ide/ns:nNF", ns)
-    serie = root.find("./ns:NFe/ns:infNFe/ns:ide/ns:serie", ns)
-    nat_operacao = root.find("./ns:NFe/ns:infNFe/ns:ide/ns:natOp", ns)
+def mostrar_resumo_xml(resumo: ResumoExportacao):
+    st.caption(f"{resumo.notas} notas · {resumo.linhas} itens · total dos itens R$ {resumo.valor_itens:,.2f}")
+    st.dataframe(resumo.previa, use_container_width=True)
 
-    data_saida_entrada = root.find("./ns:NFe/ns:infNFe/ns:ide/ns:dhSaiEnt", ns)
-    if data_saida_entrada is not None and data_saida_entrada.text:
-        data_saida_entrada = f"{data_saida_entrada.text[8:10]}/{data_saida_entrada.text[5:7]}/{data_saida_entrada.text[0:4]}"
-    else:
-        data_saida_entrada = ""
-
-    data_emissao = root.find("./ns:NFe/ns:infNFe/ns:ide/ns:dhEmi", ns)
-    if data_emissao is not None and data_emissao.text:
-        data_emissao = f"{data_emissao.text[8:10]}/{data_emissao.text[5:7]}/{data_emissao.text[0:4]}"
-    else:
-        data_emissao = ""
-
-    valor_frete = root.find("./ns:NFe/ns:infNFe/ns:total/ns:ICMSTot/ns:vFrete", ns)
-    valor_desc = root.find("./ns:NFe/ns:infNFe/ns:total/ns:ICMSTot/ns:vDesc", ns)
-    valor_outro = root.find("./ns:NFe/ns:infNFe/ns:total/ns:ICMSTot/ns:vOutro", ns)
-    valor_tot_nota = root.find("./ns:NFe/ns:infNFe/ns:total/ns:ICMSTot/ns:vNF", ns)
-    valor_tot_prod = root.find("./ns:NFe/ns:infNFe/ns:total/ns:ICMSTot/ns:vProd", ns)
-
-    chave = root.find("./ns:protNFe/ns:infProt/ns:chNFe", ns)
-    cnpj_emitente = root.find("./ns:NFe/ns:infNFe/ns:emit/ns:CNPJ", ns)
-    nome_emitente = root.find("./ns:NFe/ns:infNFe/ns:emit/ns:xNome", ns)
-
-    item_num = 1
-    for item in root.findall("./ns:NFe/ns:infNFe/ns:det", ns):
-        cod = item.find(".ns:prod/ns:cProd", ns)
-        descricao = item.find(".ns:prod/ns:xProd", ns)
-        unidade = item.find(".ns:prod/ns:uCom", ns)
-        quantidade = item.find(".ns:prod/ns:qCom", ns)
-        valor_unit = item.find(".ns:prod/ns:vUnCom", ns)
-        desconto_item = item.find(".ns:prod/ns:vDesc", ns)
-        desconto_item = desconto_item.text if desconto_item is not None and desconto_item.text else ""
-        valor_total_item = item.find(".ns:prod/ns:vProd", ns)
-        icms_percent = item.find(".ns:imposto/ns:ICMS/ns:ICMS00/ns:pICMS", ns)
-        icms_valor = item.find(".ns:imposto/ns:ICMS/ns:ICMS00/ns:vICMS", ns)
-        ipi_percent = item.find(".ns:imposto/ns:IPI/ns:IPITrib/ns:pIPI", ns)
-        ipi_valor = item.find(".ns:imposto/ns:IPI/ns:IPITrib/ns:vIPI", ns)
-
-        linha = [
-            nfe.text, serie.text, nat_operacao.text, data_emissao, data_saida_entrada,
-            valor_frete.text, chave.text, cnpj_emitente.text, nome_emitente.text,
-            valor_tot_nota.text, valor_tot_prod.text, valor_desc.text, valor_outro.text,
-            item_num, cod.text, descricao.text, unidade.text, quantidade.text,
-            valor_unit.text, desconto_item, valor_total_item.text,
-            get_text_or_zero(icms_percent), get_text_or_zero(icms_valor),
-            get_text_or_zero(ipi_percent), get_text_or_zero(ipi_valor),
-        ]
-        result_list.append([str(i) for i in linha])
-        item_num += 1
-
-def format_excel(df: pd.DataFrame) -> BytesIO:
-    output = BytesIO()
-    df.to_excel(output, index=False, engine="openpyxl")
-    output.seek(0)
-    wb = load_workbook(output)
-    ws = wb.active
-
-    formatos = {
-        "Valor do Frete": "R$ #,##0.00",
-        "Valor Total da Nota": "R$ #,##0.00",
-        "Valor Total dos Produtos": "R$ #,##0.00",
-        "Descontos Aplicados": "R$ #,##0.00",
-        "Outras Despesas Acessórias": "R$ #,##0.00",
-        "Valor Unitário": "R$ #,##0.00",
-        "Desconto": "R$ #,##0.00",
-        "Valor Total do Item": "R$ #,##0.00",
-        "ICMS (valor)": "R$ #,##0.00",
-        "IPI (valor)": "R$ #,##0.00",
-        "Data de emissão": "DD/MM/YYYY",
-        "Data de Saída/Entrada": "DD/MM/YYYY",
-        "ICMS(%)": "0.00%",
-        "IPI(%)": "0.00%",
-        "Quantidade": "0.00",
-        "NFe": "@", "Série": "@", "Chave": "@", "CNPJ do Emitente": "@", "Cód. Produto": "@",
-    }
-
-    cab = {cell.value.strip(): i + 1 for i, cell in enumerate(ws[1]) if cell.value}
-    for nome, fmt in formatos.items():
-        if nome in cab:
-            col = cab[nome]
-            for row in ws.iter_rows(min_row=2, min_col=col, max_col=col):
-                cell = row[0]
-                try:
-                    val = str(cell.value or "").replace("R$", "").replace("%", "").replace(",", ".").strip()
-                    if val == "":
-                        continue
-                    if fmt == "0":
-                        cell.value = int(float(val))
-                    elif fmt.endswith("%"):
-                        cell.value = float(val) / 100
-                    elif fmt == "@":
-                        cell.value = str(cell.value).strip()
-                    else:
-                        cell.value = float(val)
-                    cell.number_format = fmt
-                    if nome == "CNPJ do Emitente":
-                        cnpj = "".join(filter(str.isdigit, str(cell.value)))
-                        if len(cnpj) == 14:
-                            cell.value = f"{cnpj[:2]}.{cnpj[2:5]}.{cnpj[5:8]}/{cnpj[8:12]}-{cnpj[12:]}"
-                except:
-                    pass
-
-    final_output = BytesIO()
-    wb.save(final_output)
-    final_output.seek(0)
-    return final_output
 
 # ====== PDF — EXTRACTOR por PYZBAR ======
-# (usa pdf2image para converter cada página em imagem e decodifica códigos de barras)
-from processors.extractor_pyzbar import extrair_chaves_de_pdf  # ← nosso extractor oficial
-
-# ====== temp dir ======
-session_tmp = Path(tempfile.gettempdir()) / "nfe_suite_combo"
-session_tmp.mkdir(parents=True, exist_ok=True)
+# (usa pdf2image para converter cada página em imagem e decodifica códigos de barras;
+#  páginas e arquivos são espalhados pelo pool de processos em processors.paralelo)
+from processors import paralelo
+from processors.paralelo import Andamento, Cancelado, PoolCompartilhado, linhas_pdf, workers_padrao
+from processors.lote_zip import LeitorZip
+from processors.cache import CacheResultados
+from processors.conciliacao import COLUNAS_CONCILIACAO, ORIGEM_XML_DO_LOTE, SITUACOES, IndiceChaves
+
+# ====== Jobs em segundo plano ======
+# A fila e o pool de processos são do processo (compartilhados por todas as sessões e
+# reruns); cada sessão só vê os próprios jobs. Limites por variável de ambiente:
+#   NFE_POOL_WORKERS     processos de extração no total (padrão: CPUs)
+#   NFE_POOL_MEMORIA_MB  MB de páginas rasterizadas em voo no total (padrão: 1024)
+#   NFE_JOBS_SIMULTANEOS lotes rodando ao mesmo tempo; os demais esperam na fila (padrão: 2)
+#   NFE_AQUECIMENTO      0 desliga o aquecimento do processo e dos workers (padrão: 1)
+#   NFE_SERVICO_URLS     nós do serviço de extração (processors.servico), separados por vírgula;
+#                        "local" sobe o serviço neste processo; vazio = extração no pool local
+#   NFE_SERVICO_TOKEN    token dos nós (Authorization: Bearer)
+from processors.jobs import CANCELADO, CONCLUIDO, ERRO, EXECUTANDO, PENDENTE, FilaJobs, Job
+from processors.aquecimento import Aquecimento, aquecer_em_segundo_plano, aquecer_worker
+
+AQUECIMENTO = os.environ.get("NFE_AQUECIMENTO", "1") != "0"
+
+@st.cache_resource
+def pool_extracao() -> PoolCompartilhado:
+    return PoolCompartilhado(workers=int(os.environ.get("NFE_POOL_WORKERS", "0")) or workers_padrao(),
+                             memoria_mb=float(os.environ.get("NFE_POOL_MEMORIA_MB", "1024")),
+                             inicializador=aquecer_worker if AQUECIMENTO else None)
+
+@st.cache_resource
+def aquecimento() -> Aquecimento | None:
+    # uma vez por processo, numa thread: bibliotecas, libzbar/zxing-cpp e Poppler
+    return aquecer_em_segundo_plano() if AQUECIMENTO else None
+
+@st.cache_resource
+def backend_remoto():
+    # um por processo: conexões reaproveitadas com os nós do serviço de extração
+    from processors.remoto import backend_configurado
+    return backend_configurado()
+
+@st.cache_resource
+def fila_jobs() -> FilaJobs:
+    return FilaJobs(max_simultaneos=int(os.environ.get("NFE_JOBS_SIMULTANEOS", "2")))
+
+@st.cache_resource
+def varrer_sessoes_orfas() -> int:
+    # uma vez por processo: pastas de sessões de um processo anterior que morreu
+    return limpar_orfas()
+
+def encerrar_sessao(fila: FilaJobs, dono: str, pasta: Path):
+    # chamado quando o Streamlit descarta a sessão (o session_state é coletado)
+    fila.descartar(dono)
+    shutil.rmtree(pasta, ignore_errors=True)
+
+@st.cache_resource
+def base_notas() -> BaseNotas | None:
+    # base local das notas já processadas (NFE_BASE_NOTAS), compartilhada pelas sessões
+    try:
+        return BaseNotas()
+    except (OSError, sqlite3.Error):
+        return None
+
+@st.cache_resource
+def metricas_acumuladas() -> metricas.Metricas:
+    # soma de todos os lotes do processo (contadores do Prometheus); sem registros por arquivo
+    return metricas.Metricas(max_registros=0)
+
+pool = pool_extracao()
+aquecido = aquecimento()
+remoto = backend_remoto()
+fila = fila_jobs()
+acumulado = metricas_acumuladas()
+base = base_notas()
+varrer_sessoes_orfas()
+if "sessao" not in st.session_state:
+    st.session_state["sessao"] = uuid.uuid4().hex
+sessao = st.session_state["sessao"]
+if "area" not in st.session_state:
+    st.session_state["area"] = AreaSessao()
+    weakref.finalize(st.session_state["area"], encerrar_sessao, fila, sessao, st.session_state["area"].pasta)
+area: AreaSessao = st.session_state["area"]
+area.tocar()   # batimento: limpar_orfas não apaga a pasta de uma sessão em uso
 
 # ====== UI ======
-tab_xml, tab_pdf, tab_zip = st.tabs(["XML (múltiplos)", "PDF (múltiplos)", "ZIP/Lote"])
+with st.sidebar:
+    st.subheader("Desempenho")
+    st.caption(f"Servidor: {pool.workers} processo(s) de extração e {pool.orcamento.limite_mb:.0f} MB para "
+               f"páginas em voo, compartilhados por todos os usuários; até {fila.max_simultaneos} lote(s) "
+               f"ao mesmo tempo ({fila.rodando} rodando, {fila.pendentes} na fila).")
+    if remoto is not None:
+        st.caption(f"Extração: serviço remoto ({remoto.descricao()}); o pool local só gera as saídas.")
+    if aquecido is not None and not aquecido.pronto:
+        st.caption("Carregando bibliotecas de extração em segundo plano…")
+    elif aquecido is not None and aquecido.falhas():
+        st.caption("Aquecimento com falha (o lote mostrará o erro): " + "; ".join(aquecido.falhas()))
+    max_chaves_pdf = st.number_input("Parar após N chaves por PDF (0 = ler todas as páginas)",
+                                     min_value=0, value=0, step=1,
+                                     help="Para DANFE de uma nota só, 1 evita rasterizar as páginas seguintes.")
+    uma_por_pagina = st.checkbox("Só a primeira chave de cada página", value=False)
+    camada_texto = st.checkbox("Ler a chave pelo texto do PDF antes do código de barras", value=True,
+                               help="DANFE digital: a chave é validada pelo dígito mod-11 e a página não é rasterizada.")
+    adaptativo = st.checkbox("Resolução adaptativa (DPI baixo → recorte do código → DPI alto)", value=False,
+                             help="Só sobe a resolução quando não encontra chave válida na página.")
+    usar_cache = st.checkbox("Reaproveitar resultados já processados (cache)", value=True,
+                             help="Arquivos idênticos (mesmo conteúdo) não são lidos de novo.")
+    formato_saida = st.selectbox("Formato da saída", list(FORMATOS_SAIDA),
+                                 help="Lotes grandes: CSV/Parquet são gravados bem mais rápido que o xlsx. "
+                                      "No xlsx, abas acima de 1.048.576 linhas continuam em \"Aba (2)\", ...")
+    st.subheader("Base de notas")
+    if base is None:
+        st.caption("Base local indisponível (verifique NFE_BASE_NOTAS).")
+    guardar_base = st.checkbox("Guardar as notas dos XMLs na base local", value=base is not None,
+                               disabled=base is None,
+                               help="Notas (pela chave) que já estão na base não são gravadas de novo; "
+                                    "os relatórios por período/emitente saem da base, sem reler os XMLs.")
+    somente_novas = st.checkbox("Na saída, só as notas que ainda não estavam na base", value=False,
+                                disabled=base is None or not guardar_base)
+    st.subheader("ZIP/Lote")
+    pular_cobertos = st.checkbox("Não ler PDFs cuja chave (no nome do arquivo) já veio num XML do lote",
+                                 value=False,
+                                 help="Ex.: 3524...0978.pdf com o XML da mesma nota no ZIP. O PDF entra na "
+                                      "conciliação pela chave do nome, sem ser rasterizado.")
+
+# As funções de job rodam fora do script: recebem as opções já lidas da barra lateral
+# e não usam `st` — tudo o que a tela mostra volta no dicionário de resultado.
+opcoes_lote = {"compartilhado": pool, "max_chaves": int(max_chaves_pdf) or None, "uma_por_pagina": uma_por_pagina,
+               "camada_texto": camada_texto, "adaptativo": adaptativo, "usar_cache": usar_cache,
+               "formato": FORMATOS_SAIDA[formato_saida][0], "compactar": FORMATOS_SAIDA[formato_saida][1],
+               "base": base if guardar_base else None, "somente_novas": somente_novas,
+               "pular_cobertos": pular_cobertos, "remoto": remoto}
+
+def extracao(opcoes: dict):
+    """Quem extrai: o serviço remoto (NFE_SERVICO_URLS) ou o pool local — mesma interface."""
+    return opcoes["remoto"] or paralelo
+
+def novo_cache(opcoes: dict) -> CacheResultados | None:
+    return CacheResultados() if opcoes["usar_cache"] else None
+
+def texto_cache(cache: CacheResultados | None) -> str | None:
+    if cache is None:
+        return None
+    return (f"Cache: {cache.acertos} acerto(s), {cache.faltas} falta(s), "
+            f"{cache.duplicados} arquivo(s) duplicado(s) no lote.")
+
+@contextmanager
+def registro_na_base(opcoes: dict, resultado: dict):
+    """
+    Filtro das linhas pela base (se ligada). Deve envolver a escrita da saída inteira: as
+    notas novas só entram na base quando ela termina sem erro (nem cancelamento).
+    """
+    if opcoes["base"] is None:
+        yield lambda linhas: linhas
+        return
+    resultado["base"] = {}
+    with opcoes["base"].lote(somente_novas=opcoes["somente_novas"], contagem=resultado["base"]) as lote:
+        yield lote.filtrar
+
+def mostrar_erros_xml(erros: list[dict]):
+    if erros:
+        import pandas as pd
+        st.warning(f"{len(erros)} XML(s) com erro foram ignorados.")
+        st.dataframe(pd.DataFrame(erros), use_container_width=True)
+
+def processar_pdfs_em_planilhas(paths: list[Path], opcoes: dict, cache: CacheResultados | None = None,
+                                raiz: Path | None = None, andamento: Andamento | None = None):
+    """
+    Gera (Resumo_PDF, Chaves_PDF, páginas por nível) para os PDFs, decodificando páginas em paralelo.
+    Com `raiz`, a coluna "arquivo" traz o caminho relativo (PDFs de pastas/ZIPs internos).
+    """
+    import pandas as pd
+    nome = (lambda p: p.relative_to(raiz).as_posix()) if raiz is not None else (lambda p: p.name)
+    paths = sorted(paths, key=lambda x: nome(x).lower())
+    resultados = extracao(opcoes).processar_pdfs(paths, compartilhado=opcoes["compartilhado"],
+                                max_chaves=opcoes["max_chaves"], uma_por_pagina=opcoes["uma_por_pagina"],
+                                camada_texto=opcoes["camada_texto"], adaptativo=opcoes["adaptativo"],
+                                cache=cache, andamento=andamento)
+    resumo, linhas, niveis = linhas_pdf([nome(p) for p in paths], resultados)
+    df_resumo = pd.DataFrame(resumo).sort_values("arquivo").reset_index(drop=True)
+    df_chaves = pd.DataFrame(linhas).drop_duplicates().reset_index(drop=True)
+    return df_resumo, df_chaves, niveis
+
+# Os uploads de um job são liberados da área quando ele termina (concluído, cancelado ou erro).
+def job_xml(arquivos: list[ArquivoSessao], pasta: Path, opcoes: dict):
+    def rodar(andamento: Andamento) -> dict:
+        from processors.pipeline import exportar_nfe
+        try:
+            cache = novo_cache(opcoes)
+            erros_xml: list[dict] = []
+            resultado: dict = {}
+            linhas = extracao(opcoes).iterar_xmls_sessao(arquivos, compartilhado=opcoes["compartilhado"],
+                                                         cache=cache, erros=erros_xml, andamento=andamento)
+            with registro_na_base(opcoes, resultado) as na_base, \
+                    abrir_saida(pasta, "NotasFiscais", opcoes) as escritor:
+                resumo = exportar_nfe(na_base(linhas), escritor.planilha("Sheet1", COLUNAS_NFE))
+        finally:
+            area.liberar(arquivos)
+        return {**resultado, "resumo_xml": resumo, "erros_xml": erros_xml, "cache": texto_cache(cache),
+                "arquivos": escritor.arquivos, "rotulo_saida": "📥 Baixar (XMLs)"}
+    return rodar
+
+def job_pdf(arquivos: list[ArquivoSessao], pasta: Path, opcoes: dict):
+    def rodar(andamento: Andamento) -> dict:
+        try:
+            cache = novo_cache(opcoes)
+            paths = [area.caminho(a) for a in arquivos]
+            df_resumo, df_chaves, niveis = processar_pdfs_em_planilhas(paths, opcoes, cache=cache,
+                                                                       andamento=andamento)
+        finally:
+            area.liberar(arquivos)
+        with abrir_saida(pasta, "pdfs", opcoes) as escritor:
+            escrever_planilhas(escritor, {"Resumo_PDF": df_resumo, "Chaves_PDF": df_chaves})
+        return {"df_resumo": df_resumo, "df_chaves": df_chaves, "niveis": niveis, "cache": texto_cache(cache),
+                "arquivos": escritor.arquivos, "rotulo_saida": "📥 Baixar (PDFs)",
+                "csv_chaves": opcoes["formato"] != "csv"}
+    return rodar
+
+def job_zip(arquivo_zip: ArquivoSessao, pasta: Path, opcoes: dict):
+    def rodar(andamento: Andamento) -> dict:
+        try:
+            # em memória, o .zip é lido dali mesmo (LeitorZip aceita arquivo aberto), sem cópia em disco
+            origem = arquivo_zip.caminho if arquivo_zip.dados is None else io.BytesIO(arquivo_zip.dados)
+            return processar_zip(origem, pasta, opcoes, andamento)
+        finally:
+            area.liberar([arquivo_zip])
+    return rodar
+
+def processar_zip(zip_path: Path | IO[bytes], pasta: Path, opcoes: dict, andamento: Andamento) -> dict:
+    # XMLs são lidos direto do .zip; só os PDFs vão para o disco. Um .zip em memória não pode
+    # ser aberto pelos workers: os XMLs vão como bytes (ou, acima do limite da área, o .zip
+    # vai para a pasta do job)
+    import pandas as pd
+    from processors.pipeline import exportar_nfe
+    inicio = time.perf_counter()
+    pasta_pdfs = pasta / "pdfs"
+    with LeitorZip(zip_path) as leitor:
+        membros = leitor.membros()
+        ignorados = leitor.ignorados
+        xmls = [m for m in membros if m.extensao == ".xml"]
+        xmls_em_memoria = None
+        if not isinstance(zip_path, Path):
+            if sum(m.tamanho for m in xmls) <= area.limite_bytes:
+                xmls_em_memoria = []
+                for m in xmls:
+                    with leitor.abrir(m) as f:
+                        xmls_em_memoria.append(ArquivoSessao(m.nome, m.tamanho, f.read(), None))
+            else:
+                zip_path.seek(0)
+                with open(pasta / "lote.zip", "wb") as f:
+                    shutil.copyfileobj(zip_path, f, 1 << 20)
+                zip_path = pasta / "lote.zip"
+        andamento.arquivos_total = len(membros)
+        pdfs = []
+        for m in membros:
+            if m.extensao == ".pdf":
+                andamento.verificar()
+                pdfs.append(leitor.copiar(m, pasta_pdfs))
+    cache = novo_cache(opcoes)
+    resultado: dict = {"ignorados_zip": ignorados}
+    # índice chave -> XML/PDFs do lote; os XMLs são indexados enquanto vão para a saída
+    indice = IndiceChaves()
+
+    if xmls or pdfs:
+        with registro_na_base(opcoes, resultado) as na_base, abrir_saida(pasta, "lote", opcoes) as escritor:
+            if xmls:
+                erros_zip: list[dict] = []
+                if xmls_em_memoria is not None:
+                    linhas_zip = extracao(opcoes).iterar_xmls_sessao(
+                        xmls_em_memoria, compartilhado=opcoes["compartilhado"], cache=cache, erros=erros_zip,
+                        andamento=andamento)
+                else:
+                    linhas_zip = extracao(opcoes).iterar_xmls_zip(
+                        zip_path, xmls, compartilhado=opcoes["compartilhado"], cache=cache, erros=erros_zip,
+                        andamento=andamento)
+                resultado["resumo_xml"] = exportar_nfe(
+                    na_base(indice.registrar_xml(linhas_zip)),
+                    escritor.planilha("XMLs", COLUNAS_NFE))
+                resultado["erros_xml"] = erros_zip
+
+            if pdfs:
+                df_resumo, df_chaves, niveis = processar_pdfs_do_lote(pdfs, pasta_pdfs, indice, opcoes,
+                                                                      cache, andamento)
+                escrever_planilhas(escritor, {"Resumo_PDF": df_resumo, "Chaves_PDF": df_chaves})
+                resultado.update(df_resumo=df_resumo.head(50), niveis=niveis)
+
+            df_conciliacao = pd.DataFrame(indice.linhas(), columns=COLUNAS_CONCILIACAO)
+            escrever_planilhas(escritor, {"Conciliacao": df_conciliacao})
+            resultado["conciliacao"] = indice.contagem()
+            resultado["df_conciliacao"] = df_conciliacao[df_conciliacao["Situação"] != SITUACOES[0]].head(50)
+        resultado.update(arquivos=escritor.arquivos, rotulo_saida="📥 Baixar consolidado (ZIP/Lote)")
+        shutil.rmtree(pasta_pdfs, ignore_errors=True)
+
+    total_bytes = sum(m.tamanho for m in membros)
+    segundos = time.perf_counter() - inicio
+    resultado["cache"] = texto_cache(cache)
+    resultado["lote"] = (f"Lote: {len(xmls)} XML(s), {len(pdfs)} PDF(s), {total_bytes / 2**20:.1f} MB em "
+                         f"{segundos:.1f} s ({total_bytes / 2**20 / max(segundos, 1e-9):.1f} MB/s)")
+    return resultado
+
+def processar_pdfs_do_lote(pdfs: list[Path], raiz: Path, indice: IndiceChaves, opcoes: dict,
+                           cache: CacheResultados | None, andamento: Andamento):
+    """
+    Planilhas de PDF do lote, registrando as chaves lidas no índice. Com "pular_cobertos",
+    PDFs cuja chave no nome já veio num XML do lote não são lidos: entram com essa chave.
+    """
+    import pandas as pd
+    cobertos: dict[str, str] = {}
+    if opcoes["pular_cobertos"]:
+        for p in pdfs:
+            chave = indice.coberto_por_xml(p.name)
+            if chave is not None:
+                cobertos[p.relative_to(raiz).as_posix()] = chave
+    a_ler = [p for p in pdfs if p.relative_to(raiz).as_posix() not in cobertos]
+    df_resumo, df_chaves, niveis = (processar_pdfs_em_planilhas(a_ler, opcoes, cache=cache, raiz=raiz,
+                                                                andamento=andamento)
+                                    if a_ler else (pd.DataFrame(), pd.DataFrame(), {}))
+    if cobertos:
+        andamento.avancar(arquivos=len(cobertos))
+        df_resumo = pd.concat([df_resumo, pd.DataFrame(
+            [{"arquivo": n, "qtd_chaves_44": 1, "chaves_44": c, "outras_leituras": "", "origem": ORIGEM_XML_DO_LOTE}
+             for n, c in cobertos.items()])], ignore_index=True).sort_values("arquivo").reset_index(drop=True)
+        df_chaves = pd.concat([df_chaves, pd.DataFrame(
+            [{"arquivo": n, "chave_44": c, "origem": ORIGEM_XML_DO_LOTE} for n, c in cobertos.items()])],
+            ignore_index=True)
+    for arquivo, chave in zip(df_chaves.get("arquivo", []), df_chaves.get("chave_44", [])):
+        indice.registrar_pdf(arquivo, [chave])
+    return df_resumo, df_chaves, niveis
+
+def job_relatorio(inicio: date | None, fim: date | None, cnpjs: list[str], pasta: Path, opcoes: dict):
+    # relatório pela base de notas: consulta indexada por período/emitente, sem reler os XMLs
+    def rodar(andamento: Andamento) -> dict:
+        import pandas as pd
+        from processors.pipeline import exportar_nfe
+
+        def linhas():
+            for n, linha in enumerate(base.consultar(inicio, fim, cnpjs)):
+                if n % 5000 == 0:
+                    andamento.verificar()
+                yield linha
+
+        df_emitentes = pd.DataFrame(base.resumo_emitentes(inicio, fim, cnpjs),
+                                    columns=["CNPJ", "Emitente", "Notas", "Itens", "Valor das notas",
+                                             "Primeira emissão", "Última emissão"])
+        with abrir_saida(pasta, "relatorio", opcoes) as escritor:
+            resumo = exportar_nfe(linhas(), escritor.planilha("XMLs", COLUNAS_NFE))
+            escrever_planilhas(escritor, {"Emitentes": df_emitentes})
+        return {"resumo_xml": resumo, "df_emitentes": df_emitentes,
+                "arquivos": escritor.arquivos, "rotulo_saida": "📥 Baixar relatório"}
+    return rodar
+
+# ====== Painel de jobs ======
+def texto_andamento(a: Andamento) -> str:
+    partes = [f"{a.arquivos}/{a.arquivos_total} arquivo(s)"]
+    if a.paginas or a.paginas_total:
+        partes.append(f"{a.paginas}/{a.paginas_total} página(s)" if a.paginas_total else f"{a.paginas} página(s)")
+    eta = a.eta()
+    if eta is not None:
+        partes.append(f"faltam ~{eta:.0f} s")
+    return " · ".join(partes)
+
+def mostrar_resultado(job: Job):
+    r = job.resultado
+    if r.get("lote"):
+        st.caption(r["lote"])
+    if r.get("cache"):
+        st.caption(r["cache"])
+    if r.get("base"):
+        st.caption(f"Base de notas: {r['base']['novas']} nota(s) nova(s) gravada(s), "
+                   f"{r['base']['existentes']} já estava(m) na base.")
+    if "df_emitentes" in r:
+        st.subheader("Por emitente"); st.dataframe(r["df_emitentes"], use_container_width=True, hide_index=True)
+    if r.get("ignorados_zip"):
+        import pandas as pd
+        st.warning(f"{len(r['ignorados_zip'])} entrada(s) do ZIP ficaram de fora (ZIP interno ilegível ou limite "
+                   f"de profundidade/entradas).")
+        st.dataframe(pd.DataFrame(r["ignorados_zip"], columns=["arquivo", "motivo"]), use_container_width=True)
+    if "resumo_xml" in r:
+        mostrar_erros_xml(r.get("erros_xml", []))
+        st.write("Prévia XMLs"); mostrar_resumo_xml(r["resumo_xml"])
+    if "df_resumo" in r:
+        if r.get("niveis"):
+            st.caption("Páginas resolvidas por nível: " + ", ".join(f"{k}: {v}" for k, v in sorted(r["niveis"].items())))
+        st.subheader("Resumo por arquivo"); st.dataframe(r["df_resumo"], use_container_width=True)
+    if "df_chaves" in r:
+        st.subheader("Linhas por chave"); st.dataframe(r["df_chaves"], use_container_width=True)
+    if r.get("conciliacao"):
+        st.subheader("Conciliação XML x PDF")
+        st.caption(" · ".join(f"{s}: {r['conciliacao'].get(s, 0)}" for s in SITUACOES)
+                   + " — lista completa na aba Conciliacao.")
+        if not r["df_conciliacao"].empty:
+            st.dataframe(r["df_conciliacao"], use_container_width=True, hide_index=True)
+    arquivos = [p for p in r.get("arquivos", []) if Path(p).exists()]
+    for i, p in enumerate(arquivos):
+        rotulo = r["rotulo_saida"] if len(arquivos) == 1 else f"{r['rotulo_saida']}: {p.name}"
+        baixar_arquivo(rotulo, p, p.name, mime=MIME[p.suffix.lstrip(".")], key=f"saida-{job.id}-{i}")
+    if r.get("csv_chaves"):
+        st.download_button("Baixar chaves (CSV)",
+                           data=r["df_chaves"].to_csv(index=False).encode("utf-8"),
+                           file_name="chaves_por_linha.csv", mime="text/csv", use_container_width=True,
+                           key=f"csv-{job.id}")
+    if "arquivos" not in r and "resumo_xml" not in r:
+        st.info("Nenhum XML/PDF válido no lote.")
+    if r.get("metricas") is not None:
+        mostrar_metricas(job.id, r["metricas"])
+
+def mostrar_metricas(job_id: str, m: metricas.Metricas):
+    import pandas as pd
+    with st.expander("Tempo por estágio"):
+        c = m.contadores
+        st.caption(f"Total {m.segundos_total or 0:.1f} s · pico de memória neste lote {m.pico_rss_kb / 1024:.0f} MB (maior processo) · "
+                   f"{c.get(metricas.BYTES_LIDOS, 0) / 2**20:.1f} MB de PDF lidos · "
+                   f"{c.get(metricas.PAGINAS_RASTERIZADAS, 0)} página(s) rasterizada(s). "
+                   "Tempos somados entre os processos do pool.")
+        st.dataframe(pd.DataFrame(m.resumo()), use_container_width=True, hide_index=True)
+        lentos = m.mais_lentos(10)
+        if lentos:
+            st.write("Arquivos/páginas mais lentos")
+            st.dataframe(pd.DataFrame(lentos), use_container_width=True, hide_index=True)
+        st.download_button("Baixar métricas (JSON)", data=json.dumps(m.para_json(), ensure_ascii=False, indent=2),
+                           file_name="metricas.json", mime="application/json", key=f"metricas-{job_id}")
+
+def mostrar_job(job: Job):
+    with st.container(border=True):
+        st.markdown(f"**{job.titulo}** — {job.estado} ({job.segundos:.0f} s)")
+        if job.estado == PENDENTE:
+            posicao = fila.posicao(job.id)
+            st.progress(0.0, text=f"Na fila: posição {posicao}" if posicao else "Na fila")
+        if job.estado == EXECUTANDO:
+            st.progress(job.andamento.fracao, text=texto_andamento(job.andamento))
+        if job.estado in (PENDENTE, EXECUTANDO):
+            st.button("Cancelar", key=f"cancelar-{job.id}", on_click=fila.cancelar, args=(job.id,),
+                      disabled=job.andamento.cancelado)
+            return
+        if job.estado == CONCLUIDO:
+            mostrar_resultado(job)
+        elif job.estado == ERRO:
+            st.error(job.erro)
+        elif job.estado == CANCELADO:
+            st.caption("Cancelado: " + texto_andamento(job.andamento))
+        st.button("Remover", key=f"remover-{job.id}", on_click=fila.remover, args=(job.id,))
+
+def painel_jobs():
+    jobs = fila.jobs(sessao)
+    if not jobs:
+        return
+    st.subheader("Lotes")
+    for job in jobs:
+        mostrar_job(job)
+
+# Atualiza só o painel a cada segundo enquanto há job rodando (st.fragment, Streamlit >= 1.37);
+# sem fragmentos, um botão refaz a página.
+em_andamento = any(j.estado in (PENDENTE, EXECUTANDO) for j in fila.jobs(sessao))
+if hasattr(st, "fragment"):
+    @st.fragment(run_every=1 if em_andamento else None)
+    def painel_ao_vivo():
+        painel_jobs()
+        if em_andamento and not any(j.estado in (PENDENTE, EXECUTANDO) for j in fila.jobs(sessao)):
+            st.rerun()  # terminou: redesenha a página inteira e para de consultar
+else:
+    def painel_ao_vivo():
+        if em_andamento:
+            st.button("Atualizar andamento")
+        painel_jobs()
+
+def medindo(titulo: str, rodar):
+    """Envolve a função do job: coleta as métricas dos estágios e publica ao terminar."""
+    def rodar_medindo(andamento: Andamento) -> dict:
+        m = metricas.Metricas()
+        estado = "erro"
+        try:
+            with metricas.coletando(m):
+                resultado = rodar(andamento)
+            estado = "concluido"
+        except Cancelado:
+            estado = "cancelado"
+            raise
+        finally:
+            publicar_metricas(m, titulo, estado)
+        resultado["metricas"] = m
+        return resultado
+    return rodar_medindo
+
+def publicar_metricas(m: metricas.Metricas, titulo: str, estado: str):
+    acumulado.juntar(m.exportar())
+    try:
+        if METRICAS_JSONL:
+            metricas.gravar_jsonl(m, METRICAS_JSONL, lote=titulo, estado=estado,
+                                  data=datetime.now().isoformat(timespec="seconds"))
+        if METRICAS_PROM:
+            metricas.gravar_prometheus(acumulado, METRICAS_PROM)
+    except OSError:
+        pass  # métricas nunca derrubam o lote
+
+def submeter(titulo: str, func, pasta: Path, arquivos_total: int = 0):
+    fila.submeter(titulo, medindo(titulo, func), dono=sessao, pasta=pasta, arquivos_total=arquivos_total)
+    st.rerun()
+
+tab_xml, tab_pdf, tab_zip, tab_base = st.tabs(["XML (múltiplos)", "PDF (múltiplos)", "ZIP/Lote", "Base de notas"])
 
 # --- XML ---
 with tab_xml:
     st.subheader("Enviar XMLs")
     xml_files = st.file_uploader("Selecione um ou mais arquivos .xml", type=["xml"], accept_multiple_files=True)
     if st.button("Processar XMLs", disabled=not xml_files):
-        paths = save_uploaded_files(xml_files, session_tmp / "xml")
-        colunas = [
-            "NFe","Série","Natureza da Operação","Data de emissão","Data de Saída/Entrada",
-            "Valor do Frete","Chave","CNPJ do Emitente","Nome do Emitente","Valor Total da Nota",
-            "Valor Total dos Produtos","Descontos Aplicados","Outras Despesas Acessórias",
-            "Nº Item na Nota","Cód. Produto","Descrição","Unidade de Medida","Quantidade",
-            "Valor Unitário","Desconto","Valor Total do Item","ICMS(%)","ICMS (valor)","IPI(%)","IPI (valor)",
-        ]
-        notas: list[list[str]] = []
-        for p in paths:
-            extract_info_from_xml(p, notas)
-        df_xml = pd.DataFrame(columns=colunas, data=notas)
-        st.dataframe(df_xml.head(50), use_container_width=True)
-        excel_bytes = format_excel(df_xml)
-        st.download_button("📥 Baixar Excel (XMLs)", data=excel_bytes.getvalue(),
-                           file_name=f"NotasFiscais-{datetime.now().strftime('%Y%m%d-%H%M%S')}.xlsx",
-                           mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                           use_container_width=True)
+        arquivos = guardar_uploads(area, xml_files)
+        pasta = area.subpasta("job")
+        submeter(f"XMLs ({len(arquivos)})", job_xml(arquivos, pasta, opcoes_lote), pasta, len(arquivos))
 
 # --- PDF ---
 with tab_pdf:
     st.subheader("Enviar PDFs")
     pdf_files = st.file_uploader("Selecione um ou mais PDFs", type=["pdf"], accept_multiple_files=True)
     if st.button("Processar PDFs", disabled=not pdf_files):
-        paths = save_uploaded_files(pdf_files, session_tmp / "pdf")
-        linhas, resumo = [], []
-        for p in sorted(paths, key=lambda x: x.name.lower()):
-            try:
-                chaves, outras = extrair_chaves_de_pdf(str(p))
-                chaves = sorted(set(chaves))
-                for c in chaves:
-                    linhas.append({"arquivo": p.name, "chave_44": c})
-                resumo.append({
-                    "arquivo": p.name,
-                    "qtd_chaves_44": len(chaves),
-                    "chaves_44": ", ".join(chaves),
-                    "outras_leituras": ", ".join(outras) if outras else ""
-                })
-            except Exception as e:
-                resumo.append({"arquivo": p.name, "qtd_chaves_44": 0, "chaves_44": "", "outras_leituras": f"ERRO: {e}"})
-
-        df_resumo = pd.DataFrame(resumo).sort_values("arquivo").reset_index(drop=True)
-        df_chaves = pd.DataFrame(linhas).drop_duplicates().reset_index(drop=True)
-        st.subheader("Resumo por arquivo"); st.dataframe(df_resumo, use_container_width=True)
-        st.subheader("Linhas por chave"); st.dataframe(df_chaves, use_container_width=True)
-
-        xlsx = df_to_excel_bytes({"Resumo_PDF": df_resumo, "Chaves_PDF": df_chaves})
-        st.download_button("📥 Baixar Excel (PDFs)", data=xlsx, file_name=excel_filename("pdfs"),
-                           mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                           use_container_width=True)
-        st.download_button("Baixar chaves (CSV)",
-                           data=df_chaves.to_csv(index=False).encode("utf-8"),
-                           file_name="chaves_por_linha.csv", mime="text/csv", use_container_width=True)
+        arquivos = guardar_uploads(area, pdf_files, em_disco=True)
+        pasta = area.subpasta("job")
+        submeter(f"PDFs ({len(arquivos)})", job_pdf(arquivos, pasta, opcoes_lote), pasta, len(arquivos))
 
 # --- ZIP/Lote ---
 with tab_zip:
     st.subheader("Enviar ZIP com lote (XMLs e/ou PDFs)")
     zip_file = st.file_uploader("Selecione um .zip", type=["zip"])
     if st.button("Processar ZIP", disabled=not zip_file):
-        paths = extract_zip_to(zip_file.getvalue(), session_tmp / "zip")
-        xmls = [p for p in paths if p.suffix.lower()==".xml"]
-        pdfs = [p for p in paths if p.suffix.lower()==".pdf"]
-        sheets: dict[str, pd.DataFrame] = {}
-
-        if xmls:
-            colunas = [
-                "NFe","Série","Natureza da Operação","Data de emissão","Data de Saída/Entrada",
-                "Valor do Frete","Chave","CNPJ do Emitente","Nome do Emitente","Valor Total da Nota",
-                "Valor Total dos Produtos","Descontos Aplicados","Outras Despesas Acessórias",
-                "Nº Item na Nota","Cód. Produto","Descrição","Unidade de Medida","Quantidade",
-                "Valor Unitário","Desconto","Valor Total do Item","ICMS(%)","ICMS (valor)","IPI(%)","IPI (valor)",
-            ]
-            notas_zip: list[list[str]] = []
-            for p in xmls:
-                extract_info_from_xml(p, notas_zip)
-            df_xml_zip = pd.DataFrame(columns=colunas, data=notas_zip)
-            sheets["XMLs"] = df_xml_zip
-            st.write("Prévia XMLs do ZIP"); st.dataframe(df_xml_zip.head(50), use_container_width=True)
-
-        if pdfs:
-            linhas, resumo = [], []
-            for p in sorted(pdfs, key=lambda x: x.name.lower()):
-                try:
-                    chaves, outras = extrair_chaves_de_pdf(str(p))
-                    chaves = sorted(set(chaves))
-                    for c in chaves:
-                        linhas.append({"arquivo": p.name, "chave_44": c})
-                    resumo.append({"arquivo": p.name, "qtd_chaves_44": len(chaves),
-                                   "chaves_44": ", ".join(chaves),
-                                   "outras_leituras": ", ".join(outras) if outras else ""})
-                except Exception as e:
-                    resumo.append({"arquivo": p.name, "qtd_chaves_44": 0, "chaves_44": "", "outras_leituras": f"ERRO: {e}"})
-            sheets["Resumo_PDF"] = pd.DataFrame(resumo).sort_values("arquivo").reset_index(drop=True)
-            sheets["Chaves_PDF"] = pd.DataFrame(linhas).drop_duplicates().reset_index(drop=True)
-            st.write("Prévia PDFs do ZIP"); st.dataframe(sheets["Resumo_PDF"].head(50), use_container_width=True)
-
-        if sheets:
-            xlsx = df_to_excel_bytes(sheets)
-            st.download_button("📥 Baixar Excel consolidado (ZIP/Lote)", data=xlsx, file_name=excel_filename("lote"),
-                               mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                               use_container_width=True)
-        else:
-            st.info("Nenhum XML/PDF válido no ZIP.")
-
-
+        # o .zip é salvo uma vez (o upload só existe nesta execução do script); o resto roda no job
+        arquivo_zip = guardar_uploads(area, [zip_file], em_disco=True)[0]
+        pasta = area.subpasta("job")
+        submeter(f"ZIP {zip_file.name}", job_zip(arquivo_zip, pasta, opcoes_lote), pasta)
+
+# --- Base de notas ---
+with tab_base:
+    st.subheader("Relatório pela base de notas")
+    if base is None:
+        st.info("Base local indisponível.")
+    else:
+        t = base.totais()
+        st.caption(f"{t['notas']} nota(s) e {t['itens']} item(ns) na base"
+                   + (f", emitidas de {t['primeira']} a {t['ultima']}." if t["primeira"] else "."))
+        c1, c2 = st.columns(2)
+        inicio = c1.date_input("Emitidas a partir de", value=None, format="DD/MM/YYYY")
+        fim = c2.date_input("Emitidas até", value=None, format="DD/MM/YYYY")
+        cnpjs_txt = st.text_input("CNPJs do emitente (separados por vírgula; vazio = todos)")
+        cnpjs = [so_digitos(c) for c in cnpjs_txt.split(",") if so_digitos(c)]
+        if st.button("Gerar relatório", disabled=not t["notas"]):
+            pasta = area.subpasta("job")
+            periodo = f"{inicio or '…'} a {fim or '…'}"
+            submeter(f"Relatório {periodo}", job_relatorio(inicio, fim, cnpjs, pasta, opcoes_lote), pasta)
+
+painel_ao_vivo()
@@ -0,0 +1,114 @@
+# nfe-suite/apps/combo_app/processors/aquecimento.py
+# Aquecimento do processo: carrega uma vez, fora do caminho da primeira interação, o que o
+# app só importa quando uma aba precisa (pandas/xlsxwriter, pdf2image, decodificadores com a
+# libzbar/zxing-cpp) e roda o Poppler uma vez num PDF mínimo (binários, libs e cache de
+# fontes no cache de página do SO). O app chama aquecer_em_segundo_plano() uma vez por
+# processo; os workers do pool de extração rodam aquecer_worker() ao subir.
+# Falhas (ex.: Poppler ausente) só ficam registradas: o erro de verdade aparece no lote.
+
+from __future__ import annotations
+import os
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+SAIDA = "saida"                     # pandas, xlsxwriter, pipeline/exportação (processo do app)
+EXTRATORES = "extratores"           # pdf2image, extrator de PDF, camada de texto
+DECODIFICADORES = "decodificadores"
+POPPLER = "poppler"
+ETAPAS = (SAIDA, EXTRATORES, DECODIFICADORES, POPPLER)
+
+def _pdf_minimo() -> bytes:
+    """PDF de uma página com um texto em Helvetica (faz o Poppler carregar as fontes)."""
+    conteudo = b"BT /F1 12 Tf 20 20 Td (0) Tj ET"
+    objetos = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 72 72] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(conteudo), conteudo),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    saida = bytearray(b"%PDF-1.4\n")
+    posicoes = []
+    for i, obj in enumerate(objetos, 1):
+        posicoes.append(len(saida))
+        saida += b"%d 0 obj\n%s\nendobj\n" % (i, obj)
+    xref = len(saida)
+    saida += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objetos) + 1)
+    saida += b"".join(b"%010d 00000 n \n" % p for p in posicoes)
+    saida += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objetos) + 1, xref)
+    return bytes(saida)
+
+def _saida() -> None:
+    import pandas  # noqa: F401
+    import xlsxwriter  # noqa: F401
+    from processors import exportacao, pipeline  # noqa: F401
+
+def _extratores() -> None:
+    from processors import extractor_pyzbar, xml_nfe  # noqa: F401
+    from processors.extractor_texto import texto_disponivel
+    texto_disponivel()
+
+def _decodificadores() -> None:
+    from PIL import Image
+    from processors.decodificadores import decodificador
+    decodificador().decodificar(Image.new("L", (64, 64), 255))
+
+def _poppler() -> None:
+    from processors.extractor_pyzbar import contar_paginas
+    from processors.raster import renderizar
+    fd, caminho = tempfile.mkstemp(suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_pdf_minimo())
+        contar_paginas(caminho)
+        renderizar(caminho, 1, 1, dpi=72)
+    finally:
+        os.unlink(caminho)
+
+_FUNCOES: Dict[str, Callable[[], None]] = {SAIDA: _saida, EXTRATORES: _extratores,
+                                          DECODIFICADORES: _decodificadores, POPPLER: _poppler}
+
+def aquecer(etapas: Tuple[str, ...] = ETAPAS) -> Dict[str, dict]:
+    """Roda as etapas pedidas; etapa -> {"segundos", "erro"} (erro None quando deu certo)."""
+    saida: Dict[str, dict] = {}
+    for etapa in etapas:
+        t0 = time.perf_counter()
+        erro = None
+        try:
+            _FUNCOES[etapa]()
+        except Exception as e:
+            erro = f"{type(e).__name__}: {e}"
+        saida[etapa] = {"segundos": round(time.perf_counter() - t0, 3), "erro": erro}
+    return saida
+
+class Aquecimento:
+    """aquecer() numa thread daemon; `resultado` fica disponível quando `pronto`."""
+
+    def __init__(self, etapas: Tuple[str, ...] = ETAPAS):
+        self.resultado: Dict[str, dict] | None = None
+        self._thread = threading.Thread(target=self._rodar, args=(etapas,), name="aquecimento", daemon=True)
+        self._thread.start()
+
+    def _rodar(self, etapas: Tuple[str, ...]) -> None:
+        self.resultado = aquecer(etapas)
+
+    @property
+    def pronto(self) -> bool:
+        return not self._thread.is_alive()
+
+    def esperar(self, timeout: float | None = None) -> Dict[str, dict] | None:
+        self._thread.join(timeout)
+        return self.resultado
+
+    def falhas(self) -> List[str]:
+        return [f"{etapa}: {r['erro']}" for etapa, r in (self.resultado or {}).items() if r["erro"]]
+
+def aquecer_em_segundo_plano(etapas: Tuple[str, ...] = ETAPAS) -> Aquecimento:
+    return Aquecimento(etapas)
+
+def aquecer_worker() -> None:
+    """Inicializador dos processos do pool: extratores e decodificadores (o Poppler é subprocesso)."""
+    aquecer((EXTRATORES, DECODIFICADORES))
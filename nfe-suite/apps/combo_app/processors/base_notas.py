@@ -0,0 +1,259 @@
+# nfe-suite/apps/combo_app/processors/base_notas.py
+# Base local (SQLite) das NF-e já processadas: cabeçalho em `notas` (chave = chNFe) e itens
+# em `itens`, com índices por CNPJ do emitente + data de emissão e por data. Um lote novo
+# só insere as notas que a base ainda não tem; os relatórios saem de consultas indexadas
+# por período/emitente, sem reler os XMLs. As linhas de entrada e de saída são as mesmas
+# 25 colunas (str) do extrator (xml_nfe), então qualquer saída do pipeline serve.
+# As notas de um lote só entram na base quando a saída dele termina sem erro (LoteBase):
+# até lá ficam em tabelas temporárias da conexão do lote, invisíveis aos outros lotes.
+
+from __future__ import annotations
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import date
+from itertools import groupby
+from pathlib import Path
+from typing import Iterable, Iterator, List, NamedTuple, Sequence
+
+from processors.xml_nfe import COLUNAS_NFE
+
+ARQUIVO_PADRAO = Path(os.environ.get("NFE_BASE_NOTAS") or Path.home() / ".nfe_suite" / "notas.sqlite3")
+
+# colunas do extrator -> (coluna SQL, tipo); as 13 primeiras são da nota, as demais do item
+_NOTA = [
+    ("NFe", "nfe", "TEXT"), ("Série", "serie", "TEXT"), ("Natureza da Operação", "natureza", "TEXT"),
+    ("Data de emissão", "data_emissao", "DATA"), ("Data de Saída/Entrada", "data_saida", "DATA"),
+    ("Valor do Frete", "valor_frete", "REAL"), ("Chave", "chave", "TEXT"),
+    ("CNPJ do Emitente", "cnpj_emitente", "TEXT"), ("Nome do Emitente", "nome_emitente", "TEXT"),
+    ("Valor Total da Nota", "valor_nota", "REAL"), ("Valor Total dos Produtos", "valor_produtos", "REAL"),
+    ("Descontos Aplicados", "descontos", "REAL"), ("Outras Despesas Acessórias", "outras_despesas", "REAL"),
+]
+_ITEM = [
+    ("Nº Item na Nota", "item", "INTEGER"), ("Cód. Produto", "cod_produto", "TEXT"),
+    ("Descrição", "descricao", "TEXT"), ("Unidade de Medida", "unidade", "TEXT"),
+    ("Quantidade", "quantidade", "REAL"), ("Valor Unitário", "valor_unitario", "REAL"),
+    ("Desconto", "desconto", "REAL"), ("Valor Total do Item", "valor_item", "REAL"),
+    ("ICMS(%)", "icms_pct", "REAL"), ("ICMS (valor)", "icms_valor", "REAL"),
+    ("IPI(%)", "ipi_pct", "REAL"), ("IPI (valor)", "ipi_valor", "REAL"),
+]
+assert [c for c, _, _ in _NOTA + _ITEM] == COLUNAS_NFE
+_N_NOTA = len(_NOTA)
+_I_CHAVE = COLUNAS_NFE.index("Chave")
+_LOTE_COMMIT = 500   # notas por transação (nas tabelas temporárias do lote)
+
+def _ddl_notas(tabela: str) -> str:
+    return (f"CREATE TABLE IF NOT EXISTS {tabela} ("
+            + ", ".join(f"{c} {'TEXT' if t == 'DATA' else t}" + (" PRIMARY KEY" if c == "chave" else "")
+                        for _, c, t in _NOTA)
+            + ", importado REAL NOT NULL)")
+
+def _ddl_itens(tabela: str, referencia: str = "") -> str:
+    return (f"CREATE TABLE IF NOT EXISTS {tabela} (chave TEXT NOT NULL{referencia}, "
+            + ", ".join(f"{c} {t}" for _, c, t in _ITEM)
+            + ", PRIMARY KEY (chave, item)) WITHOUT ROWID")
+
+class ResumoEmitente(NamedTuple):
+    cnpj: str
+    nome: str
+    notas: int
+    itens: int
+    valor_notas: float
+    primeira: str | None   # data de emissão (AAAA-MM-DD)
+    ultima: str | None
+
+def _data_iso(valor: str) -> str | None:
+    # "31/01/2024" -> "2024-01-31" (ordena e compara como texto)
+    return f"{valor[6:10]}-{valor[3:5]}-{valor[0:2]}" if len(valor) == 10 else None
+
+def _data_br(valor: str | None) -> str:
+    return f"{valor[8:10]}/{valor[5:7]}/{valor[0:4]}" if valor else ""
+
+def _real(valor: str) -> float | None:
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return None
+
+def _para_sql(tipo: str, valor: str):
+    if tipo == "DATA":
+        return _data_iso(valor)
+    if tipo == "REAL":
+        return _real(valor)
+    if tipo == "INTEGER":
+        return int(valor) if valor.isdigit() else None
+    return valor
+
+def _de_sql(tipo: str, valor) -> str:
+    if tipo == "DATA":
+        return _data_br(valor)
+    if valor is None:
+        return ""
+    if tipo == "REAL":
+        return repr(valor)
+    return str(valor)
+
+def so_digitos(cnpj: str) -> str:
+    return "".join(filter(str.isdigit, cnpj))
+
+class BaseNotas:
+    """
+    Notas e itens em SQLite (WAL; uma conexão compartilhada entre threads, com lock).
+    Uma instância pode servir vários lotes ao mesmo tempo (ex.: st.cache_resource).
+    """
+
+    def __init__(self, arquivo: Path | str = ARQUIVO_PADRAO):
+        self.arquivo = Path(arquivo)
+        self.arquivo.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.arquivo, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(_ddl_notas("notas"))
+        self._db.execute(_ddl_itens("itens", " REFERENCES notas (chave)"))
+        self._db.execute("CREATE INDEX IF NOT EXISTS ix_notas_emitente_data ON notas (cnpj_emitente, data_emissao)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS ix_notas_data ON notas (data_emissao)")
+        self._db.commit()
+
+    # ---- entrada ----
+    def lote(self, somente_novas: bool = False, contagem: dict | None = None) -> LoteBase:
+        """Registro das notas de um lote (ver LoteBase): `with base.lote() as l: saida(l.filtrar(linhas))`."""
+        return LoteBase(self.arquivo, somente_novas, contagem)
+
+    def contem(self, chave: str) -> bool:
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM notas WHERE chave = ?", (chave,)).fetchone() is not None
+
+    # ---- consultas ----
+    @staticmethod
+    def _filtro(inicio: date | None, fim: date | None, cnpjs: Sequence[str] | None) -> tuple:
+        condicoes, params = [], []
+        if cnpjs:
+            cnpjs = [so_digitos(c) for c in cnpjs]
+            condicoes.append(f"n.cnpj_emitente IN ({', '.join('?' * len(cnpjs))})")
+            params += cnpjs
+        if inicio is not None:
+            condicoes.append("n.data_emissao >= ?")
+            params.append(inicio.isoformat())
+        if fim is not None:
+            condicoes.append("n.data_emissao <= ?")
+            params.append(fim.isoformat())
+        return (" WHERE " + " AND ".join(condicoes)) if condicoes else "", params
+
+    def consultar(self, inicio: date | None = None, fim: date | None = None,
+                  cnpjs: Sequence[str] | None = None, bloco: int = 5000) -> Iterator[List[str]]:
+        """
+        Linhas (uma por item, na ordem de COLUNAS_NFE, como str) das notas emitidas entre
+        `inicio` e `fim` (inclusive) pelos `cnpjs`, por data e chave. Lidas em blocos.
+        """
+        onde, params = self._filtro(inicio, fim, cnpjs)
+        colunas = ", ".join([f"n.{c}" for _, c, _ in _NOTA] + [f"i.{c}" for _, c, _ in _ITEM])
+        sql = (f"SELECT {colunas} FROM notas n JOIN itens i ON i.chave = n.chave{onde} "
+               "ORDER BY n.data_emissao, n.chave, i.item")
+        tipos = [t for _, _, t in _NOTA + _ITEM]
+        # conexão própria: a leitura (WAL) não segura o lock durante o relatório inteiro
+        with closing(sqlite3.connect(self.arquivo, timeout=30)) as db:
+            cur = db.execute(sql, params)
+            while linhas := cur.fetchmany(bloco):
+                for linha in linhas:
+                    yield [_de_sql(t, v) for t, v in zip(tipos, linha)]
+
+    def resumo_emitentes(self, inicio: date | None = None, fim: date | None = None,
+                         cnpjs: Sequence[str] | None = None) -> List[ResumoEmitente]:
+        """Totais por emitente no período (notas, itens, valor das notas, primeira/última emissão)."""
+        onde, params = self._filtro(inicio, fim, cnpjs)
+        sql = ("SELECT n.cnpj_emitente, MAX(n.nome_emitente), COUNT(*), "
+               " SUM((SELECT COUNT(*) FROM itens i WHERE i.chave = n.chave)), "
+               f" COALESCE(SUM(n.valor_nota), 0), MIN(n.data_emissao), MAX(n.data_emissao) FROM notas n{onde} "
+               "GROUP BY n.cnpj_emitente ORDER BY 5 DESC")
+        with self._lock:
+            return [ResumoEmitente(*r) for r in self._db.execute(sql, params).fetchall()]
+
+    def totais(self) -> dict:
+        with self._lock:
+            notas, inicio, fim = self._db.execute(
+                "SELECT COUNT(*), MIN(data_emissao), MAX(data_emissao) FROM notas").fetchone()
+            itens = self._db.execute("SELECT COUNT(*) FROM itens").fetchone()[0]
+        return {"notas": notas, "itens": itens, "primeira": inicio, "ultima": fim}
+
+    def fechar(self) -> None:
+        with self._lock:
+            self._db.close()
+
+class LoteBase:
+    """
+    Notas de um lote, com conexão própria: filtrar() repassa as linhas e guarda as notas
+    ausentes da base em tabelas temporárias (só desta conexão); confirmar() as copia para a
+    base numa transação curta. Como gerenciador de contexto, confirma na saída sem erro e
+    descarta em exceção/cancelamento — envolva a escrita da saída inteira (arquivo fechado).
+    Dois lotes simultâneos com a mesma nota contam-na como nova nos dois (INSERT OR IGNORE).
+    """
+
+    def __init__(self, arquivo: Path, somente_novas: bool = False, contagem: dict | None = None):
+        self.somente_novas = somente_novas
+        self.contagem = {} if contagem is None else contagem
+        self.contagem.update(novas=0, existentes=0)
+        self._db = sqlite3.connect(arquivo, timeout=30, check_same_thread=False)
+        self._db.execute(_ddl_notas("temp.notas_lote"))
+        self._db.execute(_ddl_itens("temp.itens_lote"))
+        self._sql_nota = (f"INSERT INTO temp.notas_lote ({', '.join(c for _, c, _ in _NOTA)}, importado) "
+                          f"VALUES ({', '.join('?' * (_N_NOTA + 1))})")
+        self._sql_item = (f"INSERT OR IGNORE INTO temp.itens_lote (chave, {', '.join(c for _, c, _ in _ITEM)}) "
+                          f"VALUES ({', '.join('?' * (len(_ITEM) + 1))})")
+
+    def __enter__(self) -> LoteBase:
+        return self
+
+    def __exit__(self, tipo, valor, tb) -> None:
+        if tipo is None:
+            self.confirmar()
+        else:
+            self.descartar()
+
+    def filtrar(self, linhas: Iterable[Sequence[str]]) -> Iterator[Sequence[str]]:
+        """
+        Repassa as linhas do extrator (as de uma nota vêm juntas) guardando as notas ainda
+        ausentes da base; com `somente_novas`, só repassa as das notas novas.
+        """
+        pendentes = 0
+        agora = time.time()
+        for chave, grupo in groupby(linhas, key=lambda linha: linha[_I_CHAVE]):
+            grupo = list(grupo)
+            nova = self._db.execute("SELECT 1 FROM main.notas WHERE chave = ? UNION ALL "
+                                    "SELECT 1 FROM temp.notas_lote WHERE chave = ?", (chave, chave)).fetchone() is None
+            if nova:
+                self._guardar(grupo, agora)
+                pendentes += 1
+                if pendentes >= _LOTE_COMMIT:
+                    self._db.commit()   # só as tabelas temporárias: não trava a base
+                    pendentes = 0
+            self.contagem["novas" if nova else "existentes"] += 1
+            if nova or not self.somente_novas:
+                yield from grupo
+
+    def _guardar(self, grupo: List[Sequence[str]], agora: float) -> None:
+        cab = grupo[0]
+        self._db.execute(self._sql_nota, [_para_sql(t, cab[i]) for i, (_, _, t) in enumerate(_NOTA)] + [agora])
+        self._db.executemany(self._sql_item, (
+            [cab[_I_CHAVE]] + [_para_sql(t, linha[_N_NOTA + j]) for j, (_, _, t) in enumerate(_ITEM)]
+            for linha in grupo))
+
+    def confirmar(self) -> None:
+        """Copia as notas do lote para a base (uma transação) e fecha a conexão."""
+        try:
+            self._db.commit()
+            self._db.execute("BEGIN IMMEDIATE")
+            self._db.execute("INSERT OR IGNORE INTO main.notas SELECT * FROM temp.notas_lote")
+            self._db.execute("INSERT OR IGNORE INTO main.itens SELECT * FROM temp.itens_lote")
+            self._db.commit()
+        except BaseException:
+            self._db.rollback()
+            raise
+        finally:
+            self._db.close()
+
+    def descartar(self) -> None:
+        self._db.rollback()
+        self._db.close()
@@ -0,0 +1,141 @@
+# nfe-suite/apps/combo_app/processors/cache.py
+# Cache persistente de resultados de extração, endereçado pelo conteúdo do arquivo:
+# chave = sha256(bytes) + extrator/versão + parâmetros (dpi, ...). Guarda as linhas do XML
+# ou o resultado do PDF em SQLite, com limite de tamanho e descarte LRU.
+
+from __future__ import annotations
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, List, Sequence
+
+PASTA_PADRAO = Path(os.environ.get("NFE_CACHE_DIR") or Path(tempfile.gettempdir()) / "nfe_suite_cache")
+LIMITE_PADRAO_MB = int(os.environ.get("NFE_CACHE_MB", "512"))
+
+def hash_arquivo(path, bloco: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for parte in iter(lambda: f.read(bloco), b""):
+            h.update(parte)
+    return h.hexdigest()
+
+class CacheResultados:
+    """
+    Cache em disco (SQLite) com limite de bytes e descarte do menos usado recentemente.
+    Contadores da instância: acertos, faltas, duplicados (arquivos idênticos no mesmo lote).
+    """
+
+    def __init__(self, pasta: Path | str = PASTA_PADRAO, limite_mb: int = LIMITE_PADRAO_MB):
+        self.pasta = Path(pasta)
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        self.limite_bytes = limite_mb * 1024 * 1024
+        self.acertos = self.faltas = self.duplicados = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.pasta / "resultados.sqlite3", timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS resultados ("
+            " chave TEXT PRIMARY KEY, valor BLOB NOT NULL, tamanho INTEGER NOT NULL, ultimo_uso REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS ix_resultados_uso ON resultados (ultimo_uso)")
+        self._db.commit()
+
+    @staticmethod
+    def chave(hash_conteudo: str, extrator: str, parametros: dict | None = None) -> str:
+        params = json.dumps(parametros or {}, sort_keys=True, default=str)
+        return hashlib.sha256(f"{hash_conteudo}|{extrator}|{params}".encode()).hexdigest()
+
+    def obter(self, chave: str) -> Any | None:
+        with self._lock:
+            row = self._db.execute("SELECT valor FROM resultados WHERE chave = ?", (chave,)).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE resultados SET ultimo_uso = ? WHERE chave = ?", (time.time(), chave))
+            self._db.commit()
+        return json.loads(row[0])
+
+    def guardar(self, chave: str, valor: Any) -> None:
+        dados = json.dumps(valor, ensure_ascii=False).encode("utf-8")
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO resultados VALUES (?, ?, ?, ?)",
+                             (chave, dados, len(dados), time.time()))
+            self._descartar()
+            self._db.commit()
+
+    def _descartar(self) -> None:
+        total = self._db.execute("SELECT COALESCE(SUM(tamanho), 0) FROM resultados").fetchone()[0]
+        if total <= self.limite_bytes:
+            return
+        for chave, tamanho in self._db.execute(
+                "SELECT chave, tamanho FROM resultados ORDER BY ultimo_uso").fetchall():
+            self._db.execute("DELETE FROM resultados WHERE chave = ?", (chave,))
+            total -= tamanho
+            if total <= self.limite_bytes:
+                break
+
+    def tamanho_bytes(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(SUM(tamanho), 0) FROM resultados").fetchone()[0]
+
+    def contadores(self) -> dict:
+        return {"acertos": self.acertos, "faltas": self.faltas, "duplicados": self.duplicados}
+
+    def somar_contadores(self, contadores: dict) -> None:
+        """Soma contadores de outro cache (ex.: o de um nó do serviço de extração)."""
+        self.acertos += contadores.get("acertos", 0)
+        self.faltas += contadores.get("faltas", 0)
+        self.duplicados += contadores.get("duplicados", 0)
+
+    def zerar_contadores(self) -> None:
+        self.acertos = self.faltas = self.duplicados = 0
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM resultados")
+            self._db.commit()
+
+def com_cache(paths: Sequence[str], cache: CacheResultados | None, extrator: str, parametros: dict,
+              calcular: Callable[[List[str]], list],
+              serializar: Callable[[Any], Any] = lambda r: r,
+              desserializar: Callable[[Any], Any] = lambda v: v,
+              cacheavel: Callable[[Any], bool] = lambda r: True,
+              hashes: Sequence[str] | None = None) -> list:
+    """
+    Resultado por arquivo (na ordem de `paths`), calculando só o que não está no cache.
+    Arquivos de conteúdo idêntico no lote são processados uma única vez, com ou sem
+    `cache` (None = só não consulta nem grava o cache persistente).
+    calcular(lista_de_paths) -> lista de resultados na mesma ordem.
+    `hashes`: sha256 já calculados (ex.: membros de ZIP); aí `paths` pode ser qualquer
+    identificador que `calcular` entenda.
+    """
+    if hashes is None:
+        hashes = [hash_arquivo(p) for p in paths]
+    chaves = [CacheResultados.chave(h, extrator, parametros) for h in hashes]
+    resolvidos: dict[str, Any] = {}
+    pendentes: dict[str, str] = {}  # chave -> path representante
+    for p, k in zip(paths, chaves):
+        if k in resolvidos or k in pendentes:
+            if cache is not None:
+                cache.duplicados += 1
+            continue
+        valor = cache.obter(k) if cache is not None else None
+        if valor is not None:
+            cache.acertos += 1
+            resolvidos[k] = desserializar(valor)
+        else:
+            if cache is not None:
+                cache.faltas += 1
+            pendentes[k] = p
+
+    if pendentes:
+        novos = calcular(list(pendentes.values()))
+        for k, r in zip(pendentes, novos):
+            resolvidos[k] = r
+            if cache is not None and cacheavel(r):
+                cache.guardar(k, serializar(r))
+    return [resolvidos[k] for k in chaves]
@@ -0,0 +1,223 @@
+# nfe-suite/apps/combo_app/processors/cli.py
+# Processamento em lote sem navegador: pastas, .zip ou arquivos de XML/PDF -> xlsx, CSV ou
+# Parquet (pela extensão de --saida; .csv.zip/.parquet.zip gravam as tabelas num .zip). Mesmo núcleo do combo_app (processors.*), sem Streamlit;
+# pandas/xlsxwriter só são importados quando a saída é escrita. Uso (na pasta combo_app):
+#   python -m processors.cli /arquivo/2024 --saida notas-2024.xlsx --workers 8
+#   python -m processors.cli lote.zip outra_pasta/ --saida notas.parquet --sem-cache
+# CSV/Parquet: as linhas dos XMLs vão para o arquivo de saída; os PDFs para
+# <nome>_pdf_resumo.<ext> e <nome>_pdf_chaves.<ext> (no .zip: XMLs, pdf_resumo e pdf_chaves).
+# --perfil imprime o tempo por estágio; --metricas-json/--metricas-prom gravam as métricas
+# (linha JSON acrescentada / arquivo no formato texto do Prometheus).
+# --base-notas grava as notas novas na base local (processors.base_notas); com
+# --somente-novas a saída traz só as notas que ainda não estavam lá (rodadas incrementais).
+
+from __future__ import annotations
+import argparse
+import sys
+import tempfile
+import time
+from contextlib import nullcontext
+from itertools import chain
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Sequence, Tuple
+
+from processors import metricas
+from processors.base_notas import ARQUIVO_PADRAO as ARQUIVO_BASE
+from processors.cache import PASTA_PADRAO, CacheResultados
+from processors.lote_zip import LeitorZip, MembroLote
+from processors.paralelo import iterar_xmls, iterar_xmls_zip, linhas_pdf, processar_pdfs, workers_padrao
+
+FORMATOS_SAIDA = (".xlsx", ".csv", ".parquet", ".csv.zip", ".parquet.zip")
+
+class Lote(NamedTuple):
+    xmls: List[Path]
+    zips: List[Tuple[Path, List[MembroLote]]]   # XMLs lidos direto do .zip
+    pdfs: List[Path]
+    nomes_pdf: List[str]                         # nome exibido (relativo à entrada)
+    bytes_total: int
+
+def coletar(entradas: Sequence[Path], pasta_pdfs: Path) -> Lote:
+    """Varre pastas (recursivo), .zip e arquivos soltos. PDFs de .zip são copiados para pasta_pdfs."""
+    xmls: List[Path] = []
+    zips: List[Tuple[Path, List[MembroLote]]] = []
+    pdfs: List[Path] = []
+    nomes_pdf: List[str] = []
+    total = 0
+
+    def arquivo(p: Path, nome: str) -> None:
+        nonlocal total
+        ext = p.suffix.lower()
+        if ext == ".xml":
+            xmls.append(p)
+        elif ext == ".pdf":
+            pdfs.append(p)
+            nomes_pdf.append(nome)
+        elif ext == ".zip":
+            destino = pasta_pdfs / f"zip{len(zips):04d}"
+            with LeitorZip(p) as leitor:
+                membros = leitor.membros()
+                for caminho, motivo in leitor.ignorados:
+                    print(f"{nome}/{caminho}: ignorado ({motivo})", file=sys.stderr)
+                zips.append((p, [m for m in membros if m.extensao == ".xml"]))
+                for m in membros:
+                    total += m.tamanho
+                    if m.extensao == ".pdf":
+                        pdfs.append(leitor.copiar(m, destino))
+                        nomes_pdf.append(f"{nome}/{m.nome}")
+            return
+        else:
+            return
+        total += p.stat().st_size
+
+    for entrada in entradas:
+        if entrada.is_dir():
+            for p in sorted(entrada.rglob("*")):
+                if p.is_file():
+                    arquivo(p, p.relative_to(entrada).as_posix())
+        elif entrada.is_file():
+            arquivo(entrada, entrada.name)
+        else:
+            raise FileNotFoundError(f"entrada não encontrada: {entrada}")
+    return Lote(xmls, zips, pdfs, nomes_pdf, total)
+
+def _linhas_xml(lote: Lote, args, cache: CacheResultados | None, erros: list) -> Iterator[List[str]]:
+    opcoes = {"workers": args.workers, "cache": cache, "erros": erros}
+    return chain(iterar_xmls(lote.xmls, **opcoes),
+                 *(iterar_xmls_zip(z, membros, **opcoes) for z, membros in lote.zips))
+
+def formato_saida(saida: Path) -> str:
+    nome = saida.name.lower()
+    return next((f for f in sorted(FORMATOS_SAIDA, key=len, reverse=True) if nome.endswith(f)), saida.suffix.lower())
+
+def executar(args) -> int:
+    import pandas as pd
+    from processors.exportacao import abrir_escritor
+    from processors.pipeline import exportar_nfe
+    from processors.xml_nfe import COLUNAS_NFE
+
+    saida = Path(args.saida)
+    formato = formato_saida(saida)
+    if formato not in FORMATOS_SAIDA:
+        print(f"formato de saída não suportado: {saida.suffix or '(sem extensão)'} "
+              f"(use {', '.join(FORMATOS_SAIDA)})", file=sys.stderr)
+        return 2
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    cache = None if args.sem_cache else CacheResultados(args.pasta_cache)
+    base = None
+    if args.base_notas is not None:
+        from processors.base_notas import BaseNotas
+        base = BaseNotas(args.base_notas)
+    inicio = time.perf_counter()
+    medidas = metricas.Metricas()
+
+    with tempfile.TemporaryDirectory(prefix="nfe_cli_") as td, metricas.coletando(medidas):
+        lote = coletar([Path(e) for e in args.entradas], Path(td))
+        n_xml = len(lote.xmls) + sum(len(m) for _, m in lote.zips)
+        if not n_xml and not lote.pdfs:
+            print("nenhum XML/PDF encontrado nas entradas", file=sys.stderr)
+            return 2
+
+        erros_xml: list[dict] = []
+        resumo_xml = None
+        tabelas_pdf: tuple = ()
+        paginas = chaves = erros_pdf = 0
+        if lote.pdfs:
+            resultados = processar_pdfs(lote.pdfs, workers=args.workers, dpi=args.dpi,
+                                        max_rasterizacoes=args.max_rasterizacoes, max_chaves=args.max_chaves,
+                                        uma_por_pagina=args.uma_por_pagina, camada_texto=not args.sem_camada_texto,
+                                        adaptativo=args.adaptativo, dpi_baixo=args.dpi_baixo, cache=cache)
+            resumo, linhas_chaves, niveis = linhas_pdf(lote.nomes_pdf, resultados)
+            tabelas_pdf = (pd.DataFrame(resumo), pd.DataFrame(linhas_chaves))
+            paginas, chaves = sum(niveis.values()), len(linhas_chaves)
+            erros_pdf = sum(r.erro is not None for r in resultados)
+
+        linhas = _linhas_xml(lote, args, cache, erros_xml)
+        contagem_base: dict = {}
+        # as notas novas só entram na base depois que a saída foi gravada sem erro
+        lote_base = (base.lote(somente_novas=args.somente_novas, contagem=contagem_base) if base is not None
+                     else nullcontext())
+        tipo = formato.strip(".").split(".")[0]
+        nomes_pdf = ("Resumo_PDF", "Chaves_PDF") if tipo == "xlsx" else ("pdf_resumo", "pdf_chaves")
+        with lote_base, abrir_escritor(saida.with_name(saida.name[:-len(formato)]), tipo,
+                                       compactar=formato.endswith(".zip"), principal="XMLs") as escritor:
+            if base is not None:
+                linhas = lote_base.filtrar(linhas)
+            if n_xml:
+                resumo_xml = exportar_nfe(linhas, escritor.planilha("XMLs", COLUNAS_NFE), tamanho_bloco=args.bloco)
+            for nome, df in zip(nomes_pdf, tabelas_pdf):
+                escritor.planilha(nome, [str(c) for c in df.columns], formatos={}).escrever_df(df)
+        gerados = escritor.arquivos
+
+    segundos = max(time.perf_counter() - inicio, 1e-9)
+    for e in erros_xml[:20]:
+        print(f"{e['arquivo']}: {e['erro']}", file=sys.stderr)
+    if len(erros_xml) > 20:
+        print(f"... e mais {len(erros_xml) - 20} XML(s) com erro", file=sys.stderr)
+
+    arquivos = n_xml + len(lote.pdfs)
+    itens = resumo_xml.linhas if resumo_xml else 0
+    if n_xml:
+        print(f"XML  : {n_xml} arquivo(s), {itens} item(ns), {resumo_xml.notas} nota(s), {len(erros_xml)} erro(s)")
+    if lote.pdfs:
+        print(f"PDF  : {len(lote.pdfs)} arquivo(s), {paginas} página(s), {chaves} chave(s), {erros_pdf} erro(s)")
+    if contagem_base:
+        print(f"Base : {contagem_base['novas']} nota(s) nova(s), {contagem_base['existentes']} já na base")
+    if cache is not None:
+        print(f"Cache: {cache.acertos} acerto(s), {cache.faltas} falta(s), {cache.duplicados} duplicado(s)")
+    print(f"Total: {lote.bytes_total / 2**20:.1f} MB em {segundos:.1f} s — {arquivos / segundos:.1f} arquivos/s, "
+          f"{lote.bytes_total / 2**20 / segundos:.1f} MB/s, {itens / segundos:.0f} itens/s, "
+          f"{paginas / segundos:.1f} páginas/s")
+    print("Saída: " + (", ".join(str(g) for g in gerados) or "nenhuma linha para gravar"))
+    if args.perfil:
+        imprimir_perfil(medidas)
+    if args.metricas_json:
+        metricas.gravar_jsonl(medidas, args.metricas_json, entradas=list(args.entradas), saida=str(saida))
+    if args.metricas_prom:
+        metricas.gravar_prometheus(medidas, args.metricas_prom)
+    return 0
+
+def imprimir_perfil(m: metricas.Metricas) -> None:
+    print(f"Perfil (tempos somados entre processos; pico de RSS {m.pico_rss_kb / 1024:.0f} MB):")
+    for e in m.resumo():
+        print(f"  {e['estagio']:20s} {e['segundos']:9.2f} s {e['percentual']:5.1f}%  {e['chamadas']:7d} chamada(s)  "
+              f"média {e['media_ms']:8.2f} ms  máx {e['max_ms']:8.2f} ms")
+    for r in m.mais_lentos(5):
+        pagina = f" p.{r['pagina']}" if r["pagina"] else ""
+        print(f"  lento: {r['arquivo']}{pagina} ({r['estagio']}) {r['ms']:.0f} ms")
+
+def criar_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(prog="python -m processors.cli",
+                                 description="Extrai NF-e (XML) e chaves de DANFE (PDF) em lote, sem interface.")
+    ap.add_argument("entradas", nargs="+", help="pastas (recursivo), arquivos .zip, .xml ou .pdf")
+    ap.add_argument("-o", "--saida", required=True,
+                    help="arquivo de saída: .xlsx, .csv, .parquet, .csv.zip ou .parquet.zip")
+    ap.add_argument("-w", "--workers", type=int, default=workers_padrao(), help="processos em paralelo")
+    ap.add_argument("--dpi", type=int, default=300, help="DPI da rasterização dos PDFs")
+    ap.add_argument("--dpi-baixo", type=int, default=150, help="DPI da primeira tentativa no modo adaptativo")
+    ap.add_argument("--adaptativo", action="store_true", help="DPI baixo -> recorte do código -> DPI alto")
+    ap.add_argument("--sem-camada-texto", action="store_true", help="não tentar a chave pelo texto do PDF")
+    ap.add_argument("--max-chaves", type=int, default=None, help="parar cada PDF após N chaves")
+    ap.add_argument("--uma-por-pagina", action="store_true", help="só a primeira chave de cada página")
+    ap.add_argument("--max-rasterizacoes", type=int, default=None, help="páginas rasterizando ao mesmo tempo")
+    ap.add_argument("--sem-cache", action="store_true", help="não usar o cache de resultados")
+    ap.add_argument("--pasta-cache", default=str(PASTA_PADRAO), help="pasta do cache (padrão: NFE_CACHE_DIR)")
+    ap.add_argument("--base-notas", nargs="?", const=str(ARQUIVO_BASE), default=None, metavar="ARQUIVO",
+                    help="grava as notas novas na base local (padrão: NFE_BASE_NOTAS)")
+    ap.add_argument("--somente-novas", action="store_true",
+                    help="com --base-notas, a saída traz só as notas que ainda não estavam na base")
+    ap.add_argument("--bloco", type=int, default=5000, help="linhas por bloco na escrita da saída")
+    ap.add_argument("--perfil", action="store_true", help="imprime o tempo por estágio")
+    ap.add_argument("--metricas-json", help="acrescenta as métricas do lote (uma linha JSON) a este arquivo")
+    ap.add_argument("--metricas-prom", help="grava as métricas no formato texto do Prometheus")
+    return ap
+
+def main(argv=None) -> int:
+    args = criar_parser().parse_args(argv)
+    try:
+        return executar(args)
+    except (FileNotFoundError, RuntimeError) as e:
+        print(f"erro: {e}", file=sys.stderr)
+        return 2
+
+if __name__ == "__main__":
+    sys.exit(main())
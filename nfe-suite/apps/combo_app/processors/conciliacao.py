@@ -0,0 +1,88 @@
+# nfe-suite/apps/combo_app/processors/conciliacao.py
+# Conciliação XML x PDF de um lote: índice por chave (dict) alimentado pelas linhas dos XMLs
+# (à medida que vão para a saída) e pelas chaves lidas dos PDFs. Gera a planilha com a
+# situação de cada chave — XML e PDF, só XML, só PDF, DV inválido — sem PROCV no Excel.
+# Também diz se um PDF já está coberto por um XML do lote pela chave no nome do arquivo
+# (ex.: 3524...0978.pdf), para que ele nem seja rasterizado.
+
+from __future__ import annotations
+from collections import Counter
+from pathlib import PurePath
+from typing import Dict, Iterable, Iterator, List, Sequence
+
+from processors.chave_nfe import chave_valida, chaves_no_texto
+from processors.xml_nfe import COLUNAS_NFE
+
+XML_E_PDF = "XML e PDF"
+SO_XML = "só XML"
+SO_PDF = "só PDF"
+DV_INVALIDO = "DV inválido"
+SITUACOES = (XML_E_PDF, SO_XML, SO_PDF, DV_INVALIDO)
+
+# origem (Resumo_PDF/Chaves_PDF) dos PDFs não lidos por já estarem cobertos por um XML do lote
+ORIGEM_XML_DO_LOTE = "nome_arquivo (XML do lote)"
+
+COLUNAS_CONCILIACAO = ["Chave", "Situação", "NFe", "Data de emissão", "CNPJ do Emitente",
+                       "Nome do Emitente", "Valor Total da Nota", "Itens no XML", "PDFs", "Arquivos PDF"]
+
+# colunas do XML guardadas por chave (a primeira linha de cada nota)
+_I_CHAVE = COLUNAS_NFE.index("Chave")
+_CAMPOS_XML = [COLUNAS_NFE.index(c) for c in ("NFe", "Data de emissão", "CNPJ do Emitente",
+                                               "Nome do Emitente", "Valor Total da Nota")]
+_MAX_ARQUIVOS = 5   # nomes de PDF listados por chave
+
+def chave_no_nome(nome: str) -> str | None:
+    """Chave plausível (DV, UF e mês) no nome do arquivo, se houver exatamente uma."""
+    achadas = chaves_no_texto(PurePath(nome).stem)
+    return achadas[0] if len(achadas) == 1 else None
+
+class IndiceChaves:
+    """chave -> dados do XML e PDFs onde apareceu. Consultas e inserções O(1)."""
+
+    def __init__(self):
+        self.xml: Dict[str, list] = {}           # chave -> [NFe, data, CNPJ, nome, valor, itens]
+        self.pdf: Dict[str, List[str]] = {}      # chave -> arquivos PDF
+
+    def registrar_xml(self, linhas: Iterable[Sequence[str]]) -> Iterator[Sequence[str]]:
+        """Repassa as linhas do extrator indexando a chave de cada nota."""
+        for linha in linhas:
+            dados = self.xml.get(linha[_I_CHAVE])
+            if dados is None:
+                self.xml[linha[_I_CHAVE]] = [linha[i] for i in _CAMPOS_XML] + [1]
+            else:
+                dados[-1] += 1
+            yield linha
+
+    def registrar_pdf(self, arquivo: str, chaves: Iterable[str]) -> None:
+        for c in chaves:
+            self.pdf.setdefault(c, []).append(arquivo)
+
+    def coberto_por_xml(self, arquivo: str) -> str | None:
+        """Chave do nome do PDF, se um XML do lote já a tiver; senão None."""
+        chave = chave_no_nome(arquivo)
+        return chave if chave is not None and chave in self.xml else None
+
+    @staticmethod
+    def situacao(chave: str, no_xml: bool, no_pdf: bool) -> str:
+        if not chave_valida(chave):
+            return DV_INVALIDO
+        if no_xml and no_pdf:
+            return XML_E_PDF
+        return SO_XML if no_xml else SO_PDF
+
+    def linhas(self) -> List[list]:
+        """Uma linha por chave (COLUNAS_CONCILIACAO), ordenadas por situação e chave."""
+        ordem = {s: i for i, s in enumerate(SITUACOES)}
+        saida = []
+        for chave in self.xml.keys() | self.pdf.keys():
+            xml = self.xml.get(chave)
+            pdfs = self.pdf.get(chave, [])
+            situacao = self.situacao(chave, xml is not None, bool(pdfs))
+            nfe, data, cnpj, nome, valor, itens = xml if xml is not None else ["", "", "", "", "", 0]
+            arquivos = ", ".join(pdfs[:_MAX_ARQUIVOS]) + (", ..." if len(pdfs) > _MAX_ARQUIVOS else "")
+            saida.append([chave, situacao, nfe, data, cnpj, nome, valor, itens, len(pdfs), arquivos])
+        saida.sort(key=lambda l: (ordem[l[1]], l[0]))
+        return saida
+
+    def contagem(self) -> Counter:
+        return Counter(self.situacao(c, c in self.xml, c in self.pdf) for c in self.xml.keys() | self.pdf.keys())
@@ -0,0 +1,194 @@
+# nfe-suite/apps/combo_app/processors/exportacao.py
+# Saídas em blocos com a mesma interface da aba do xlsx (escrever_df por bloco):
+# CSV (cabeçalho só no primeiro bloco) e Parquet (um row group por bloco, via pyarrow).
+# Usadas pelo pipeline (processors.pipeline.exportar_nfe) e pela linha de comando.
+# abrir_escritor() dá a mesma interface do EscritorExcel (planilha(titulo, colunas)) para
+# xlsx, CSV e Parquet, com as tabelas soltas ou gravadas direto dentro de um .zip
+# (sem arquivo intermediário): é o que o app e a CLI usam para escolher o formato.
+
+from __future__ import annotations
+import importlib.util
+import io
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, List
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+def parquet_disponivel() -> bool:
+    # sem importar o pyarrow (centenas de ms): a barra lateral chama isto a cada rerun
+    return importlib.util.find_spec("pyarrow") is not None
+
+class SaidaCSV:
+    """CSV UTF-8 escrito bloco a bloco; `destino`: caminho ou arquivo texto aberto."""
+
+    def __init__(self, destino: str | Path | IO[str], sep: str = ","):
+        self._proprio = not hasattr(destino, "write")
+        self._f = open(destino, "w", encoding="utf-8", newline="") if self._proprio else destino
+        self._sep = sep
+        self.linhas = 0
+
+    def escrever_df(self, df: pd.DataFrame) -> int:
+        df.to_csv(self._f, sep=self._sep, index=False, header=self.linhas == 0, date_format="%d/%m/%Y")
+        self.linhas += len(df)
+        return len(df)
+
+    def fechar(self) -> None:
+        if self._proprio:
+            self._f.close()
+
+    def __enter__(self) -> "SaidaCSV":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.fechar()
+
+class SaidaParquet:
+    """Parquet escrito bloco a bloco (um row group por bloco). Requer pyarrow."""
+
+    def __init__(self, destino: str | Path | IO[bytes]):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            raise RuntimeError("Saída Parquet requer o pacote pyarrow (pip install pyarrow)") from e
+        self._destino = str(destino) if isinstance(destino, Path) else destino
+        self._writer = None
+        self._schema = None
+        self.linhas = 0
+
+    def escrever_df(self, df: pd.DataFrame) -> int:
+        import pandas as pd
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        # category -> valores: as categorias mudam de um bloco para o outro, e o próprio
+        # Parquet já grava as colunas de texto com dicionário
+        cats = [c for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)]
+        if cats:
+            df = df.astype({c: object for c in cats})
+        tabela = pa.Table.from_pandas(df, preserve_index=False, schema=self._schema)
+        if self._writer is None:
+            self._schema = tabela.schema
+            self._writer = pq.ParquetWriter(self._destino, self._schema)
+        self._writer.write_table(tabela)
+        self.linhas += len(df)
+        return len(df)
+
+    def fechar(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+    def __enter__(self) -> "SaidaParquet":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.fechar()
+
+# ---- várias tabelas num formato só ----
+FORMATOS = ("xlsx", "csv", "parquet")
+MIME = {"xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        "csv": "text/csv", "parquet": "application/vnd.apache.parquet", "zip": "application/zip"}
+
+class EscritorTabelas:
+    """
+    CSV ou Parquet com a interface do EscritorExcel: cada planilha(titulo, ...) vira uma
+    tabela. Soltas: `<base>_<titulo>.<ext>` (`<base>.<ext>` para a tabela `principal`);
+    com `compactar`, `<titulo>.<ext>` dentro de `<base>.<ext>.zip`, escritas em streaming.
+    As tabelas são escritas uma de cada vez (abrir a próxima fecha a anterior), como nas
+    abas do xlsx. Tabelas sem linhas não geram arquivo. `arquivos`: o que foi gerado.
+    """
+
+    def __init__(self, base: str | Path, formato: str, compactar: bool = False,
+                 principal: str | None = None, sep: str = ","):
+        if formato not in ("csv", "parquet"):
+            raise ValueError(f"formato de tabela não suportado: {formato}")
+        if formato == "parquet" and not parquet_disponivel():
+            raise RuntimeError("Saída Parquet requer o pacote pyarrow (pip install pyarrow)")
+        self._base = Path(base)
+        self.formato = formato
+        self._principal = principal
+        self._sep = sep
+        self._zip = None
+        if compactar:
+            self._base.parent.mkdir(parents=True, exist_ok=True)
+            self._zip = zipfile.ZipFile(self._base.with_name(f"{self._base.name}.{formato}.zip"), "w",
+                                        zipfile.ZIP_DEFLATED, allowZip64=True)
+        self.arquivos: List[Path] = [Path(self._zip.filename)] if self._zip is not None else []
+        self._aberta: _Tabela | None = None
+
+    def planilha(self, titulo: str, colunas: List[str] | None = None, formatos: dict | None = None) -> "_Tabela":
+        """Nova tabela (`colunas`/`formatos` existem pela compatibilidade com o xlsx)."""
+        if self._aberta is not None:
+            self._aberta.fechar()
+        self._aberta = _Tabela(self, titulo)
+        return self._aberta
+
+    def _abrir(self, titulo: str):
+        if self._zip is not None:
+            nome = f"{titulo}.{self.formato}"
+            # Parquet já é comprimido por coluna: guardado sem recomprimir
+            tipo = zipfile.ZIP_STORED if self.formato == "parquet" else zipfile.ZIP_DEFLATED
+            info = zipfile.ZipInfo(nome, date_time=datetime.now().timetuple()[:6])
+            info.compress_type = tipo
+            bruto = self._zip.open(info, "w", force_zip64=True)
+            if self.formato == "csv":
+                destino = io.TextIOWrapper(bruto, encoding="utf-8", newline="")
+                return SaidaCSV(destino, sep=self._sep), destino
+            return SaidaParquet(bruto), bruto
+        nome = self._base.name if titulo == self._principal else f"{self._base.name}_{titulo}"
+        caminho = self._base.with_name(f"{nome}.{self.formato}")
+        self.arquivos.append(caminho)
+        return (SaidaCSV(caminho, sep=self._sep) if self.formato == "csv" else SaidaParquet(caminho)), None
+
+    def fechar(self) -> None:
+        if self._aberta is not None:
+            self._aberta.fechar()
+            self._aberta = None
+        if self._zip is not None:
+            self._zip.close()
+
+    def __enter__(self) -> "EscritorTabelas":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.fechar()
+
+class _Tabela:
+    """Uma tabela do EscritorTabelas; o arquivo (ou membro do .zip) só é criado no primeiro bloco."""
+
+    def __init__(self, escritor: EscritorTabelas, titulo: str):
+        self._escritor = escritor
+        self._titulo = titulo
+        self._saida = None
+        self._arquivo = None
+        self.linhas = 0
+
+    def escrever_df(self, df: pd.DataFrame) -> int:
+        if not len(df):
+            return 0
+        if self._saida is None:
+            self._saida, self._arquivo = self._escritor._abrir(self._titulo)
+        n = self._saida.escrever_df(df)
+        self.linhas += n
+        return n
+
+    def fechar(self) -> None:
+        if self._saida is not None:
+            self._saida.fechar()
+            if self._arquivo is not None:
+                self._arquivo.close()
+            self._saida = self._arquivo = None
+
+def abrir_escritor(base: str | Path, formato: str = "xlsx", compactar: bool = False,
+                   principal: str | None = None):
+    """
+    Escritor de várias tabelas para `base` (caminho sem extensão): EscritorExcel para
+    "xlsx" (abas acima do limite de linhas do Excel são divididas em partes numeradas),
+    EscritorTabelas para "csv"/"parquet". `arquivos` lista o que foi gerado.
+    """
+    if formato == "xlsx":
+        from processors.excel import EscritorExcel
+        return EscritorExcel(Path(base).with_name(Path(base).name + ".xlsx"))
+    return EscritorTabelas(base, formato, compactar, principal)
@@ -1,47 +1,242 @@
 # nfe-suite/apps/combo_app/processors/extractor_pyzbar.py
-# Extrai chaves 44 dígitos lendo o código de barras do DANFE com PYZBAR.
-# Converte PDF -> imagens (uma por página) usando pdf2image (Poppler).
-# Requisitos de runtime (no container): poppler-utils, libzbar0.
+# Extrai chaves 44 dígitos lendo o código de barras do DANFE (Code128/QR) com a cadeia de
+# decodificadores de processors.decodificadores (pyzbar e/ou zxing-cpp, com fallback).
+# Converte PDF -> imagens usando pdf2image (Poppler), uma janela de páginas por vez
+# (nunca o documento inteiro em RAM), com parada antecipada opcional.
+# Camada rápida opcional: chave pela camada de texto (extractor_texto); só as páginas
+# sem chave válida no texto vão para rasterização + código de barras.
+# Modo adaptativo opcional: página inteira em DPI baixo; se não houver chave válida,
+# só a região do código de barras em DPI alto; página inteira em DPI alto por último.
+# Rasterização: por padrão pdftoppm direto em tons de cinza (processors.raster), com os
+# bytes entregues ao zbar sem cópias via PIL; "pil" mantém o caminho antigo (RGB -> L).
+# Requisitos de runtime (no container): poppler-utils e libzbar0 (ou o pacote zxing-cpp).
 
 from __future__ import annotations
-from typing import Tuple, List
+from collections import Counter
+from typing import Dict, Iterable, Iterator, Tuple, List
+import os
 import re
-from pdf2image import convert_from_path
-from pyzbar.pyzbar import decode
-from PIL import Image
+from pdf2image import convert_from_path, pdfinfo_from_path
+
+from processors import metricas
+from processors.chave_nfe import chave_valida
+from processors.decodificadores import Leitura, decodificador
+from processors.raster import MODO_CINZA, Pagina, renderizar
+
+# "gray" | "mono" (pdftoppm direto) ou "pil" (pdf2image + PIL, caminho antigo)
+RASTER_PADRAO = os.environ.get("NFE_RASTER", MODO_CINZA)
+# processos pdftoppm por faixa de páginas e pasta para as imagens (ex.: /dev/shm)
+POPPLER_THREADS = int(os.environ.get("NFE_POPPLER_THREADS", "1"))
+PASTA_RASTER = os.environ.get("NFE_RASTER_DIR") or None
 
 _ONLY_DIGITS = re.compile(r"\D+")
 
+# Muda quando a saída muda (invalida o cache de resultados)
+VERSAO_EXTRATOR = "pyzbar/2"
+
+# Camada que encontrou cada chave
+ORIGEM_TEXTO = "texto"
+ORIGEM_CODIGO = "codigo_barras"
+
+# Nível em que cada página foi resolvida (contadores para calibrar o modo adaptativo)
+NIVEL_TEXTO = "texto"
+NIVEL_BAIXO = "dpi_baixo"
+NIVEL_RECORTE = "recorte"
+NIVEL_ALTO = "dpi_alto"
+NIVEL_NENHUM = "sem_chave"
+
 def _only_digits(s: str) -> str:
     return _ONLY_DIGITS.sub("", s or "")
 
-def extrair_chaves_de_pdf(pdf_path: str, dpi: int = 300) -> Tuple[List[str], List[str]]:
-    """
-    Retorna (chaves_44, outras_leituras).
-    - chaves_44: lista de chaves com 44 dígitos deduplicadas.
-    - outras_leituras: strings lidas dos códigos (para auditoria).
-    """
-    pages = convert_from_path(pdf_path, dpi=dpi)  # requer poppler
+def _decodificar(img) -> List[Leitura]:
+    # Pagina (Y800 do pdftoppm), PIL.Image ou array; cada backend lê em tons de cinza
+    with metricas.medir(metricas.DECODIFICACAO):
+        return decodificador().decodificar(img)
+
+def _ler_imagem(img) -> List[str]:
+    """Decodifica os códigos de barras de uma página e devolve as leituras brutas."""
+    return [d.texto for d in _decodificar(img)]
+
+def _tem_chave_valida(leituras: Iterable[str]) -> bool:
+    return any(chave_valida(_only_digits(v)) for v in leituras)
+
+def classificar_leituras(leituras: Iterable[str]) -> Tuple[List[str], List[str]]:
+    """Separa as leituras brutas em (chaves_44 deduplicadas na ordem, outras_leituras)."""
     chaves: list[str] = []
     outras: list[str] = []
-
-    for img in pages:
-        if not isinstance(img, Image.Image):
-            img = Image.fromarray(img)
-        # melhora leitura: B/W
-        img = img.convert("L")
-        decoded = decode(img)  # pyzbar usa libzbar
-        for d in decoded:
-            val_raw = (d.data or b"").decode(errors="ignore")
-            if not val_raw:
-                continue
-            outras.append(val_raw)
-            dig = _only_digits(val_raw)
-            if len(dig) == 44:
-                chaves.append(dig)
+    for val_raw in leituras:
+        outras.append(val_raw)
+        dig = _only_digits(val_raw)
+        if len(dig) == 44:
+            chaves.append(dig)
 
     # dedup preservando ordem
     seen = set()
     chaves = [c for c in chaves if c not in seen and not seen.add(c)]
     return chaves, outras
 
+def contar_paginas(pdf_path: str) -> int:
+    with metricas.medir(metricas.PDFINFO):
+        return int(pdfinfo_from_path(pdf_path)["Pages"])
+
+def rasterizar(pdf_path: str, primeira: int, ultima: int, dpi: int = 300,
+               raster: str | None = None, caixa: tuple | None = None) -> list:
+    """Páginas [primeira, ultima] como Pagina (pdftoppm direto) ou PIL.Image (raster="pil")."""
+    raster = raster or RASTER_PADRAO
+    with metricas.medir(metricas.RASTER, pagina=primeira):
+        if raster == "pil":
+            paginas = convert_from_path(pdf_path, dpi=dpi, first_page=primeira, last_page=ultima)
+        else:
+            paginas = renderizar(pdf_path, primeira, ultima, dpi=dpi, modo=raster, caixa=caixa,
+                                 thread_count=POPPLER_THREADS, pasta_saida=PASTA_RASTER)
+    metricas.contar(metricas.PAGINAS_RASTERIZADAS, len(paginas))
+    return paginas
+
+def ler_paginas(pdf_path: str, primeira: int, ultima: int, dpi: int = 300,
+                raster: str | None = None) -> List[List[str]]:
+    """Rasteriza só as páginas [primeira, ultima] (1-based) e devolve as leituras de cada uma."""
+    pages = rasterizar(pdf_path, primeira, ultima, dpi=dpi, raster=raster)
+    return [_ler_imagem(img) for img in pages]
+
+def iterar_paginas(pdf_path: str, dpi: int = 300, janela: int = 1) -> Iterator[List[str]]:
+    """
+    Gera as leituras de cada página, rasterizando no máximo `janela` páginas por vez.
+    A janela anterior é descartada antes de a próxima ser renderizada.
+    """
+    total = contar_paginas(pdf_path)
+    janela = max(1, janela)
+    for primeira in range(1, total + 1, janela):
+        yield from ler_paginas(pdf_path, primeira, min(total, primeira + janela - 1), dpi=dpi)
+
+def renderizar_recorte(pdf_path: str, pagina: int, dpi: int, caixa: Tuple[int, int, int, int]) -> Pagina:
+    """Rasteriza (em tons de cinza) só a caixa (x, y, w, h), em pixels no `dpi` pedido."""
+    with metricas.medir(metricas.RASTER, pagina=pagina):
+        recorte = renderizar(pdf_path, pagina, pagina, dpi=dpi, modo=MODO_CINZA, caixa=caixa)[0]
+    metricas.contar(metricas.PAGINAS_RASTERIZADAS)
+    return recorte
+
+def ler_pagina_adaptativa(pdf_path: str, pagina: int, dpi_baixo: int = 150,
+                          dpi: int = 300) -> Tuple[List[str], str]:
+    """
+    Lê uma página escalando a resolução só quando preciso. Retorna (leituras, nível):
+    NIVEL_BAIXO (página inteira em dpi_baixo), NIVEL_RECORTE (região do código em dpi),
+    NIVEL_ALTO (página inteira em dpi) ou NIVEL_NENHUM.
+    """
+    from processors.regiao_codigo import escalar_caixa, localizar_codigo_barras
+
+    with metricas.medir(metricas.RASTER, pagina=pagina):
+        img = renderizar(pdf_path, pagina, pagina, dpi=dpi_baixo, modo=MODO_CINZA)[0]
+    metricas.contar(metricas.PAGINAS_RASTERIZADAS)
+    decodificados = _decodificar(img)
+    leituras = [d.texto for d in decodificados]
+    if _tem_chave_valida(leituras):
+        return leituras, NIVEL_BAIXO
+
+    # leitura de 44 dígitos com DV errado: a caixa do próprio símbolo; senão, detecção
+    caixa = None
+    for d in decodificados:
+        if len(_only_digits(d.texto)) == 44 and d.caixa is not None:
+            m = 10
+            x, y, w, h = d.caixa
+            caixa = (max(0, x - m), max(0, y - m), w + 2 * m, h + 2 * m)
+            break
+    if caixa is None:
+        with metricas.medir(metricas.LOCALIZACAO, pagina=pagina):
+            caixa = localizar_codigo_barras(img.como_array())
+    del img
+
+    if caixa is not None:
+        recorte = renderizar_recorte(pdf_path, pagina, dpi, escalar_caixa(caixa, dpi / dpi_baixo))
+        leituras_recorte = _ler_imagem(recorte)
+        if _tem_chave_valida(leituras_recorte):
+            return leituras_recorte, NIVEL_RECORTE
+
+    leituras = ler_paginas(pdf_path, pagina, pagina, dpi=dpi)[0]
+    achou = any(len(_only_digits(v)) == 44 for v in leituras)
+    return leituras, NIVEL_ALTO if achou else NIVEL_NENHUM
+
+def _nivel_pagina(leituras: List[str]) -> str:
+    return NIVEL_ALTO if any(len(_only_digits(v)) == 44 for v in leituras) else NIVEL_NENHUM
+
+def _paginas_em_camadas(pdf_path: str, dpi: int, janela: int, camada_texto: bool,
+                        adaptativo: bool = False, dpi_baixo: int = 150) -> Iterator[Tuple[str, List[str], str]]:
+    """
+    Gera (origem, leituras, nível) por página: texto quando houver chave válida,
+    senão código de barras (adaptativo ou em `dpi` fixo).
+    """
+    por_texto = None
+    if camada_texto:
+        from processors.extractor_texto import chaves_por_pagina, texto_disponivel
+        if texto_disponivel():
+            try:
+                with metricas.medir(metricas.CAMADA_TEXTO):
+                    por_texto = chaves_por_pagina(pdf_path)
+            except Exception:  # PDF que o pypdf não abre: segue só com Poppler
+                por_texto = None
+
+    if por_texto is None and not adaptativo:
+        for pagina in iterar_paginas(pdf_path, dpi=dpi, janela=janela):
+            yield ORIGEM_CODIGO, pagina, _nivel_pagina(pagina)
+        return
+
+    if por_texto is None:
+        por_texto = [[] for _ in range(contar_paginas(pdf_path))]
+    for n, chaves_txt in enumerate(por_texto, start=1):
+        if chaves_txt:
+            yield ORIGEM_TEXTO, chaves_txt, NIVEL_TEXTO
+        elif adaptativo:
+            leituras, nivel = ler_pagina_adaptativa(pdf_path, n, dpi_baixo=dpi_baixo, dpi=dpi)
+            yield ORIGEM_CODIGO, leituras, nivel
+        else:
+            for pagina in ler_paginas(pdf_path, n, n, dpi=dpi):
+                yield ORIGEM_CODIGO, pagina, _nivel_pagina(pagina)
+
+def extrair_chaves_com_origem(pdf_path: str, dpi: int = 300, janela: int = 1,
+                              max_chaves: int | None = None, uma_por_pagina: bool = False,
+                              camada_texto: bool = True, adaptativo: bool = False, dpi_baixo: int = 150,
+                              niveis: Counter | None = None) -> Tuple[List[str], List[str], Dict[str, str]]:
+    """
+    Como extrair_chaves_de_pdf, mas tentando antes a camada de texto de cada página.
+    Retorna (chaves_44, outras_leituras, origens) com origens[chave] = ORIGEM_TEXTO ou
+    ORIGEM_CODIGO. outras_leituras contém só o que foi lido de códigos de barras.
+    - adaptativo: DPI baixo -> recorte do código em `dpi` -> página inteira em `dpi`.
+    - niveis: Counter acumulado com quantas páginas foram resolvidas em cada NIVEL_*.
+    """
+    chaves: list[str] = []
+    outras: list[str] = []
+    origens: dict[str, str] = {}
+    for origem, pagina, nivel in _paginas_em_camadas(pdf_path, dpi, janela, camada_texto,
+                                                     adaptativo=adaptativo, dpi_baixo=dpi_baixo):
+        if niveis is not None:
+            niveis[nivel] += 1
+        achou = False
+        for val_raw in pagina:
+            dig = _only_digits(val_raw)
+            if len(dig) == 44:
+                if uma_por_pagina and achou:
+                    continue
+                achou = True
+                if dig not in origens:
+                    origens[dig] = origem
+                    chaves.append(dig)
+            if origem == ORIGEM_CODIGO:
+                outras.append(val_raw)
+        if max_chaves and len(chaves) >= max_chaves:
+            break
+    return chaves, outras, origens
+
+def extrair_chaves_de_pdf(pdf_path: str, dpi: int = 300, janela: int = 1,
+                          max_chaves: int | None = None, uma_por_pagina: bool = False,
+                          camada_texto: bool = False) -> Tuple[List[str], List[str]]:
+    """
+    Retorna (chaves_44, outras_leituras).
+    - chaves_44: lista de chaves com 44 dígitos deduplicadas.
+    - outras_leituras: strings lidas dos códigos (para auditoria).
+    Páginas são processadas em janelas de `janela` páginas (memória ~ janela x 25 MB a 300 DPI).
+    - max_chaves: para de rasterizar assim que N chaves distintas forem encontradas.
+    - uma_por_pagina: considera só a primeira chave 44 de cada página.
+    - camada_texto: tenta a chave pelo texto do PDF antes de rasterizar a página.
+    """
+    chaves, outras, _ = extrair_chaves_com_origem(pdf_path, dpi=dpi, janela=janela, max_chaves=max_chaves,
+                                                  uma_por_pagina=uma_por_pagina, camada_texto=camada_texto)
+    return chaves, outras
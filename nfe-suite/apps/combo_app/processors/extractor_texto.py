@@ -0,0 +1,37 @@
+# nfe-suite/apps/combo_app/processors/extractor_texto.py
+# Camada rápida: DANFEs gerados digitalmente trazem a chave 44 como texto selecionável.
+# Lê o texto de cada página com pypdf (ou PyPDF2) e valida as chaves pelo dígito mod-11,
+# sem rasterizar nada.
+
+from __future__ import annotations
+from typing import List
+
+from processors.chave_nfe import chaves_no_texto
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # pragma: no cover - depende do ambiente
+    try:
+        from PyPDF2 import PdfReader
+    except ImportError:
+        PdfReader = None
+
+def texto_disponivel() -> bool:
+    return PdfReader is not None
+
+def chaves_por_pagina(pdf_path: str) -> List[List[str]]:
+    """
+    Uma lista de chaves válidas por página do PDF (vazia quando a página não tem
+    camada de texto ou nenhuma chave passou na validação).
+    """
+    if PdfReader is None:
+        raise RuntimeError("pypdf não instalado: camada de texto indisponível")
+    reader = PdfReader(pdf_path)
+    paginas = []
+    for page in reader.pages:
+        try:
+            texto = page.extract_text() or ""
+        except Exception:  # página com fonte/stream inválido: deixa para o código de barras
+            texto = ""
+        paginas.append(chaves_no_texto(texto))
+    return paginas
@@ -0,0 +1,195 @@
+# nfe-suite/apps/combo_app/processors/jobs.py
+# Lotes em segundo plano: cada job roda numa thread própria (que por sua vez usa o pool de
+# processos de processors.paralelo), com Andamento para progresso/ETA/cancelamento.
+# O resultado fica no Job (não na sessão do Streamlit): um rerun da página ou outra aba
+# só lê o estado, nunca reprocessa o lote. Sem Streamlit aqui.
+# Admissão: no máximo `max_simultaneos` jobs rodando no processo; os pendentes ficam numa
+# fila FIFO por dono (sessão) e as vagas são dadas em rodízio entre os donos, para que
+# um lote grande de uma sessão não segure as outras.
+
+from __future__ import annotations
+import shutil
+import threading
+import time
+import traceback
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List
+
+from processors.paralelo import Andamento, Cancelado
+
+PENDENTE = "pendente"
+EXECUTANDO = "executando"
+CONCLUIDO = "concluído"
+CANCELADO = "cancelado"
+ERRO = "erro"
+FINAIS = (CONCLUIDO, CANCELADO, ERRO)
+
+@dataclass(eq=False)
+class Job:
+    id: str
+    titulo: str
+    dono: str                          # id da sessão que submeteu
+    andamento: Andamento
+    pasta: Path | None = None          # arquivos do job (apagados em FilaJobs.remover)
+    estado: str = PENDENTE
+    erro: str | None = None
+    resultado: Dict[str, Any] = field(default_factory=dict)
+    criado: float = field(default_factory=time.time)
+    fim: float | None = None
+    func: Callable[[Andamento], Dict[str, Any]] | None = field(default=None, repr=False)
+
+    @property
+    def terminado(self) -> bool:
+        return self.estado in FINAIS
+
+    @property
+    def segundos(self) -> float:
+        return (self.fim or time.time()) - self.criado
+
+class FilaJobs:
+    """
+    Executa até `max_simultaneos` jobs ao mesmo tempo, cada um numa thread; os demais
+    esperam (PENDENTE) em filas FIFO por dono, atendidas em rodízio.
+    `func(andamento) -> dict` é chamada na thread do job; não deve usar Streamlit.
+    """
+
+    def __init__(self, max_simultaneos: int = 2):
+        self.max_simultaneos = max(1, max_simultaneos)
+        self._jobs: Dict[str, Job] = {}
+        self._filas: Dict[str, Deque[Job]] = {}
+        self._rodizio: Deque[str] = deque()       # donos com job pendente, na ordem de atendimento
+        self._rodando = 0
+        self._lock = threading.RLock()   # RLock: descartar() pode vir de um finalizador (GC)
+
+    def submeter(self, titulo: str, func: Callable[[Andamento], Dict[str, Any]], dono: str = "",
+                 pasta: Path | None = None, arquivos_total: int = 0) -> Job:
+        job = Job(uuid.uuid4().hex[:12], titulo, dono, Andamento(arquivos_total), pasta, func=func)
+        with self._lock:
+            self._jobs[job.id] = job
+            if dono not in self._filas:
+                self._filas[dono] = deque()
+                self._rodizio.append(dono)
+            self._filas[dono].append(job)
+        self._despachar()
+        return job
+
+    def _proximo(self) -> Job | None:
+        # chamado com o lock: primeiro job do dono da vez; o dono volta ao fim do rodízio
+        if not self._rodizio:
+            return None
+        dono = self._rodizio.popleft()
+        fila = self._filas[dono]
+        job = fila.popleft()
+        if fila:
+            self._rodizio.append(dono)
+        else:
+            del self._filas[dono]
+        return job
+
+    def _despachar(self) -> None:
+        with self._lock:
+            iniciar = []
+            while self._rodando < self.max_simultaneos and (job := self._proximo()) is not None:
+                self._rodando += 1
+                iniciar.append(job)
+        for job in iniciar:
+            threading.Thread(target=self._rodar, args=(job,), name=f"nfe-job-{job.id}", daemon=True).start()
+
+    def _rodar(self, job: Job) -> None:
+        func, job.func = job.func, None
+        try:
+            if job.andamento.cancelado:
+                job.estado = CANCELADO
+                return
+            job.estado = EXECUTANDO
+            job.andamento.inicio = time.monotonic()
+            job.resultado = func(job.andamento) or {}
+            job.estado = CONCLUIDO
+        except Cancelado:
+            job.estado = CANCELADO
+        except Exception as e:
+            job.erro = f"{type(e).__name__}: {e}"
+            job.resultado = {"traceback": traceback.format_exc()}
+            job.estado = ERRO
+        finally:
+            job.fim = time.time()
+            with self._lock:
+                self._rodando -= 1
+            self._despachar()
+
+    def posicao(self, job_id: str) -> int | None:
+        """Posição do job pendente na ordem em que as vagas serão dadas (1 = o próximo)."""
+        with self._lock:
+            filas = {d: list(f) for d, f in self._filas.items()}
+            rodizio = list(self._rodizio)
+        n = 0
+        for rodada in range(max((len(f) for f in filas.values()), default=0)):
+            for dono in rodizio:
+                if rodada < len(filas[dono]):
+                    n += 1
+                    if filas[dono][rodada].id == job_id:
+                        return n
+        return None
+
+    @property
+    def pendentes(self) -> int:
+        with self._lock:
+            return sum(len(f) for f in self._filas.values())
+
+    @property
+    def rodando(self) -> int:
+        return self._rodando
+
+    def obter(self, job_id: str) -> Job | None:
+        return self._jobs.get(job_id)
+
+    def jobs(self, dono: str | None = None) -> List[Job]:
+        """Jobs (de um dono, ou todos), do mais recente para o mais antigo."""
+        with self._lock:
+            lista = list(self._jobs.values())
+        if dono is not None:
+            lista = [j for j in lista if j.dono == dono]
+        return sorted(lista, key=lambda j: j.criado, reverse=True)
+
+    def cancelar(self, job_id: str) -> None:
+        """
+        Pede o cancelamento: um job pendente sai da fila na hora; um em execução para no
+        próximo bloco (páginas já em rasterização terminam).
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.terminado:
+                return
+            job.andamento.cancelar()
+            fila = self._filas.get(job.dono)
+            if job.estado == PENDENTE and fila is not None and job in fila:
+                fila.remove(job)
+                if not fila:
+                    del self._filas[job.dono]
+                    self._rodizio.remove(job.dono)
+                job.estado, job.fim, job.func = CANCELADO, time.time(), None
+
+    def remover(self, job_id: str) -> None:
+        """Esquece um job terminado e apaga a pasta dele (saídas, PDFs extraídos)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or not job.terminado:
+                return
+            del self._jobs[job_id]
+        if job.pasta is not None:
+            shutil.rmtree(job.pasta, ignore_errors=True)
+
+    def descartar(self, dono: str) -> None:
+        """Fim da sessão: cancela e esquece todos os jobs do dono (a pasta é do chamador)."""
+        for job in self.jobs(dono):
+            self.cancelar(job.id)
+        with self._lock:
+            for job in [j for j in self._jobs.values() if j.dono == dono]:
+                del self._jobs[job.id]
+
+    def encerrar(self) -> None:
+        for job in self.jobs():
+            self.cancelar(job.id)
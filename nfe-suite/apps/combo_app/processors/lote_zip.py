@@ -0,0 +1,160 @@
+# nfe-suite/apps/combo_app/processors/lote_zip.py
+# Leitura de lotes .zip sem extrair tudo para o disco: os membros são listados pelo
+# diretório central e abertos como stream (XML vai direto para o iterparse).
+# Pastas e ZIPs dentro do ZIP são percorridos; cada membro tem um nome lógico único
+# ("pasta/a.xml", "outro.zip/b/a.xml"), então arquivos homônimos não se sobrescrevem.
+# Os membros são endereçados pela posição no diretório central (não pelo nome: com duas
+# entradas "a.xml", ZipFile.open("a.xml") abriria sempre a última).
+# PDFs precisam de caminho para o Poppler: são copiados em blocos (sem ler tudo em RAM),
+# mantendo a estrutura de pastas.
+# Limites contra lotes malformados ou maliciosos (ZIP dentro de ZIP sem fim, milhões de
+# entradas): o que passa deles, e ZIPs internos ilegíveis, fica de fora e vai para
+# `ignorados` (nome lógico, motivo), como um membro com erro.
+
+from __future__ import annotations
+import hashlib
+import os
+import shutil
+import tempfile
+import zipfile
+import zlib
+from pathlib import Path, PurePosixPath
+from typing import IO, Dict, List, NamedTuple, Tuple
+
+# ZIPs internos maiores que isso vão para um temporário em disco em vez da RAM
+LIMITE_ZIP_INTERNO_RAM = 32 * 1024 * 1024
+
+MAX_PROFUNDIDADE = int(os.environ.get("NFE_ZIP_MAX_PROFUNDIDADE", "8"))        # ZIPs dentro de ZIPs
+MAX_ENTRADAS = int(os.environ.get("NFE_ZIP_MAX_ENTRADAS", "1000000"))         # no lote inteiro
+MAX_ZIP_INTERNO_MB = float(os.environ.get("NFE_ZIP_INTERNO_MAX_MB", "4096"))  # descompactado
+
+_IGNORAR = ("__MACOSX/",)
+# ZIP interno ilegível: corrompido, compressão não suportada, criptografado, truncado
+_ERROS_ZIP_INTERNO = (zipfile.BadZipFile, zipfile.LargeZipFile, zlib.error, NotImplementedError,
+                      RuntimeError, EOFError)
+
+class _LimiteEntradas(Exception):
+    pass
+
+class MembroLote(NamedTuple):
+    nome: str                 # nome lógico único dentro do lote
+    cadeia: Tuple[int, ...]   # posições no diretório central, do ZIP de fora até o arquivo
+    tamanho: int              # bytes descompactados
+
+    @property
+    def extensao(self) -> str:
+        return PurePosixPath(self.nome).suffix.lower()
+
+def _relativo_seguro(nome: str) -> PurePosixPath:
+    # sem "/", "C:" ou ".." no início: nada sai da pasta de destino
+    partes = [p for p in PurePosixPath(nome.replace("\\", "/")).parts if p not in ("", ".", "..", "/")]
+    partes = [p.replace(":", "_") for p in partes]
+    return PurePosixPath(*partes) if partes else PurePosixPath("_")
+
+class LeitorZip:
+    """
+    Abre um .zip (caminho ou file-like com seek) e seus ZIPs internos sob demanda.
+    Use como context manager; os ZIPs internos ficam abertos até o fim.
+    """
+
+    def __init__(self, origem: str | Path | IO[bytes]):
+        self._raiz = zipfile.ZipFile(origem)
+        self._internos: Dict[Tuple[int, ...], zipfile.ZipFile] = {(): self._raiz}
+        self._temporarios: list = []
+        self.ignorados: List[Tuple[str, str]] = []   # (nome lógico, motivo), preenchido por membros()
+
+    def __enter__(self) -> "LeitorZip":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.fechar()
+
+    def fechar(self) -> None:
+        for zf in self._internos.values():
+            zf.close()
+        for t in self._temporarios:
+            t.close()
+        self._internos.clear()
+        self._temporarios.clear()
+
+    def _zip(self, cadeia: Tuple[int, ...]) -> zipfile.ZipFile:
+        zf = self._internos.get(cadeia)
+        if zf is None:
+            pai = self._zip(cadeia[:-1])
+            # ZipFile faz seek para trás; sobre um membro comprimido isso redescomprime
+            # desde o início a cada salto, então o ZIP interno é copiado uma vez.
+            buf = tempfile.SpooledTemporaryFile(max_size=LIMITE_ZIP_INTERNO_RAM)
+            with pai.open(pai.infolist()[cadeia[-1]]) as src:
+                shutil.copyfileobj(src, buf, 1 << 20)
+            buf.seek(0)
+            self._temporarios.append(buf)
+            zf = self._internos[cadeia] = zipfile.ZipFile(buf)
+        return zf
+
+    def membros(self, extensoes: Tuple[str, ...] = (".xml", ".pdf")) -> List[MembroLote]:
+        """
+        Todos os arquivos com as extensões pedidas, descendo em pastas e ZIPs internos (até
+        MAX_PROFUNDIDADE níveis e MAX_ENTRADAS entradas); o que ficou de fora vai para `ignorados`.
+        """
+        saida: List[MembroLote] = []
+        vistos: set = set()
+        entradas = [0]
+        self.ignorados = []
+
+        def visitar(cadeia: Tuple[int, ...], prefixo: str) -> None:
+            for i, info in enumerate(self._zip(cadeia).infolist()):
+                entradas[0] += 1
+                if entradas[0] > MAX_ENTRADAS:
+                    raise _LimiteEntradas(prefixo + info.filename)
+                if info.is_dir() or info.filename.startswith(_IGNORAR):
+                    continue
+                sub = cadeia + (i,)
+                ext = PurePosixPath(info.filename).suffix.lower()
+                caminho = prefixo + str(_relativo_seguro(info.filename))
+                if ext == ".zip":
+                    if len(sub) > MAX_PROFUNDIDADE:
+                        self.ignorados.append((caminho, f"ZIP aninhado além de {MAX_PROFUNDIDADE} níveis"))
+                    elif info.file_size > MAX_ZIP_INTERNO_MB * 2**20:
+                        self.ignorados.append((caminho, f"ZIP interno acima de {MAX_ZIP_INTERNO_MB:.0f} MB"))
+                    else:
+                        try:
+                            visitar(sub, caminho + "/")
+                        except _ERROS_ZIP_INTERNO as e:
+                            self.ignorados.append((caminho, f"{type(e).__name__}: {e}"))
+                elif ext in extensoes:
+                    nome = caminho
+                    base, n = PurePosixPath(nome), 1
+                    while nome in vistos:  # nomes repetidos no próprio diretório central
+                        n += 1
+                        nome = str(base.with_name(f"{base.stem}~{n}{base.suffix}"))
+                    vistos.add(nome)
+                    saida.append(MembroLote(nome, sub, info.file_size))
+
+        try:
+            visitar((), "")
+        except _LimiteEntradas as e:
+            self.ignorados.append((str(e), f"lote com mais de {MAX_ENTRADAS} entradas: o restante foi ignorado"))
+        return saida
+
+    def info(self, cadeia: Tuple[int, ...]) -> zipfile.ZipInfo:
+        return self._zip(cadeia[:-1]).infolist()[cadeia[-1]]
+
+    def abrir(self, membro: MembroLote | Tuple[int, ...]) -> IO[bytes]:
+        """Stream (descompactado sob demanda) do membro."""
+        cadeia = membro.cadeia if isinstance(membro, MembroLote) else tuple(membro)
+        return self._zip(cadeia[:-1]).open(self.info(cadeia))
+
+    def hash(self, membro: MembroLote) -> str:
+        h = hashlib.sha256()
+        with self.abrir(membro) as f:
+            for parte in iter(lambda: f.read(1 << 20), b""):
+                h.update(parte)
+        return h.hexdigest()
+
+    def copiar(self, membro: MembroLote, destino: Path) -> Path:
+        """Copia o membro para destino/<nome lógico>, em blocos."""
+        alvo = Path(destino) / Path(*PurePosixPath(membro.nome).parts)
+        alvo.parent.mkdir(parents=True, exist_ok=True)
+        with self.abrir(membro) as src, open(alvo, "wb") as dst:
+            shutil.copyfileobj(src, dst, 1 << 20)
+        return alvo
@@ -0,0 +1,235 @@
+# nfe-suite/apps/combo_app/processors/metricas.py
+# Instrumentação por estágio: tempo, chamadas, bytes e itens de cada etapa (parse do XML,
+# rasterização, decodificação, camada de texto, DataFrame, escrita), registros por
+# arquivo/página e pico de memória da execução (RSS amostrado a cada medição, no maior
+# dos processos; o ru_maxrss do getrusage é o pico da vida do processo, que no servidor
+# e nos workers persistentes não muda de um lote para o outro). O coletor é por thread (coletando(m)); sem coletor
+# ativo, medir() não faz nada. Nos processos filhos do pool, mapear_em_blocos coleta
+# num Metricas local e junta o resultado no coletor de quem chamou.
+# Saídas: resumo() para a UI, para_json() (log estruturado, uma linha por lote) e
+# para_prometheus() (formato texto do Prometheus, ex.: textfile collector do node_exporter).
+
+from __future__ import annotations
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Sequence
+
+# nomes dos estágios instrumentados
+XML = "xml_parse"
+PDFINFO = "pdf_info"
+CAMADA_TEXTO = "camada_texto"
+RASTER = "rasterizacao"
+DECODIFICACAO = "decodificacao"
+LOCALIZACAO = "localizacao_codigo"
+DATAFRAME = "dataframe"
+ESCRITA = "escrita"
+
+# contadores
+BYTES_LIDOS = "bytes_lidos"
+PAGINAS_RASTERIZADAS = "paginas_rasterizadas"
+ARQUIVOS = "arquivos"
+
+MAX_REGISTROS = 5000
+
+_local = threading.local()
+
+_PAGINA_KB = (os.sysconf("SC_PAGE_SIZE") // 1024) if hasattr(os, "sysconf") else 4
+
+def rss_atual_kb() -> int:
+    """RSS (KB) deste processo agora; 0 sem /proc (o pico da execução fica sem amostras)."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGINA_KB
+    except (OSError, ValueError, IndexError):
+        return 0
+
+class Metricas:
+    """
+    Acumula, por estágio: chamadas, segundos (soma entre processos), maior tempo, bytes
+    e itens. `registros` guarda (estagio, arquivo, pagina, segundos) até MAX_REGISTROS.
+    `pico_rss_kb`: maior RSS amostrado durante a coleta, num processo (não é a soma).
+    """
+
+    def __init__(self, max_registros: int = MAX_REGISTROS):
+        self.estagios: Dict[str, Dict[str, float]] = {}
+        self.contadores: Counter = Counter()
+        self.registros: List[tuple] = []
+        self.max_registros = max_registros
+        self.pico_rss_kb = 0
+        self.inicio = time.perf_counter()
+        self.segundos_total: float | None = None
+        self._lock = threading.Lock()
+
+    def adicionar(self, estagio: str, segundos: float, arquivo: str | None = None,
+                  pagina: int | None = None, bytes: int = 0, itens: int = 0) -> None:
+        with self._lock:
+            e = self.estagios.get(estagio)
+            if e is None:
+                e = self.estagios[estagio] = {"chamadas": 0, "segundos": 0.0, "max_segundos": 0.0,
+                                              "bytes": 0, "itens": 0}
+            e["chamadas"] += 1
+            e["segundos"] += segundos
+            e["max_segundos"] = max(e["max_segundos"], segundos)
+            e["bytes"] += bytes
+            e["itens"] += itens
+            if arquivo is not None and len(self.registros) < self.max_registros:
+                self.registros.append((estagio, arquivo, pagina, segundos))
+
+    def amostrar(self) -> None:
+        # sem lock: no pior caso uma amostra concorrente se perde
+        rss = rss_atual_kb()
+        if rss > self.pico_rss_kb:
+            self.pico_rss_kb = rss
+
+    def contar(self, nome: str, n: int = 1) -> None:
+        with self._lock:
+            self.contadores[nome] += n
+
+    def encerrar(self) -> None:
+        self.segundos_total = time.perf_counter() - self.inicio
+        self.amostrar()
+
+    # ---- entre processos ----
+    def exportar(self) -> dict:
+        self.amostrar()
+        with self._lock:
+            return {"estagios": {k: dict(v) for k, v in self.estagios.items()},
+                    "contadores": dict(self.contadores), "registros": list(self.registros),
+                    "pico_rss_kb": self.pico_rss_kb}
+
+    def juntar(self, dados: dict) -> None:
+        with self._lock:
+            for nome, d in dados["estagios"].items():
+                e = self.estagios.setdefault(nome, {"chamadas": 0, "segundos": 0.0, "max_segundos": 0.0,
+                                                    "bytes": 0, "itens": 0})
+                for k in ("chamadas", "segundos", "bytes", "itens"):
+                    e[k] += d[k]
+                e["max_segundos"] = max(e["max_segundos"], d["max_segundos"])
+            self.contadores.update(dados["contadores"])
+            self.registros.extend(dados["registros"][:max(0, self.max_registros - len(self.registros))])
+            self.pico_rss_kb = max(self.pico_rss_kb, dados["pico_rss_kb"])
+
+    # ---- saídas ----
+    def resumo(self) -> List[dict]:
+        """Uma linha por estágio, do mais caro para o mais barato."""
+        with self._lock:
+            itens = sorted(self.estagios.items(), key=lambda kv: kv[1]["segundos"], reverse=True)
+        total = sum(e["segundos"] for _, e in itens) or 1.0
+        return [{"estagio": nome, "chamadas": int(e["chamadas"]), "segundos": round(e["segundos"], 3),
+                 "percentual": round(100 * e["segundos"] / total, 1),
+                 "media_ms": round(1e3 * e["segundos"] / max(1, e["chamadas"]), 2),
+                 "max_ms": round(1e3 * e["max_segundos"], 2),
+                 "mb": round(e["bytes"] / 2**20, 2), "itens": int(e["itens"])} for nome, e in itens]
+
+    def mais_lentos(self, n: int = 10, estagio: str | None = None) -> List[dict]:
+        with self._lock:
+            regs = [r for r in self.registros if estagio is None or r[0] == estagio]
+        regs.sort(key=lambda r: r[3], reverse=True)
+        return [{"estagio": e, "arquivo": a, "pagina": p, "ms": round(s * 1e3, 1)} for e, a, p, s in regs[:n]]
+
+    def para_json(self, **extra: Any) -> dict:
+        return {**extra, "segundos_total": None if self.segundos_total is None else round(self.segundos_total, 3),
+                "pico_rss_mb": round(self.pico_rss_kb / 1024, 1), "contadores": dict(self.contadores),
+                "estagios": self.resumo(), "mais_lentos": self.mais_lentos()}
+
+    def para_prometheus(self, prefixo: str = "nfe", rotulos: Dict[str, str] | None = None) -> str:
+        base = ",".join(f'{k}="{v}"' for k, v in (rotulos or {}).items())
+
+        def serie(nome: str, valor: float, **mais: str) -> str:
+            r = ",".join(x for x in (base, ",".join(f'{k}="{v}"' for k, v in mais.items())) if x)
+            return f"{prefixo}_{nome}{{{r}}} {valor}" if r else f"{prefixo}_{nome} {valor}"
+
+        linhas = [f"# HELP {prefixo}_estagio_segundos_total Tempo gasto por estágio (soma entre processos).",
+                  f"# TYPE {prefixo}_estagio_segundos_total counter"]
+        with self._lock:
+            estagios = sorted(self.estagios.items())
+            contadores = sorted(self.contadores.items())
+        linhas += [serie("estagio_segundos_total", round(e["segundos"], 6), estagio=n) for n, e in estagios]
+        linhas += [f"# TYPE {prefixo}_estagio_chamadas_total counter"]
+        linhas += [serie("estagio_chamadas_total", int(e["chamadas"]), estagio=n) for n, e in estagios]
+        linhas += [f"# TYPE {prefixo}_estagio_bytes_total counter"]
+        linhas += [serie("estagio_bytes_total", int(e["bytes"]), estagio=n) for n, e in estagios]
+        for nome, valor in contadores:
+            linhas += [f"# TYPE {prefixo}_{nome}_total counter", serie(f"{nome}_total", int(valor))]
+        linhas += [f"# TYPE {prefixo}_pico_rss_bytes gauge", serie("pico_rss_bytes", self.pico_rss_kb * 1024)]
+        return "\n".join(linhas) + "\n"
+
+# ---- coletor da thread atual ----
+def atual() -> Metricas | None:
+    return getattr(_local, "metricas", None)
+
+@contextmanager
+def coletando(m: Metricas) -> Iterator[Metricas]:
+    """Torna `m` o coletor desta thread (aninhável); ao sair, fecha o tempo total e o pico de RSS."""
+    anterior = getattr(_local, "metricas", None)
+    _local.metricas = m
+    m.amostrar()
+    try:
+        yield m
+    finally:
+        _local.metricas = anterior
+        m.encerrar()
+
+@contextmanager
+def em_arquivo(nome: str) -> Iterator[None]:
+    """Arquivo corrente: os registros por página medidos aqui dentro levam esse nome."""
+    anterior = getattr(_local, "arquivo", None)
+    _local.arquivo = nome
+    try:
+        yield
+    finally:
+        _local.arquivo = anterior
+
+@contextmanager
+def medir(estagio: str, arquivo: str | None = None, pagina: int | None = None,
+          bytes: int = 0) -> Iterator[dict]:
+    """
+    Mede o bloco no coletor atual (se houver). O dict entregue aceita "itens"/"bytes"
+    conhecidos só no fim, ex.: `with medir(XML, nome) as r: r["itens"] = len(linhas)`.
+    """
+    m = atual()
+    extra: dict = {}
+    if m is None:
+        yield extra
+        return
+    t0 = time.perf_counter()
+    try:
+        yield extra
+    finally:
+        m.amostrar()
+        m.adicionar(estagio, time.perf_counter() - t0,
+                    arquivo=arquivo if arquivo is not None else getattr(_local, "arquivo", None),
+                    pagina=pagina, bytes=extra.get("bytes", bytes), itens=extra.get("itens", 0))
+
+def contar(nome: str, n: int = 1) -> None:
+    m = atual()
+    if m is not None:
+        m.contar(nome, n)
+
+def executar_medindo(func: Callable[[Sequence], list], parte: Sequence) -> tuple:
+    """Roda no processo filho: (resultados, métricas exportadas) de func(parte)."""
+    m = Metricas()
+    with coletando(m):
+        resultados = func(parte)
+    return resultados, m.exportar()
+
+# ---- gravação ----
+def gravar_jsonl(m: Metricas, caminho: str | Path, **extra: Any) -> None:
+    """Acrescenta uma linha JSON (log estruturado) com o resumo do lote."""
+    with open(caminho, "a", encoding="utf-8") as f:
+        f.write(json.dumps(m.para_json(**extra), ensure_ascii=False) + "\n")
+
+def gravar_prometheus(m: Metricas, caminho: str | Path, prefixo: str = "nfe",
+                      rotulos: Dict[str, str] | None = None) -> None:
+    """Grava o arquivo .prom de forma atômica (o coletor nunca lê um arquivo pela metade)."""
+    caminho = Path(caminho)
+    fd, tmp = tempfile.mkstemp(dir=caminho.parent, prefix=".metricas_", suffix=".prom")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(m.para_prometheus(prefixo, rotulos))
+    os.replace(tmp, caminho)
@@ -0,0 +1,569 @@
+# nfe-suite/apps/combo_app/processors/paralelo.py
+# Ingestão paralela de lotes: distribui os arquivos em blocos por um pool de processos,
+# limita os blocos em voo e junta as linhas na MESMA ordem do caminho serial.
+# XMLs dentro de .zip são lidos direto do stream do membro (processors.lote_zip).
+# iterar_xmls/iterar_xmls_zip geram as linhas aos poucos (lotes de arquivos pelo mesmo pool).
+# PDFs são divididos por página (arquivo, página) e decodificados em paralelo.
+# Andamento: contadores de progresso (arquivos, páginas, ETA) e cancelamento, lidos por
+# outra thread (ex.: a UI enquanto o lote roda em segundo plano).
+# PoolCompartilhado: um pool de processos para o app inteiro (todas as sessões), com um
+# orçamento de memória para as páginas rasterizadas em voo (Orcamento).
+
+from __future__ import annotations
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Executor, ProcessPoolExecutor, wait
+from contextlib import contextmanager, nullcontext
+from io import BytesIO
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Sequence, Tuple
+
+from processors import metricas
+from processors.cache import CacheResultados, com_cache
+from processors.xml_nfe import VERSAO_EXTRATOR as VERSAO_XML, iterar_linhas_xml
+
+def workers_padrao() -> int:
+    return max(1, os.cpu_count() or 1)
+
+class Cancelado(Exception):
+    """O lote foi cancelado (Andamento.cancelar) antes de terminar."""
+
+class Andamento:
+    """
+    Progresso de um lote, escrito pela thread que processa e lido por qualquer outra.
+    `paginas_total` só é conhecido quando os PDFs são divididos por página.
+    """
+
+    def __init__(self, arquivos_total: int = 0):
+        self.arquivos_total = arquivos_total
+        self.arquivos = 0
+        self.paginas = 0
+        self.paginas_total = 0
+        self.inicio = time.monotonic()
+        self._cancelar = threading.Event()
+
+    def avancar(self, arquivos: int = 0, paginas: int = 0) -> None:
+        self.arquivos += arquivos
+        self.paginas += paginas
+
+    def cancelar(self) -> None:
+        self._cancelar.set()
+
+    @property
+    def cancelado(self) -> bool:
+        return self._cancelar.is_set()
+
+    def verificar(self) -> None:
+        if self._cancelar.is_set():
+            raise Cancelado()
+
+    @property
+    def fracao(self) -> float:
+        if self.arquivos_total <= 0:
+            return 0.0
+        return min(1.0, self.arquivos / self.arquivos_total)
+
+    def eta(self) -> float | None:
+        """Segundos restantes estimados pela vazão até agora (None sem base para estimar)."""
+        f = self.fracao
+        if f <= 0 or f >= 1:
+            return None
+        decorrido = time.monotonic() - self.inicio
+        return decorrido * (1 - f) / f
+
+# Página A4 rasterizada: bytes por pixel de cada modo ("pil" = RGB + cópia em cinza)
+_BYTES_PIXEL = {"gray": 1, "mono": 1, "pil": 4}
+_POL2_A4 = 8.27 * 11.69
+
+def mb_por_pagina(dpi: int, raster: str | None = None) -> float:
+    """Memória aproximada de uma página A4 rasterizada (300 DPI em cinza ~ 8,3 MB)."""
+    return _POL2_A4 * dpi * dpi * _BYTES_PIXEL.get(raster or "gray", 4) / 2**20
+
+class Orcamento:
+    """
+    Limite de MB em voo somado entre todos os jobs. reservar() bloqueia até caber
+    (uma reserva maior que o limite passa sozinha, para não travar).
+    """
+
+    def __init__(self, limite_mb: float):
+        self.limite_mb = limite_mb
+        self.usado_mb = 0.0
+        self._cond = threading.Condition()
+
+    def reservar(self, mb: float, andamento: Andamento | None = None) -> None:
+        with self._cond:
+            while self.usado_mb > 0 and self.usado_mb + mb > self.limite_mb:
+                if andamento is not None:
+                    andamento.verificar()
+                self._cond.wait(timeout=0.5)
+            self.usado_mb += mb
+
+    def liberar(self, mb: float) -> None:
+        with self._cond:
+            self.usado_mb = max(0.0, self.usado_mb - mb)
+            self._cond.notify_all()
+
+class PoolCompartilhado:
+    """
+    Um ProcessPoolExecutor para o processo inteiro (ex.: todas as sessões do Streamlit),
+    criado na primeira tarefa e recriado se um worker morrer (OOM). `workers` é o teto
+    global de processos; `memoria_mb` o orçamento das páginas rasterizadas em voo.
+    `inicializador` roda em cada worker ao subir (ex.: aquecimento.aquecer_worker).
+    """
+
+    def __init__(self, workers: int | None = None, memoria_mb: float = 1024,
+                 inicializador: Callable[[], None] | None = None):
+        self.workers = workers or workers_padrao()
+        self.orcamento = Orcamento(memoria_mb)
+        self.inicializador = inicializador
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None or getattr(self._executor, "_broken", False):
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=self.inicializador)
+            return self._executor
+
+    def fechar(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+def _blocos(itens: Sequence, tamanho: int) -> Iterable[Tuple[int, Sequence]]:
+    for i in range(0, len(itens), tamanho):
+        yield i // tamanho, itens[i:i + tamanho]
+
+def _xml_bloco(paths: Sequence[str | bytes]) -> List[Tuple[List[List[str]], str | None]]:
+    """Roda no processo filho: (linhas, erro) por arquivo (caminho ou bytes), na ordem recebida."""
+    saida = []
+    for p in paths:
+        try:
+            em_memoria = isinstance(p, bytes)
+            with metricas.medir(metricas.XML, None if em_memoria else Path(p).name,
+                                bytes=len(p) if em_memoria else os.path.getsize(p)) as m:
+                linhas = list(iterar_linhas_xml(BytesIO(p) if em_memoria else p))
+                m["itens"] = len(linhas)
+            saida.append((linhas, None))
+        except Exception as e:  # erro de um arquivo não derruba o lote
+            saida.append(([], str(e)))
+    return saida
+
+@contextmanager
+def _pool(workers: int, compartilhado: PoolCompartilhado | None = None) -> Iterator[Executor | None]:
+    """Pool reaproveitado entre várias chamadas de mapear_em_blocos (None = serial)."""
+    if compartilhado is not None:
+        yield compartilhado.executor()
+        return
+    if workers <= 1:
+        yield None
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield pool
+
+def mapear_em_blocos(func: Callable[[Sequence], list], itens: Sequence, workers: int | None = None,
+                     bloco: int = 16, max_em_voo: int | None = None, pool: Executor | None = None,
+                     ao_concluir: Callable[[int, list], None] | None = None,
+                     andamento: Andamento | None = None,
+                     orcamento: Orcamento | None = None, custo_mb: float = 0) -> list:
+    """
+    Aplica func(bloco) -> lista de resultados (um por item) em paralelo e devolve
+    os resultados achatados na ordem de `itens`. workers<=1 roda no processo atual.
+    No máximo `max_em_voo` blocos ficam submetidos ao pool ao mesmo tempo
+    (padrão: 2 por worker), o que limita a memória de resultados pendentes.
+    `pool`: executor já aberto (não é fechado aqui); senão um é criado para a chamada.
+    `ao_concluir(inicio, resultados)`: chamado a cada bloco pronto (inicio = índice do
+    primeiro item do bloco), na ordem em que terminam. Com `andamento`, o cancelamento
+    é verificado entre blocos e levanta Cancelado.
+    Com `orcamento`, cada bloco reserva `custo_mb` antes de ir para o pool e devolve ao
+    terminar. Com um `pool` dado, nada roda no processo atual (o teto do pool vale sempre).
+    Com um coletor de métricas ativo na thread, o que os filhos medem é juntado nele.
+    """
+    workers = workers_padrao() if workers is None else workers
+    bloco = max(1, bloco)
+    if pool is None and (workers <= 1 or len(itens) <= bloco):
+        if ao_concluir is None and andamento is None:
+            return func(itens)
+        resultado: list = []
+        for idx, parte in _blocos(itens, bloco):
+            if andamento is not None:
+                andamento.verificar()
+            r = func(parte)
+            if ao_concluir is not None:
+                ao_concluir(idx * bloco, r)
+            resultado.extend(r)
+        return resultado
+
+    max_em_voo = max_em_voo or 2 * workers
+    prontos: dict[int, list] = {}
+    pendentes = {}
+    fila = _blocos(itens, bloco)
+    coletor = metricas.atual()
+    tarefa = (lambda parte: (metricas.executar_medindo, func, parte)) if coletor is not None \
+        else (lambda parte: (func, parte))
+
+    def colher(feitos) -> None:
+        for f in feitos:
+            idx = pendentes.pop(f)
+            prontos[idx] = f.result()
+            if coletor is not None:
+                prontos[idx], medidas = prontos[idx]
+                coletor.juntar(medidas)
+            if ao_concluir is not None:
+                ao_concluir(idx * bloco, prontos[idx])
+
+    with (nullcontext(pool) if pool is not None else ProcessPoolExecutor(max_workers=workers)) as pool:
+        try:
+            for idx, parte in fila:
+                if andamento is not None:
+                    andamento.verificar()
+                if orcamento is not None and custo_mb:
+                    orcamento.reservar(custo_mb, andamento)
+                    try:
+                        f = pool.submit(*tarefa(parte))
+                    except BaseException:
+                        orcamento.liberar(custo_mb)
+                        raise
+                    f.add_done_callback(lambda _f: orcamento.liberar(custo_mb))
+                else:
+                    f = pool.submit(*tarefa(parte))
+                pendentes[f] = idx
+                if len(pendentes) >= max_em_voo:
+                    colher(wait(pendentes, return_when=FIRST_COMPLETED)[0])
+            while pendentes:
+                if andamento is not None:
+                    andamento.verificar()
+                colher(wait(pendentes, timeout=0.5, return_when=FIRST_COMPLETED)[0])
+        except Cancelado:
+            for f in pendentes:
+                f.cancel()
+            raise
+
+    resultado: list = []
+    for idx in sorted(prontos):
+        resultado.extend(prontos[idx])
+    return resultado
+
+def _iterar_xmls(tarefas: Sequence, nomes: Sequence[str], func: Callable[[Sequence], list],
+                 hashes: Sequence[str] | None, workers: int | None, bloco: int, max_em_voo: int | None,
+                 cache: CacheResultados | None, arquivos_por_lote: int, erros: List[dict] | None,
+                 andamento: Andamento | None = None,
+                 compartilhado: PoolCompartilhado | None = None) -> Iterator[List[str]]:
+    # Lotes de `arquivos_por_lote` arquivos pelo MESMO pool: só as linhas de um lote
+    # ficam em memória antes de seguirem para quem consome o gerador.
+    if compartilhado is not None:
+        workers = compartilhado.workers
+    workers = workers_padrao() if workers is None else workers
+    passo = max(1, arquivos_por_lote)
+    lidos = [0]
+
+    def concluido(_inicio: int, resultados: list) -> None:
+        lidos[0] += len(resultados)
+        if andamento is not None:
+            andamento.avancar(arquivos=len(resultados))
+
+    with _pool(workers if len(tarefas) > bloco else 1, compartilhado) as pool:
+        for i in range(0, len(tarefas), passo):
+            parte = tarefas[i:i + passo]
+            lidos[0] = 0
+            por_arquivo = com_cache(
+                parte, cache, VERSAO_XML, {},
+                lambda ts: mapear_em_blocos(func, ts, workers=workers, bloco=bloco, max_em_voo=max_em_voo,
+                                            pool=pool, ao_concluir=concluido, andamento=andamento),
+                cacheavel=lambda r: r[1] is None,
+                hashes=None if hashes is None else hashes[i:i + passo],
+            )
+            if andamento is not None:  # os que vieram do cache (ou duplicados)
+                andamento.avancar(arquivos=len(parte) - lidos[0])
+            for nome, (rows, erro) in zip(nomes[i:i + passo], por_arquivo):
+                if erro is not None and erros is not None:
+                    erros.append({"arquivo": nome, "erro": f"ERRO: {erro}"})
+                yield from rows
+
+def iterar_xmls(paths: Sequence[Path | str], workers: int | None = None, bloco: int = 16,
+                max_em_voo: int | None = None, cache: CacheResultados | None = None,
+                arquivos_por_lote: int = 256, erros: List[dict] | None = None,
+                andamento: Andamento | None = None,
+                compartilhado: PoolCompartilhado | None = None) -> Iterator[List[str]]:
+    """
+    Gera as linhas de vários XMLs de NF-e, na ordem dos arquivos, sem juntar o lote todo:
+    no máximo `arquivos_por_lote` arquivos têm linhas em memória ao mesmo tempo.
+    Falhas vão para `erros` ([{"arquivo": nome, "erro": "ERRO: ..."}]) se a lista for dada.
+    `andamento`: recebe os arquivos concluídos; cancelado, levanta Cancelado.
+    `compartilhado`: usa o pool do app em vez de abrir um (workers = teto do pool).
+    """
+    nomes = [str(p) for p in paths]
+    yield from _iterar_xmls(nomes, [Path(n).name for n in nomes], _xml_bloco, None, workers, bloco,
+                            max_em_voo, cache, arquivos_por_lote, erros, andamento, compartilhado)
+
+def iterar_xmls_sessao(arquivos: Sequence, workers: int | None = None, bloco: int = 16,
+                       max_em_voo: int | None = None, cache: CacheResultados | None = None,
+                       arquivos_por_lote: int = 256, erros: List[dict] | None = None,
+                       andamento: Andamento | None = None,
+                       compartilhado: PoolCompartilhado | None = None) -> Iterator[List[str]]:
+    """
+    Como iterar_xmls, para arquivos de uma área de sessão (processors.sessao.ArquivoSessao):
+    os que estão em memória vão em bytes para o processo filho, sem passar pelo disco.
+    """
+    tarefas = [a.fonte() for a in arquivos]
+    hashes = [a.hash() for a in arquivos]
+    yield from _iterar_xmls(tarefas, [a.nome for a in arquivos], _xml_bloco, hashes, workers, bloco,
+                            max_em_voo, cache, arquivos_por_lote, erros, andamento, compartilhado)
+
+def processar_xmls(paths: Sequence[Path | str], workers: int | None = None, bloco: int = 16,
+                   max_em_voo: int | None = None,
+                   cache: CacheResultados | None = None) -> Tuple[List[List[str]], List[dict]]:
+    """
+    Extrai as linhas de vários XMLs de NF-e.
+    Retorna (linhas, erros) — linhas na ordem dos arquivos, idênticas ao caminho serial;
+    erros = [{"arquivo": nome, "erro": "ERRO: ..."}] para arquivos que falharam.
+    XMLs idênticos (por conteúdo) são lidos uma vez; com `cache`, só os inéditos.
+    """
+    erros: List[dict] = []
+    linhas = list(iterar_xmls(paths, workers=workers, bloco=bloco, max_em_voo=max_em_voo, cache=cache,
+                              arquivos_por_lote=max(1, len(paths)), erros=erros))
+    return linhas, erros
+
+# Último ZIP aberto neste processo: os blocos seguintes do mesmo lote reaproveitam
+# o diretório central já lido (e os ZIPs internos já copiados).
+_leitor_zip: tuple | None = None
+
+def _leitor_do_processo(zip_path: str):
+    global _leitor_zip
+    from processors.lote_zip import LeitorZip
+    chave = (zip_path, os.stat(zip_path).st_mtime_ns)
+    if _leitor_zip is None or _leitor_zip[0] != chave:
+        if _leitor_zip is not None:
+            _leitor_zip[1].fechar()
+        _leitor_zip = (chave, LeitorZip(zip_path))
+    return _leitor_zip[1]
+
+def _xml_zip_bloco(tarefas: Sequence[Tuple[str, Tuple[int, ...]]]) -> List[Tuple[List[List[str]], str | None]]:
+    """Roda no processo filho: cada tarefa = (zip, cadeia do membro); o XML é lido direto do stream."""
+    saida = []
+    for zip_path, cadeia in tarefas:
+        try:
+            leitor = _leitor_do_processo(zip_path)
+            with leitor.abrir(cadeia) as f, metricas.medir(metricas.XML, leitor.info(cadeia).filename) as m:
+                linhas = list(iterar_linhas_xml(f))
+                m["itens"], m["bytes"] = len(linhas), f.tell()
+            saida.append((linhas, None))
+        except Exception as e:
+            saida.append(([], str(e)))
+    return saida
+
+def iterar_xmls_zip(zip_path: Path | str, membros: Sequence, workers: int | None = None, bloco: int = 16,
+                    max_em_voo: int | None = None, cache: CacheResultados | None = None,
+                    arquivos_por_lote: int = 256, erros: List[dict] | None = None,
+                    andamento: Andamento | None = None,
+                    compartilhado: PoolCompartilhado | None = None) -> Iterator[List[str]]:
+    """
+    Como iterar_xmls, para membros XML de um .zip (lote_zip.MembroLote), sem extraí-los:
+    cada processo abre o ZIP e passa o stream do membro ao iterparse.
+    Erros trazem o nome lógico do membro ("pasta/a.xml", "interno.zip/a.xml").
+    """
+    from processors.lote_zip import LeitorZip
+
+    tarefas = [(str(zip_path), tuple(m.cadeia)) for m in membros]
+    with LeitorZip(zip_path) as leitor:
+        hashes = [leitor.hash(m) for m in membros]
+    yield from _iterar_xmls(tarefas, [m.nome for m in membros], _xml_zip_bloco, hashes, workers, bloco,
+                            max_em_voo, cache, arquivos_por_lote, erros, andamento, compartilhado)
+
+def processar_xmls_zip(zip_path: Path | str, membros: Sequence, workers: int | None = None, bloco: int = 16,
+                       max_em_voo: int | None = None,
+                       cache: CacheResultados | None = None) -> Tuple[List[List[str]], List[dict]]:
+    """Como processar_xmls, para membros XML de um .zip (ver iterar_xmls_zip)."""
+    erros: List[dict] = []
+    linhas = list(iterar_xmls_zip(zip_path, membros, workers=workers, bloco=bloco, max_em_voo=max_em_voo,
+                                  cache=cache, arquivos_por_lote=max(1, len(membros)), erros=erros))
+    return linhas, erros
+
+# ====== PDF (DANFE) ======
+class ResultadoPDF(NamedTuple):
+    chaves: List[str]
+    outras: List[str]
+    erro: str | None
+    origens: dict       # chave -> camada que a encontrou (texto / codigo_barras)
+    niveis: Counter     # páginas resolvidas por nível (texto, dpi_baixo, recorte, ...)
+
+def _contar_bloco(paths: Sequence[str]) -> List[Tuple[int, str | None]]:
+    from processors.extractor_pyzbar import contar_paginas
+    saida = []
+    for p in paths:
+        try:
+            metricas.contar(metricas.BYTES_LIDOS, os.path.getsize(p))
+            with metricas.em_arquivo(Path(p).name):
+                saida.append((contar_paginas(p), None))
+        except Exception as e:
+            saida.append((0, str(e)))
+    return saida
+
+def _paginas_bloco(tarefas: Sequence[Tuple[str, int, int, int]]) -> List[Tuple[List[List[str]], str | None]]:
+    """Roda no processo filho: cada tarefa = (pdf, primeira, ultima, dpi) -> leituras por página."""
+    from processors.extractor_pyzbar import ler_paginas
+    saida = []
+    for pdf, primeira, ultima, dpi in tarefas:
+        try:
+            with metricas.em_arquivo(Path(pdf).name):
+                saida.append((ler_paginas(pdf, primeira, ultima, dpi=dpi), None))
+        except Exception as e:
+            saida.append(([], str(e)))
+    return saida
+
+def _arquivos_bloco(tarefas: Sequence[Tuple[str, dict]]) -> List[ResultadoPDF]:
+    """Roda no processo filho: um PDF inteiro por tarefa, página a página (texto / adaptativo / parada)."""
+    from processors.extractor_pyzbar import extrair_chaves_com_origem
+    saida = []
+    for pdf, opcoes in tarefas:
+        niveis: Counter = Counter()
+        try:
+            metricas.contar(metricas.BYTES_LIDOS, os.path.getsize(pdf))
+            with metricas.em_arquivo(Path(pdf).name):
+                chaves, outras, origens = extrair_chaves_com_origem(pdf, niveis=niveis, **opcoes)
+            saida.append(ResultadoPDF(chaves, outras, None, origens, niveis))
+        except Exception as e:
+            saida.append(ResultadoPDF([], [], str(e), {}, niveis))
+    return saida
+
+def processar_pdfs(paths: Sequence[Path | str], workers: int | None = None, dpi: int = 300,
+                   max_rasterizacoes: int | None = None, paginas_por_tarefa: int = 1,
+                   max_chaves: int | None = None, uma_por_pagina: bool = False,
+                   camada_texto: bool = False, adaptativo: bool = False,
+                   dpi_baixo: int = 150, cache: CacheResultados | None = None,
+                   andamento: Andamento | None = None,
+                   compartilhado: PoolCompartilhado | None = None) -> List[ResultadoPDF]:
+    """
+    Extrai as chaves de vários PDFs espalhando (arquivo, faixa de páginas) por um pool.
+    Retorna um ResultadoPDF por arquivo, na ordem de `paths`; chaves/outras idênticas a
+    extrair_chaves_de_pdf(path, dpi). `max_rasterizacoes` limita quantas páginas estão
+    sendo rasterizadas ao mesmo tempo no total (cada uma ~25 MB a 300 DPI).
+    Com `max_chaves`/`uma_por_pagina`/`camada_texto`/`adaptativo` cada PDF vira uma
+    tarefa só, lida página a página, para que páginas resolvidas pelo texto, em DPI
+    baixo ou posteriores às chaves encontradas não sejam rasterizadas à toa.
+    PDFs idênticos no lote são rasterizados uma vez; com `cache`, só os inéditos
+    (por conteúdo + parâmetros).
+    `andamento`: recebe arquivos e páginas concluídos; cancelado, levanta Cancelado.
+    `compartilhado`: usa o pool do app; cada tarefa reserva a memória de uma página no
+    orçamento global antes de ir para o pool.
+    """
+    from processors.decodificadores import nome_cadeia
+    from processors.extractor_pyzbar import RASTER_PADRAO, VERSAO_EXTRATOR
+
+    if compartilhado is not None:
+        workers = compartilhado.workers
+    workers = workers_padrao() if workers is None else workers
+    if max_rasterizacoes:
+        workers = min(workers, max_rasterizacoes)
+    opcoes = {"dpi": dpi, "max_chaves": max_chaves, "uma_por_pagina": uma_por_pagina,
+              "camada_texto": camada_texto, "adaptativo": adaptativo, "dpi_baixo": dpi_baixo}
+    nomes = [str(p) for p in paths]
+    calculados = [0]
+
+    def calcular(pendentes: List[str]) -> List[ResultadoPDF]:
+        calculados[0] = len(pendentes)
+        return _processar_pdfs(pendentes, workers, opcoes, paginas_por_tarefa, andamento, compartilhado)
+
+    resultados = com_cache(
+        nomes, cache, VERSAO_EXTRATOR, {**opcoes, "raster": RASTER_PADRAO, "decodificadores": nome_cadeia()},
+        calcular,
+        serializar=lambda r: [r.chaves, r.outras, r.erro, r.origens, dict(r.niveis)],
+        desserializar=lambda v: ResultadoPDF(v[0], v[1], v[2], v[3], Counter(v[4])),
+        cacheavel=lambda r: r.erro is None,
+    )
+    if andamento is not None:  # os que vieram do cache (ou duplicados)
+        andamento.avancar(arquivos=len(nomes) - calculados[0])
+    return resultados
+
+def _processar_pdfs(nomes: List[str], workers: int, opcoes: dict, paginas_por_tarefa: int,
+                    andamento: Andamento | None = None,
+                    compartilhado: PoolCompartilhado | None = None) -> List[ResultadoPDF]:
+    from processors.extractor_pyzbar import (ORIGEM_CODIGO, NIVEL_ALTO, NIVEL_NENHUM, RASTER_PADRAO,
+                                             classificar_leituras)
+
+    dpi = opcoes["dpi"]
+    # cada tarefa em voo segura uma página rasterizada por vez (faixas vão página a página)
+    pool = {"pool": compartilhado.executor(), "orcamento": compartilhado.orcamento,
+            "custo_mb": mb_por_pagina(dpi, RASTER_PADRAO)} if compartilhado is not None else {}
+
+    if any(opcoes[k] for k in ("max_chaves", "uma_por_pagina", "camada_texto", "adaptativo")):
+        def arquivo_pronto(_inicio: int, rs: list) -> None:
+            if andamento is not None:
+                andamento.avancar(arquivos=len(rs), paginas=sum(sum(r.niveis.values()) for r in rs))
+
+        return mapear_em_blocos(_arquivos_bloco, [(n, opcoes) for n in nomes], workers=workers, bloco=1,
+                                max_em_voo=workers, ao_concluir=arquivo_pronto, andamento=andamento, **pool)
+
+    contagens = mapear_em_blocos(_contar_bloco, nomes, workers=workers, bloco=16, andamento=andamento,
+                                 pool=pool.get("pool"))
+
+    passo = max(1, paginas_por_tarefa)
+    tarefas: list[Tuple[str, int, int, int]] = []
+    dono: list[int] = []
+    for i, (nome, (n_pag, erro)) in enumerate(zip(nomes, contagens)):
+        if erro is not None:
+            continue
+        for primeira in range(1, n_pag + 1, passo):
+            tarefas.append((nome, primeira, min(n_pag, primeira + passo - 1), dpi))
+            dono.append(i)
+
+    restantes = Counter(dono)
+    if andamento is not None:
+        andamento.paginas_total += sum(n for n, erro in contagens if erro is None)
+        andamento.avancar(arquivos=sum(1 for i in range(len(nomes)) if not restantes[i]))
+
+    def pagina_pronta(inicio: int, _lidas: list) -> None:
+        if andamento is None:
+            return
+        _, primeira, ultima, _ = tarefas[inicio]
+        restantes[dono[inicio]] -= 1
+        andamento.avancar(arquivos=int(restantes[dono[inicio]] == 0), paginas=ultima - primeira + 1)
+
+    # uma tarefa por bloco: o pool nunca segura mais que `workers` páginas rasterizadas
+    lidas = mapear_em_blocos(_paginas_bloco, tarefas, workers=workers, bloco=1, max_em_voo=workers,
+                             ao_concluir=pagina_pronta, andamento=andamento, **pool)
+
+    leituras: list[list[str]] = [[] for _ in nomes]
+    niveis: list[Counter] = [Counter() for _ in nomes]
+    erros: list[str | None] = [erro for _, erro in contagens]
+    for i, (paginas, erro) in zip(dono, lidas):
+        if erro is not None and erros[i] is None:
+            erros[i] = erro
+        for pagina in paginas:
+            leituras[i].extend(pagina)
+            niveis[i][NIVEL_ALTO if classificar_leituras(pagina)[0] else NIVEL_NENHUM] += 1
+
+    resultados: List[ResultadoPDF] = []
+    for leit, erro, niv in zip(leituras, erros, niveis):
+        if erro is not None:
+            resultados.append(ResultadoPDF([], [], erro, {}, niv))
+        else:
+            chaves, outras = classificar_leituras(leit)
+            resultados.append(ResultadoPDF(chaves, outras, None, {c: ORIGEM_CODIGO for c in chaves}, niv))
+    return resultados
+
+def linhas_pdf(nomes: Sequence[str], resultados: Sequence[ResultadoPDF]) -> Tuple[List[dict], List[dict], Counter]:
+    """
+    Linhas das planilhas de PDF: (resumo por arquivo, uma linha por chave, páginas por nível).
+    Resumo: arquivo, qtd_chaves_44, chaves_44, outras_leituras ("ERRO: ..." em falha), origem.
+    """
+    resumo: List[dict] = []
+    chaves_linhas: List[dict] = []
+    niveis: Counter = Counter()
+    for nome, r in zip(nomes, resultados):
+        niveis.update(r.niveis)
+        if r.erro is not None:
+            resumo.append({"arquivo": nome, "qtd_chaves_44": 0, "chaves_44": "",
+                           "outras_leituras": f"ERRO: {r.erro}", "origem": ""})
+            continue
+        chaves = sorted(set(r.chaves))
+        for c in chaves:
+            chaves_linhas.append({"arquivo": nome, "chave_44": c, "origem": r.origens.get(c, "")})
+        resumo.append({"arquivo": nome, "qtd_chaves_44": len(chaves),
+                       "chaves_44": ", ".join(chaves),
+                       "outras_leituras": ", ".join(r.outras) if r.outras else "",
+                       "origem": ", ".join(sorted({r.origens.get(c, "") for c in chaves} - {""}))})
+    return resumo, chaves_linhas, niveis
@@ -0,0 +1,402 @@
+# nfe-suite/apps/combo_app/processors/remoto.py
+# Extração por um ou mais nós do serviço HTTP (processors.servico), com a mesma interface
+# das funções de processors.paralelo usadas pelo app (iterar_xmls_sessao, iterar_xmls_zip,
+# processar_pdfs): o lote é dividido em sublotes (.zip), cada sublote vai para o nó com
+# menos sublotes em voo e os registros voltam por NDJSON. Conexões HTTP/1.1 reaproveitadas
+# por nó; um nó que falha fica fora por alguns segundos e o sublote vai para outro.
+# servico_local() sobe o serviço numa thread deste processo (127.0.0.1, porta livre):
+# o mesmo caminho HTTP numa máquina só, para desenvolvimento e testes.
+#   NFE_SERVICO_URLS   "http://no1:8765,http://no2:8765" (ou "local"); vazio = extração no próprio app
+#   NFE_SERVICO_TOKEN  enviado como "Authorization: Bearer ..."
+
+from __future__ import annotations
+import http.client
+import json
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Callable, Dict, Iterator, List, Sequence, Tuple
+from urllib.parse import urlencode, urlsplit
+
+from processors.cache import CacheResultados
+from processors.paralelo import Andamento, Cancelado, ResultadoPDF
+
+ARQUIVOS_POR_SUBLOTE = 200
+LIMITE_SUBLOTE_RAM = 64 * 2**20   # .zip do sublote em memória até aqui, depois em disco
+PAUSA_FALHA = 30.0                # segundos fora da rotação após falha de conexão
+TIMEOUT = 120.0                   # s sem resposta (o serviço manda uma linha vazia a cada 15 s)
+
+class ErroServico(RuntimeError):
+    """O serviço respondeu com erro (HTTP) ou o lote terminou com erro no nó."""
+
+class Conexoes:
+    """Conexões keep-alive para um nó: reaproveitadas entre requisições, até `maximo` ociosas."""
+
+    def __init__(self, url: str, maximo: int = 4, timeout: float = TIMEOUT):
+        partes = urlsplit(url)
+        self.url = url.rstrip("/")
+        self._classe = http.client.HTTPSConnection if partes.scheme == "https" else http.client.HTTPConnection
+        self._host, self._porta = partes.hostname, partes.port
+        self._prefixo = partes.path.rstrip("/")
+        self._timeout = timeout
+        self._ociosas: queue.LifoQueue = queue.LifoQueue(maxsize=maximo)
+
+    def _nova(self) -> http.client.HTTPConnection:
+        return self._classe(self._host, self._porta, timeout=self._timeout)
+
+    @contextmanager
+    def requisicao(self, metodo: str, caminho: str, corpo=None,
+                   cabecalhos: Dict[str, str] | None = None) -> Iterator[http.client.HTTPResponse]:
+        """
+        Resposta da requisição; a conexão volta para o pool se a resposta foi lida até o fim.
+        Uma conexão ociosa que o servidor já fechou é trocada por uma nova (uma vez), desde que
+        o corpo possa ser reenviado.
+        """
+        tentativas = 2 if corpo is None or hasattr(corpo, "seek") else 1
+        for tentativa in range(tentativas):
+            try:
+                conn, reaproveitada = self._ociosas.get_nowait(), True
+            except queue.Empty:
+                conn, reaproveitada = self._nova(), False
+            try:
+                if corpo is not None and hasattr(corpo, "seek"):
+                    corpo.seek(0)
+                conn.request(metodo, self._prefixo + caminho, body=corpo, headers=cabecalhos or {})
+                resposta = conn.getresponse()
+            except (ConnectionError, http.client.RemoteDisconnected, http.client.BadStatusLine):
+                conn.close()
+                if reaproveitada and tentativa + 1 < tentativas:
+                    continue
+                raise
+            except BaseException:
+                conn.close()
+                raise
+            break
+        try:
+            yield resposta
+        except BaseException:
+            conn.close()
+            raise
+        if resposta.isclosed() and not resposta.will_close:
+            try:
+                self._ociosas.put_nowait(conn)
+                return
+            except queue.Full:
+                pass
+        conn.close()
+
+    def fechar(self) -> None:
+        while True:
+            try:
+                self._ociosas.get_nowait().close()
+            except queue.Empty:
+                return
+
+class _No:
+    def __init__(self, url: str, conexoes: int):
+        self.conexoes = Conexoes(url, maximo=conexoes)
+        self.url = self.conexoes.url
+        self.em_voo = 0
+        self.fora_ate = 0.0
+        self.sublotes = 0
+
+def _json(resposta: http.client.HTTPResponse) -> dict:
+    dados = resposta.read()
+    try:
+        return json.loads(dados or b"{}")
+    except ValueError:
+        return {"erro": dados[:200].decode("utf-8", errors="ignore")}
+
+def _copiar_fonte(fonte, destino: IO[bytes], leitores: dict) -> None:
+    """fonte: bytes, caminho, ou (zip, cadeia) de um membro de ZIP (leitores: zip -> LeitorZip aberto)."""
+    if isinstance(fonte, (bytes, bytearray, memoryview)):
+        destino.write(fonte)
+    elif isinstance(fonte, tuple):
+        from processors.lote_zip import LeitorZip
+        leitor = leitores.get(fonte[0])
+        if leitor is None:
+            leitor = leitores[fonte[0]] = LeitorZip(fonte[0])
+        with leitor.abrir(fonte[1]) as src:
+            shutil.copyfileobj(src, destino, 1 << 20)
+    else:
+        with open(fonte, "rb") as src:
+            shutil.copyfileobj(src, destino, 1 << 20)
+
+class BackendRemoto:
+    """
+    Extração pelos nós em `urls`. `sublotes_por_no`: sublotes em voo por nó (os registros
+    de um sublote vêm em streaming; até `len(urls) * sublotes_por_no` sublotes ao mesmo tempo).
+    """
+
+    def __init__(self, urls: Sequence[str], token: str | None = None, conexoes_por_no: int = 4,
+                 sublotes_por_no: int = 2, arquivos_por_sublote: int = ARQUIVOS_POR_SUBLOTE):
+        if not urls:
+            raise ValueError("nenhuma URL de serviço")
+        self.nos = [_No(u, conexoes_por_no) for u in urls]
+        self.token = token
+        self.sublotes_por_no = max(1, sublotes_por_no)
+        self.arquivos_por_sublote = max(1, arquivos_por_sublote)
+        self.cliente = uuid.uuid4().hex[:12]
+        self._lock = threading.Lock()
+        self._threads = ThreadPoolExecutor(max_workers=len(self.nos) * self.sublotes_por_no,
+                                           thread_name_prefix="nfe-remoto")
+
+    @property
+    def workers(self) -> int:
+        return len(self.nos) * self.sublotes_por_no
+
+    def descricao(self) -> str:
+        return ", ".join(n.url for n in self.nos)
+
+    def _cabecalhos(self, **extra: str) -> Dict[str, str]:
+        cab = {"X-Cliente": self.cliente, **extra}
+        if self.token:
+            cab["Authorization"] = f"Bearer {self.token}"
+        return cab
+
+    # ---- balanceamento ----
+    def _reservar(self, evitar: set) -> _No:
+        # o nó com menos sublotes em voo (os que falharam há pouco só se não houver outro)
+        with self._lock:
+            agora = time.monotonic()
+            candidatos = [n for n in self.nos if n.url not in evitar] or self.nos
+            disponiveis = [n for n in candidatos if n.fora_ate <= agora] or candidatos
+            no = min(disponiveis, key=lambda n: (n.em_voo, n.sublotes))
+            no.em_voo += 1
+            no.sublotes += 1
+            return no
+
+    def _liberar(self, no: _No, falhou: bool = False) -> None:
+        with self._lock:
+            no.em_voo -= 1
+            if falhou:
+                no.fora_ate = time.monotonic() + PAUSA_FALHA
+
+    def saude(self) -> Dict[str, dict]:
+        saida = {}
+        for no in self.nos:
+            try:
+                with no.conexoes.requisicao("GET", "/saude") as r:
+                    saida[no.url] = _json(r)
+            except OSError as e:
+                saida[no.url] = {"ok": False, "erro": str(e)}
+        return saida
+
+    # ---- um sublote num nó ----
+    def _sublote(self, itens: Sequence[Tuple[str, object]], tipo: str, opcoes: dict,
+                 saida: queue.Queue, parar: threading.Event) -> None:
+        """Monta o .zip, envia, e põe na `saida` cada registro (indice local) e por fim None."""
+        leitores: dict = {}
+        try:
+            with tempfile.SpooledTemporaryFile(max_size=LIMITE_SUBLOTE_RAM) as buf:
+                compressao = zipfile.ZIP_DEFLATED if tipo == "xml" else zipfile.ZIP_STORED
+                with zipfile.ZipFile(buf, "w", compressao) as zf:
+                    for i, (_, fonte) in enumerate(itens):
+                        with zf.open(f"{i:06d}.{tipo}", "w", force_zip64=True) as dst:
+                            _copiar_fonte(fonte, dst, leitores)
+                for leitor in leitores.values():
+                    leitor.fechar()
+                leitores.clear()
+                tamanho = buf.tell()
+                tentados: set = set()
+                while True:
+                    no = self._reservar(tentados)
+                    try:
+                        self._enviar(no, buf, tamanho, opcoes, saida, parar)
+                    except OSError:
+                        self._liberar(no, falhou=True)
+                        tentados.add(no.url)
+                        if parar.is_set() or len(tentados) >= len(self.nos):
+                            raise
+                        continue
+                    self._liberar(no)
+                    break
+        except BaseException as e:
+            saida.put(e)
+        finally:
+            for leitor in leitores.values():
+                leitor.fechar()
+            saida.put(None)
+
+    def _enviar(self, no: _No, buf: IO[bytes], tamanho: int, opcoes: dict, saida: queue.Queue,
+                parar: threading.Event) -> None:
+        consulta = urlencode({k: (int(v) if isinstance(v, bool) else v or 0) for k, v in opcoes.items()})
+        with no.conexoes.requisicao("POST", f"/lotes?{consulta}", buf,
+                                    self._cabecalhos(**{"Content-Type": "application/zip",
+                                                        "Content-Length": str(tamanho)})) as r:
+            dados = _json(r)
+            if r.status != 201:
+                raise ErroServico(f"{no.url}: HTTP {r.status} {dados.get('erro', '')}")
+        id_lote = dados["id"]
+        try:
+            with no.conexoes.requisicao("GET", f"/lotes/{id_lote}/resultados", None, self._cabecalhos()) as r:
+                if r.status != 200:
+                    raise ErroServico(f"{no.url}: HTTP {r.status} {_json(r).get('erro', '')}")
+                for linha in r:
+                    if parar.is_set():
+                        raise Cancelado()
+                    if not linha.strip():
+                        continue  # batida do serviço
+                    registro = json.loads(linha)
+                    if registro.get("fim"):
+                        if registro["estado"] != "concluído":
+                            raise ErroServico(f"{no.url}: lote {registro['estado']}: {registro.get('erro')}")
+                        saida.put(registro)   # contadores do cache do nó
+                        break
+                    saida.put(registro)
+        finally:
+            self._apagar(no, id_lote)
+
+    def _apagar(self, no: _No, id_lote: str) -> None:
+        try:
+            with no.conexoes.requisicao("DELETE", f"/lotes/{id_lote}", None, self._cabecalhos()) as r:
+                r.read()
+        except OSError:
+            pass  # o serviço apaga sozinho depois de RETER_SEGUNDOS
+
+    # ---- lote inteiro, na ordem ----
+    def _registros(self, itens: Sequence[Tuple[str, object]], tipo: str, opcoes: dict,
+                   andamento: Andamento | None, cache: CacheResultados | None) -> Iterator[Tuple[int, dict]]:
+        """
+        (índice em `itens`, registro), na ordem de `itens`; sublotes em voo em paralelo.
+        Com `cache`, os nós usam o cache deles e os contadores (acertos/faltas/duplicados)
+        são somados aos de `cache`; sem ele, os nós não consultam o cache.
+        """
+        opcoes = {**opcoes, "cache": cache is not None}
+        passo = self.arquivos_por_sublote
+        partes = [itens[i:i + passo] for i in range(0, len(itens), passo)]
+        parar = threading.Event()
+        filas: List[queue.Queue] = []
+        futuros = []
+
+        def submeter(k: int) -> None:
+            filas.append(queue.Queue())
+            futuros.append(self._threads.submit(self._sublote, partes[k], tipo, opcoes, filas[k], parar))
+
+        try:
+            for k in range(min(len(partes), self.workers)):
+                submeter(k)
+            for k in range(len(partes)):
+                prontos: Dict[int, dict] = {}
+                proximo = 0
+                while True:
+                    if andamento is not None:
+                        andamento.verificar()
+                    try:
+                        registro = filas[k].get(timeout=0.5)
+                    except queue.Empty:
+                        continue
+                    if registro is None:
+                        break
+                    if isinstance(registro, BaseException):
+                        raise registro
+                    if registro.get("fim"):
+                        if cache is not None:
+                            cache.somar_contadores(registro.get("cache") or {})
+                        continue
+                    prontos[registro["indice"]] = registro
+                    while proximo in prontos:
+                        yield k * passo + proximo, prontos.pop(proximo)
+                        proximo += 1
+                if proximo < len(partes[k]):
+                    raise ErroServico(f"sublote {k}: {len(partes[k]) - proximo} arquivo(s) sem resultado")
+                filas[k] = None
+                if k + self.workers < len(partes):
+                    submeter(k + self.workers)
+        finally:
+            parar.set()
+            for f in futuros:
+                f.cancel()
+
+    # ---- interface de processors.paralelo ----
+    def _linhas_xml(self, itens: Sequence[Tuple[str, object]], erros: List[dict] | None,
+                    andamento: Andamento | None, cache: CacheResultados | None) -> Iterator[List[str]]:
+        for i, r in self._registros(itens, "xml", {}, andamento, cache):
+            if andamento is not None:
+                andamento.avancar(arquivos=1)
+            if r["erro"] is not None and erros is not None:
+                erros.append({"arquivo": itens[i][0], "erro": f"ERRO: {r['erro']}"})
+            yield from r["linhas"]
+
+    def iterar_xmls_sessao(self, arquivos: Sequence, cache: CacheResultados | None = None,
+                           erros: List[dict] | None = None, andamento: Andamento | None = None,
+                           **_locais) -> Iterator[List[str]]:
+        """Como paralelo.iterar_xmls_sessao (compartilhado/workers são do serviço; ver _registros)."""
+        return self._linhas_xml([(a.nome, a.fonte()) for a in arquivos], erros, andamento, cache)
+
+    def iterar_xmls_zip(self, zip_path: Path | str, membros: Sequence, cache: CacheResultados | None = None,
+                        erros: List[dict] | None = None, andamento: Andamento | None = None,
+                        **_locais) -> Iterator[List[str]]:
+        """Como paralelo.iterar_xmls_zip: os membros são lidos do .zip local e reenviados."""
+        return self._linhas_xml([(m.nome, (str(zip_path), tuple(m.cadeia))) for m in membros], erros, andamento,
+                                cache)
+
+    def iterar_xmls(self, paths: Sequence[Path | str], cache: CacheResultados | None = None,
+                    erros: List[dict] | None = None, andamento: Andamento | None = None,
+                    **_locais) -> Iterator[List[str]]:
+        return self._linhas_xml([(Path(p).name, p) for p in paths], erros, andamento, cache)
+
+    def processar_pdfs(self, paths: Sequence[Path | str], dpi: int = 300, max_chaves: int | None = None,
+                       uma_por_pagina: bool = False, camada_texto: bool = False, adaptativo: bool = False,
+                       cache: CacheResultados | None = None, andamento: Andamento | None = None,
+                       **_locais) -> List[ResultadoPDF]:
+        """Como paralelo.processar_pdfs: um ResultadoPDF por arquivo, na ordem de `paths`."""
+        opcoes = {"dpi": dpi, "max_chaves": max_chaves, "uma_por_pagina": uma_por_pagina,
+                  "camada_texto": camada_texto, "adaptativo": adaptativo}
+        resultados: List[ResultadoPDF] = []
+        for _, r in self._registros([(Path(p).name, p) for p in paths], "pdf", opcoes, andamento, cache):
+            niveis = Counter(r["niveis"])
+            if andamento is not None:
+                andamento.avancar(arquivos=1, paginas=sum(niveis.values()))
+            resultados.append(ResultadoPDF(r["chaves"], r["outras"], r["erro"], r["origens"], niveis))
+        return resultados
+
+    def fechar(self) -> None:
+        self._threads.shutdown(wait=False, cancel_futures=True)
+        for no in self.nos:
+            no.conexoes.fechar()
+
+# ---- serviço no próprio processo ----
+_local: Tuple[object, object, str] | None = None
+_lock_local = threading.Lock()
+
+def servico_local(**opcoes_servico) -> str:
+    """Sobe (uma vez por processo) o serviço em 127.0.0.1 numa thread; devolve a URL."""
+    global _local
+    from processors.servico import ServicoExtracao, criar_servidor
+    with _lock_local:
+        if _local is None:
+            servico = ServicoExtracao(**opcoes_servico)
+            servidor = criar_servidor(servico, "127.0.0.1", 0)
+            threading.Thread(target=servidor.serve_forever, name="nfe-servico-local", daemon=True).start()
+            _local = (servico, servidor, f"http://127.0.0.1:{servidor.server_address[1]}")
+        return _local[2]
+
+def encerrar_servico_local() -> None:
+    global _local
+    with _lock_local:
+        if _local is not None:
+            servico, servidor, _ = _local
+            servidor.shutdown()
+            servidor.server_close()
+            servico.encerrar()
+            _local = None
+
+def backend_configurado(urls: str | None = None, token: str | None = None,
+                        fabrica_local: Callable[[], str] = servico_local) -> BackendRemoto | None:
+    """BackendRemoto de NFE_SERVICO_URLS ("local" sobe o serviço neste processo); None = extração local."""
+    urls = os.environ.get("NFE_SERVICO_URLS", "") if urls is None else urls
+    lista = [u.strip() for u in urls.split(",") if u.strip()]
+    if not lista:
+        return None
+    lista = [fabrica_local() if u == "local" else u for u in lista]
+    return BackendRemoto(lista, token=token if token is not None else os.environ.get("NFE_SERVICO_TOKEN"))
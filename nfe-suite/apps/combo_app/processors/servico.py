@@ -0,0 +1,456 @@
+# nfe-suite/apps/combo_app/processors/servico.py
+# Serviço HTTP de extração (só biblioteca padrão): recebe um lote (.zip com XMLs e/ou PDFs),
+# processa em segundo plano com o mesmo código do app (xml_nfe / extractor_pyzbar, pelo pool
+# de processos de processors.paralelo e a fila de processors.jobs) e entrega um registro por
+# arquivo em NDJSON, à medida que ficam prontos. Vários nós atrás do combo_app
+# (processors.remoto) espalham a extração sem replicar a interface.
+#
+#   POST   /lotes?max_chaves=&uma_por_pagina=1&camada_texto=1&adaptativo=1&dpi=300&cache=1   corpo: .zip
+#          -> 201 {"id", "xmls", "pdfs", "ignorados": [{"arquivo", "motivo"}]}
+#   GET    /lotes/<id>                        estado e andamento
+#   GET    /lotes/<id>/resultados?desde=N     NDJSON (chunked) até o lote terminar; a última
+#                                             linha é {"fim": true, "estado", "erro"}
+#   DELETE /lotes/<id>                        cancela e apaga
+#   GET    /saude
+#
+# Registros: {"indice", "arquivo", "tipo": "xml", "linhas": [[25 colunas]], "erro"} e
+# {"indice", "arquivo", "tipo": "pdf", "chaves", "outras", "erro", "origens", "niveis"};
+# com cache=1 (e o nó sem --sem-cache), o registro de fim traz "cache": {"acertos", "faltas",
+# "duplicados"} do lote. Arquivos idênticos no lote são extraídos uma vez, com ou sem cache.
+# `indice` é a posição do arquivo no .zip (ordem do diretório central, descendo em ZIPs internos).
+# Linhas e chaves são as de extract_info_from_xml / extrair_chaves_de_pdf.
+#   python -m processors.servico --porta 8765 [--workers N] [--token SEGREDO]
+# Escuta só em 127.0.0.1 por padrão; outro --host (ex.: 0.0.0.0) exige --token.
+
+from __future__ import annotations
+import argparse
+import hmac
+import ipaddress
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import IO, Dict, Iterator, List
+from urllib.parse import parse_qs, urlsplit
+
+from processors.cache import CacheResultados, com_cache
+from processors.jobs import FilaJobs, Job
+from processors.paralelo import (VERSAO_XML, Andamento, PoolCompartilhado, ResultadoPDF, _xml_zip_bloco,
+                                 mapear_em_blocos, processar_pdfs, workers_padrao)
+
+PORTA_PADRAO = 8765
+PASTA_PADRAO = Path(os.environ.get("NFE_SERVICO_DIR") or Path(tempfile.gettempdir()) / "nfe_suite_servico")
+MAX_LOTE_MB = float(os.environ.get("NFE_SERVICO_MAX_MB", "2048"))
+RETER_SEGUNDOS = 3600        # lotes terminados e não apagados pelo cliente
+BATIDA_SEGUNDOS = 15         # linha vazia no NDJSON enquanto nada fica pronto (proxies, timeouts)
+_XMLS_POR_PARTE = 256
+
+class Registros:
+    """NDJSON do lote em disco (append-only): os leitores acompanham sem segurar tudo em RAM."""
+
+    def __init__(self, caminho: Path):
+        self.caminho = caminho
+        self.n = 0
+        self.fim: dict | None = None
+        self._f = open(caminho, "a", encoding="utf-8")
+        self._cond = threading.Condition()
+
+    def publicar(self, registros: List[dict]) -> None:
+        texto = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in registros)
+        with self._cond:
+            self._f.write(texto)
+            self._f.flush()
+            self.n += len(registros)
+            self._cond.notify_all()
+
+    def encerrar(self, estado: str, erro: str | None, **extra) -> None:
+        with self._cond:
+            self.fim = {"fim": True, "estado": estado, "erro": erro, **extra}
+            self._f.close()
+            self._cond.notify_all()
+
+    def ler(self, desde: int = 0, esperar: bool = True, batida: float = BATIDA_SEGUNDOS) -> Iterator[str]:
+        """Linhas a partir da `desde`-ésima; "" a cada `batida` s sem novidade; termina com o registro de fim."""
+        lidas = 0
+        with open(self.caminho, encoding="utf-8") as f:
+            while True:
+                with self._cond:
+                    if lidas >= self.n and self.fim is None and esperar:
+                        self._cond.wait(batida)
+                    disponiveis, fim = self.n, self.fim
+                if lidas >= disponiveis:
+                    if fim is not None or not esperar:
+                        if fim is not None:
+                            yield json.dumps(fim, ensure_ascii=False) + "\n"
+                        return
+                    yield ""
+                    continue
+                while lidas < disponiveis:
+                    linha = f.readline()
+                    lidas += 1
+                    if lidas > desde:
+                        yield linha
+
+class ServicoExtracao:
+    """
+    Lotes recebidos por HTTP: cada um vira um Job em FilaJobs (até `lotes_simultaneos`
+    rodando, rodízio por cliente) e usa o PoolCompartilhado do serviço.
+    """
+
+    def __init__(self, pasta: Path | str = PASTA_PADRAO, workers: int | None = None, memoria_mb: float = 1024,
+                 lotes_simultaneos: int = 2, usar_cache: bool = True, token: str | None = None):
+        from processors.aquecimento import aquecer_worker
+        self.pasta = Path(pasta)
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        self.pool = PoolCompartilhado(workers=workers or workers_padrao(), memoria_mb=memoria_mb,
+                                      inicializador=aquecer_worker)
+        self.fila = FilaJobs(max_simultaneos=lotes_simultaneos)
+        self.usar_cache = usar_cache     # cada lote abre o seu CacheResultados (contadores do lote)
+        self.token = token
+        self._registros: Dict[str, Registros] = {}
+        self._apagados: set = set()      # cancelados pelo cliente: somem assim que terminarem
+        self._contagens: Dict[str, dict] = {}   # id -> {"xmls", "pdfs", "ignorados"}
+
+    # ---- lotes ----
+    def criar_lote(self, corpo: IO[bytes], tamanho: int, opcoes: dict, dono: str = "") -> Job:
+        from processors.lote_zip import LeitorZip
+        id_lote = uuid.uuid4().hex[:12]
+        pasta = self.pasta / id_lote
+        pasta.mkdir(parents=True)
+        zip_path = pasta / "lote.zip"
+        try:
+            with open(zip_path, "wb") as f:
+                restante = tamanho
+                while restante > 0:
+                    parte = corpo.read(min(1 << 20, restante))
+                    if not parte:
+                        raise ValueError("corpo do lote incompleto")
+                    f.write(parte)
+                    restante -= len(parte)
+            with LeitorZip(zip_path) as leitor:
+                membros = leitor.membros()
+                ignorados = [{"arquivo": a, "motivo": m} for a, m in leitor.ignorados]
+        except Exception:
+            shutil.rmtree(pasta, ignore_errors=True)
+            raise
+        registros = Registros(pasta / "resultados.ndjson")
+        opcoes = dict(opcoes)
+        usar_cache = opcoes.pop("cache", True) and self.usar_cache
+
+        def rodar(andamento: Andamento) -> dict:
+            cache = CacheResultados() if usar_cache else None
+            try:
+                self._processar(zip_path, membros, opcoes, registros, andamento, cache)
+            except BaseException as e:
+                registros.encerrar("cancelado" if andamento.cancelado else "erro", f"{type(e).__name__}: {e}")
+                raise
+            registros.encerrar("concluído", None, **({"cache": cache.contadores()} if cache is not None else {}))
+            return {}
+
+        job = self.fila.submeter(f"lote {id_lote}", rodar, dono=dono, pasta=pasta, arquivos_total=len(membros))
+        self._registros[job.id] = registros
+        self._contagens[job.id] = {"xmls": sum(m.extensao == ".xml" for m in membros),
+                                   "pdfs": sum(m.extensao == ".pdf" for m in membros), "ignorados": ignorados}
+        return job
+
+    def _processar(self, zip_path: Path, membros: list, opcoes: dict, registros: Registros,
+                   andamento: Andamento, cache: CacheResultados | None) -> None:
+        from processors.decodificadores import nome_cadeia
+        from processors.extractor_pyzbar import RASTER_PADRAO, VERSAO_EXTRATOR
+        from processors.lote_zip import LeitorZip
+        xmls = [(i, m) for i, m in enumerate(membros) if m.extensao == ".xml"]
+        pdfs = [(i, m) for i, m in enumerate(membros) if m.extensao == ".pdf"]
+        with LeitorZip(zip_path) as leitor:
+            hashes = {i: leitor.hash(m) for i, m in xmls + pdfs}
+
+        for a in range(0, len(xmls), _XMLS_POR_PARTE):
+            parte = xmls[a:a + _XMLS_POR_PARTE]
+            lidos = [0]
+
+            def concluido(_inicio: int, resultados: list) -> None:
+                lidos[0] += len(resultados)
+                andamento.avancar(arquivos=len(resultados))
+
+            por_arquivo = com_cache(
+                [(str(zip_path), tuple(m.cadeia)) for _, m in parte], cache, VERSAO_XML, {},
+                lambda ts: mapear_em_blocos(_xml_zip_bloco, ts, workers=self.pool.workers, bloco=16,
+                                            pool=self.pool.executor(), ao_concluir=concluido, andamento=andamento),
+                cacheavel=lambda r: r[1] is None,
+                hashes=[hashes[i] for i, _ in parte],
+            )
+            andamento.avancar(arquivos=len(parte) - lidos[0])   # do cache ou duplicados
+            registros.publicar([{"indice": i, "arquivo": m.nome, "tipo": "xml", "linhas": linhas, "erro": erro}
+                                for (i, m), (linhas, erro) in zip(parte, por_arquivo)])
+
+        if not pdfs:
+            return
+        # PDFs idênticos no lote: um representante é lido, os demais recebem o mesmo registro
+        grupos: Dict[str, list] = {}
+        for i, m in pdfs:
+            grupos.setdefault(hashes[i], []).append((i, m))
+        parametros = {**opcoes, "dpi_baixo": 150, "raster": RASTER_PADRAO, "decodificadores": nome_cadeia()}
+        pendentes = []
+        for h, grupo in grupos.items():
+            valor = cache.obter(CacheResultados.chave(h, VERSAO_EXTRATOR, parametros)) if cache is not None else None
+            if cache is not None:
+                cache.duplicados += len(grupo) - 1
+                if valor is not None:
+                    cache.acertos += 1
+                else:
+                    cache.faltas += 1
+            if valor is not None:
+                self._publicar_pdf(registros, grupo, ResultadoPDF(valor[0], valor[1], valor[2], valor[3],
+                                                                  Counter(valor[4])))
+                andamento.avancar(arquivos=len(grupo))
+            else:
+                pendentes.append((h, grupo))
+        pasta_pdfs = zip_path.parent / "pdfs"
+        with LeitorZip(zip_path) as leitor:
+            caminhos = [leitor.copiar(grupo[0][1], pasta_pdfs) for _, grupo in pendentes]
+
+        def um_pdf(k: int) -> None:
+            # um PDF por chamada: o registro sai assim que o arquivo termina; as páginas de
+            # todos os PDFs dividem o mesmo pool e o mesmo orçamento de memória
+            h, grupo = pendentes[k]
+            r: ResultadoPDF = processar_pdfs([caminhos[k]], compartilhado=self.pool, andamento=andamento,
+                                             **opcoes)[0]
+            if cache is not None and r.erro is None:
+                cache.guardar(CacheResultados.chave(h, VERSAO_EXTRATOR, parametros),
+                              [r.chaves, r.outras, r.erro, r.origens, dict(r.niveis)])
+            self._publicar_pdf(registros, grupo, r)
+            andamento.avancar(arquivos=len(grupo) - 1)
+
+        with ThreadPoolExecutor(max_workers=self.pool.workers, thread_name_prefix="servico-pdf") as threads:
+            for f in [threads.submit(um_pdf, k) for k in range(len(pendentes))]:
+                f.result()
+        shutil.rmtree(pasta_pdfs, ignore_errors=True)
+
+    @staticmethod
+    def _publicar_pdf(registros: Registros, grupo: list, r: ResultadoPDF) -> None:
+        registros.publicar([{"indice": i, "arquivo": m.nome, "tipo": "pdf", "chaves": r.chaves, "outras": r.outras,
+                             "erro": r.erro, "origens": r.origens, "niveis": dict(r.niveis)} for i, m in grupo])
+
+    def registros(self, id_lote: str) -> Registros | None:
+        return self._registros.get(id_lote)
+
+    def contagem(self, id_lote: str) -> dict:
+        return self._contagens.get(id_lote, {})
+
+    def estado(self, job: Job) -> dict:
+        # job.resultado fica de fora: num lote com erro, FilaJobs guarda ali o traceback
+        a = job.andamento
+        return {"id": job.id, "estado": job.estado, "erro": job.erro, "arquivos": a.arquivos,
+                "arquivos_total": a.arquivos_total, "paginas": a.paginas, "segundos": round(job.segundos, 1),
+                "registros": self._registros[job.id].n if job.id in self._registros else 0, **self.contagem(job.id)}
+
+    def apagar(self, id_lote: str) -> None:
+        """Cancela; a pasta e os registros somem já (lote terminado) ou quando ele terminar."""
+        self.fila.cancelar(id_lote)
+        job = self.fila.obter(id_lote)
+        registros = self._registros.get(id_lote)
+        if job is None:
+            return
+        if registros is not None and registros.fim is None and job.terminado:
+            registros.encerrar(job.estado, job.erro)   # cancelado ainda na fila: nem chegou a rodar
+        if job.terminado:
+            self.fila.remover(id_lote)
+            self._registros.pop(id_lote, None)
+            self._contagens.pop(id_lote, None)
+            self._apagados.discard(id_lote)
+        else:
+            self._apagados.add(id_lote)
+
+    def limpar(self, reter_segundos: float = RETER_SEGUNDOS) -> None:
+        agora = time.time()
+        for job in self.fila.jobs():
+            if job.terminado and (job.id in self._apagados or agora - (job.fim or agora) > reter_segundos):
+                self.apagar(job.id)
+
+    def saude(self) -> dict:
+        return {"ok": True, "workers": self.pool.workers, "rodando": self.fila.rodando,
+                "pendentes": self.fila.pendentes}
+
+    def encerrar(self) -> None:
+        self.fila.encerrar()
+        self.pool.fechar()
+
+# ---- HTTP ----
+def _opcoes(consulta: dict) -> dict:
+    def sim(nome: str, padrao: str = "0") -> bool:
+        return consulta.get(nome, [padrao])[0].lower() in ("1", "true", "sim")
+
+    max_chaves = int(consulta.get("max_chaves", ["0"])[0] or 0)
+    return {"dpi": int(consulta.get("dpi", ["300"])[0]), "max_chaves": max_chaves or None,
+            "uma_por_pagina": sim("uma_por_pagina"), "camada_texto": sim("camada_texto"),
+            "adaptativo": sim("adaptativo"), "cache": sim("cache", "1")}
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive: o cliente reaproveita as conexões
+    servico: ServicoExtracao
+
+    def log_message(self, formato: str, *args) -> None:
+        if os.environ.get("NFE_SERVICO_LOG"):
+            super().log_message(formato, *args)
+
+    def _json(self, status: int, dados: dict, fechar: bool = False) -> None:
+        # fechar: o corpo da requisição não foi lido; se a conexão continuasse, ele seria
+        # interpretado como a próxima requisição
+        corpo = json.dumps(dados, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        if fechar or self._corpo_pendente():
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _corpo_pendente(self) -> bool:
+        # GET/DELETE com corpo (nenhuma rota lê): a conexão não pode ser reaproveitada
+        return self.command != "POST" and (self.headers.get("Content-Length", "0").strip() not in ("", "0")
+                                           or "Transfer-Encoding" in self.headers)
+
+    def _rota(self) -> tuple:
+        url = urlsplit(self.path)
+        return [p for p in url.path.split("/") if p], parse_qs(url.query)
+
+    def _autorizado(self) -> bool:
+        recebido = self.headers.get("Authorization", "").encode("utf-8")
+        if self.servico.token and not hmac.compare_digest(recebido, f"Bearer {self.servico.token}".encode("utf-8")):
+            self._json(HTTPStatus.UNAUTHORIZED, {"erro": "token inválido"}, fechar=True)
+            return False
+        return True
+
+    def _lote(self, partes: list) -> Job | None:
+        job = self.servico.fila.obter(partes[1]) if len(partes) >= 2 else None
+        if job is None:
+            self._json(HTTPStatus.NOT_FOUND, {"erro": "lote não encontrado"})
+        return job
+
+    def do_GET(self) -> None:
+        partes, consulta = self._rota()
+        if partes == ["saude"]:
+            return self._json(HTTPStatus.OK, self.servico.saude())
+        if not self._autorizado():
+            return
+        if len(partes) == 2 and partes[0] == "lotes":
+            if (job := self._lote(partes)) is not None:
+                self._json(HTTPStatus.OK, self.servico.estado(job))
+            return
+        if len(partes) == 3 and partes[0] == "lotes" and partes[2] == "resultados":
+            if self._lote(partes) is None:
+                return
+            registros = self.servico.registros(partes[1])
+            try:
+                desde = int(consulta.get("desde", ["0"])[0])
+                esperar = {"1": True, "0": False}[consulta.get("esperar", ["1"])[0]]
+                if desde < 0:
+                    raise ValueError(desde)
+            except (KeyError, ValueError):
+                return self._json(HTTPStatus.BAD_REQUEST, {"erro": "desde (inteiro >= 0) ou esperar (0/1) inválido"})
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+            self.send_header("Transfer-Encoding", "chunked")
+            if self._corpo_pendente():
+                self.send_header("Connection", "close")
+            self.end_headers()
+            for linha in registros.ler(desde, esperar):
+                dados = (linha or "\n").encode("utf-8")
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(dados), dados))
+            self.wfile.write(b"0\r\n\r\n")
+            return
+        self._json(HTTPStatus.NOT_FOUND, {"erro": "rota desconhecida"})
+
+    def do_POST(self) -> None:
+        # toda resposta antes de o corpo ser lido fecha a conexão (ver _json)
+        partes, consulta = self._rota()
+        if not self._autorizado():
+            return
+        if partes != ["lotes"]:
+            return self._json(HTTPStatus.NOT_FOUND, {"erro": "rota desconhecida"}, fechar=True)
+        try:
+            tamanho = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            tamanho = 0
+        if tamanho <= 0 or "Transfer-Encoding" in self.headers:
+            return self._json(HTTPStatus.LENGTH_REQUIRED, {"erro": "Content-Length obrigatório"}, fechar=True)
+        if tamanho > MAX_LOTE_MB * 2**20:
+            return self._json(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"erro": f"lote acima de {MAX_LOTE_MB:.0f} MB"},
+                              fechar=True)
+        self.servico.limpar()
+        try:
+            job = self.servico.criar_lote(self.rfile, tamanho, _opcoes(consulta),
+                                          dono=self.headers.get("X-Cliente") or self.client_address[0])
+        except Exception as e:
+            return self._json(HTTPStatus.BAD_REQUEST, {"erro": f"{type(e).__name__}: {e}"}, fechar=True)
+        self._json(HTTPStatus.CREATED, {"id": job.id, **self.servico.contagem(job.id)})
+
+    def do_DELETE(self) -> None:
+        partes, _ = self._rota()
+        if not self._autorizado():
+            return
+        if len(partes) == 2 and partes[0] == "lotes":
+            if self._lote(partes) is not None:
+                self.servico.apagar(partes[1])
+                self._json(HTTPStatus.OK, {"id": partes[1]})
+            return
+        self._json(HTTPStatus.NOT_FOUND, {"erro": "rota desconhecida"})
+
+def criar_servidor(servico: ServicoExtracao, host: str = "127.0.0.1", porta: int = PORTA_PADRAO) -> ThreadingHTTPServer:
+    """Servidor (uma thread por conexão) ligado ao serviço; porta 0 = qualquer livre."""
+    handler = type("Handler", (_Handler,), {"servico": servico})
+    servidor = ThreadingHTTPServer((host, porta), handler)
+    servidor.daemon_threads = True
+    return servidor
+
+def _loopback(host: str) -> bool:
+    if host.lower() == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m processors.servico", description="Serviço HTTP de extração de NF-e.")
+    ap.add_argument("--host", default=os.environ.get("NFE_SERVICO_HOST", "127.0.0.1"),
+                    help="endereço de escuta (NFE_SERVICO_HOST; fora do loopback, exige --token)")
+    ap.add_argument("--porta", type=int, default=int(os.environ.get("NFE_SERVICO_PORTA", PORTA_PADRAO)))
+    ap.add_argument("-w", "--workers", type=int, default=int(os.environ.get("NFE_POOL_WORKERS", "0")) or None,
+                    help="processos de extração (padrão: CPUs)")
+    ap.add_argument("--memoria-mb", type=float, default=float(os.environ.get("NFE_POOL_MEMORIA_MB", "1024")),
+                    help="MB de páginas rasterizadas em voo")
+    ap.add_argument("--lotes-simultaneos", type=int, default=int(os.environ.get("NFE_JOBS_SIMULTANEOS", "2")))
+    ap.add_argument("--pasta", default=str(PASTA_PADRAO), help="lotes recebidos e resultados (NFE_SERVICO_DIR)")
+    ap.add_argument("--sem-cache", action="store_true", help="não usar o cache de resultados")
+    ap.add_argument("--token", default=os.environ.get("NFE_SERVICO_TOKEN"),
+                    help="exige 'Authorization: Bearer <token>' (NFE_SERVICO_TOKEN)")
+    args = ap.parse_args(argv)
+    if not args.token and not _loopback(args.host):
+        ap.error(f"--host {args.host} aceita conexões de outras máquinas: defina --token (ou NFE_SERVICO_TOKEN)")
+
+    servico = ServicoExtracao(args.pasta, workers=args.workers, memoria_mb=args.memoria_mb,
+                              lotes_simultaneos=args.lotes_simultaneos, usar_cache=not args.sem_cache,
+                              token=args.token)
+    servidor = criar_servidor(servico, args.host, args.porta)
+    print(f"Serviço de extração em http://{args.host}:{servidor.server_address[1]} "
+          f"({servico.pool.workers} worker(s))", file=sys.stderr)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        servico.encerrar()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+# nfe-suite/apps/combo_app/processors/sessao.py
+# Área de trabalho isolada por sessão: uploads ficam em memória até `limite_memoria_mb`
+# (somados) e, além disso, vão para uma pasta temporária só desta sessão. Nomes iguais
+# de usuários (ou envios) diferentes nunca colidem. A pasta some em limpar() — chamado
+# quando a sessão termina — e pastas órfãs (processo morto) são varridas por limpar_orfas().
+# Cada pasta tem um arquivo de batimento (.vivo: máquina e PID do dono) que o app toca a
+# cada rerun; o mtime da pasta não serve, ele só muda quando entra ou sai um arquivo.
+# Sem Streamlit aqui: o app guarda a AreaSessao no st.session_state.
+
+from __future__ import annotations
+import hashlib
+import itertools
+import os
+import re
+import shutil
+import socket
+import tempfile
+import threading
+import time
+from io import BytesIO
+from pathlib import Path
+from typing import IO, Dict, List, NamedTuple, Tuple
+
+from processors.cache import hash_arquivo
+
+BASE_PADRAO = Path(os.environ.get("NFE_SESSOES_DIR") or Path(tempfile.gettempdir()) / "nfe_suite_sessoes")
+LIMITE_MEMORIA_MB = float(os.environ.get("NFE_SESSAO_MEMORIA_MB", "64"))
+_PREFIXO = "sessao_"
+_VIVO = ".vivo"
+
+class ArquivoSessao(NamedTuple):
+    nome: str                  # nome original (exibição)
+    tamanho: int
+    dados: bytes | None        # em memória ...
+    caminho: Path | None       # ... ou em disco, na pasta da sessão
+
+    @property
+    def extensao(self) -> str:
+        return Path(self.nome).suffix.lower()
+
+    def abrir(self) -> IO[bytes]:
+        return BytesIO(self.dados) if self.dados is not None else open(self.caminho, "rb")
+
+    def fonte(self) -> bytes | str:
+        """O que vai para o processo filho: os bytes ou o caminho do arquivo."""
+        return self.dados if self.dados is not None else str(self.caminho)
+
+    def hash(self) -> str:
+        return hashlib.sha256(self.dados).hexdigest() if self.dados is not None else hash_arquivo(self.caminho)
+
+def _nome_seguro(nome: str) -> str:
+    nome = Path(nome.replace("\\", "/")).name
+    return re.sub(r"[^\w.\- ]", "_", nome) or "arquivo"
+
+class AreaSessao:
+    """
+    Arquivos de uma sessão. guardar() decide memória x disco pelo limite; caminho()
+    garante o arquivo em disco (Poppler e os workers de ZIP precisam de caminho).
+    """
+
+    def __init__(self, base: Path | str = BASE_PADRAO, limite_memoria_mb: float = LIMITE_MEMORIA_MB):
+        base = Path(base)
+        base.mkdir(parents=True, exist_ok=True)
+        self.pasta = Path(tempfile.mkdtemp(prefix=_PREFIXO, dir=base))
+        (self.pasta / _VIVO).write_text(f"{socket.gethostname()} {os.getpid()}\n", encoding="utf-8")
+        self.limite_bytes = int(limite_memoria_mb * 1024 * 1024)
+        self.em_memoria = 0
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        # arquivos em memória que caminho() gravou em disco: id -> (arquivo, caminho), até liberar()
+        self._gravados: Dict[int, Tuple[ArquivoSessao, Path]] = {}
+
+    def tocar(self) -> None:
+        """Batimento: a sessão está em uso (o app chama a cada rerun)."""
+        try:
+            os.utime(self.pasta / _VIVO)
+        except OSError:
+            pass
+
+    def subpasta(self, prefixo: str = "") -> Path:
+        """Pasta nova dentro da área (ex.: saídas de um job)."""
+        with self._lock:
+            n = next(self._seq)
+        p = self.pasta / f"{prefixo}{n:06d}"
+        p.mkdir(parents=True, exist_ok=True)
+        return p
+
+    def guardar(self, nome: str, dados: bytes | memoryview, em_disco: bool = False) -> ArquivoSessao:
+        tamanho = len(dados)
+        with self._lock:
+            cabe = not em_disco and self.em_memoria + tamanho <= self.limite_bytes
+            if cabe:
+                self.em_memoria += tamanho
+        if cabe:
+            return ArquivoSessao(nome, tamanho, bytes(dados), None)
+        destino = self.subpasta("up") / _nome_seguro(nome)
+        with open(destino, "wb") as out:
+            out.write(dados)
+        return ArquivoSessao(nome, tamanho, None, destino)
+
+    def caminho(self, arquivo: ArquivoSessao) -> Path:
+        """Caminho do arquivo em disco, gravando-o uma vez se estava em memória (apagado em liberar())."""
+        if arquivo.caminho is not None:
+            return arquivo.caminho
+        with self._lock:
+            gravado = self._gravados.get(id(arquivo))
+        if gravado is not None:
+            return gravado[1]
+        destino = self.subpasta("up") / _nome_seguro(arquivo.nome)
+        destino.write_bytes(arquivo.dados)
+        with self._lock:
+            self._gravados[id(arquivo)] = (arquivo, destino)
+        return destino
+
+    def liberar(self, arquivos: List[ArquivoSessao]) -> None:
+        """Devolve a memória dos arquivos (o chamador solta as referências) e apaga os do disco."""
+        for a in arquivos:
+            if a.dados is not None:
+                with self._lock:
+                    self.em_memoria = max(0, self.em_memoria - a.tamanho)
+                    gravado = self._gravados.pop(id(a), None)
+                if gravado is not None:
+                    shutil.rmtree(gravado[1].parent, ignore_errors=True)
+            elif a.caminho is not None:
+                shutil.rmtree(a.caminho.parent, ignore_errors=True)
+
+    def limpar(self) -> None:
+        shutil.rmtree(self.pasta, ignore_errors=True)
+        self.em_memoria = 0
+        self._gravados.clear()
+
+def _processo_vivo(pid: int) -> bool:
+    if os.name == "nt":
+        return True   # os.kill(pid, 0) encerraria o processo no Windows: vale só o batimento
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def _em_uso(pasta: Path, limite: float) -> bool:
+    """Batimento recente ou dono (nesta máquina) ainda rodando; sem .vivo, vale o mtime da pasta."""
+    vivo = pasta / _VIVO
+    try:
+        if vivo.stat().st_mtime >= limite:
+            return True
+        maquina, pid = vivo.read_text(encoding="utf-8").split()
+    except FileNotFoundError:
+        return pasta.stat().st_mtime >= limite
+    except ValueError:
+        return False
+    return maquina == socket.gethostname() and _processo_vivo(int(pid))
+
+def limpar_orfas(base: Path | str = BASE_PADRAO, idade_horas: float = 24) -> int:
+    """
+    Apaga pastas de sessão sem batimento há `idade_horas` cujo dono não está rodando nesta
+    máquina (sobras de processos mortos). Pastas de outras réplicas (tmp compartilhado)
+    só são apagadas quando o batimento delas para.
+    """
+    base = Path(base)
+    if not base.is_dir():
+        return 0
+    limite = time.time() - idade_horas * 3600
+    n = 0
+    for p in base.glob(f"{_PREFIXO}*"):
+        try:
+            if p.is_dir() and not _em_uso(p, limite):
+                shutil.rmtree(p, ignore_errors=True)
+                n += 1
+        except OSError:
+            pass
+    return n
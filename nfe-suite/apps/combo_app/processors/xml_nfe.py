@@ -0,0 +1,141 @@
+# nfe-suite/apps/combo_app/processors/xml_nfe.py
+# Extrai as linhas (uma por item/det) de um XML de NF-e em UMA passada com iterparse.
+# Gera exatamente as mesmas 25 colunas do extract_info_from_xml original (xml_app),
+# sem montar a árvore inteira nem repetir ~30 buscas por caminho absoluto.
+
+from __future__ import annotations
+from typing import Iterator, List
+import xml.etree.ElementTree as ET
+
+NS_NFE = "{http://www.portalfiscal.inf.br/nfe}"
+
+# Muda quando a saída muda (invalida o cache de resultados)
+VERSAO_EXTRATOR = "xml_nfe/1"
+
+COLUNAS_NFE = [
+    "NFe", "Série", "Natureza da Operação", "Data de emissão", "Data de Saída/Entrada",
+    "Valor do Frete", "Chave", "CNPJ do Emitente", "Nome do Emitente", "Valor Total da Nota",
+    "Valor Total dos Produtos", "Descontos Aplicados", "Outras Despesas Acessórias",
+    "Nº Item na Nota", "Cód. Produto", "Descrição", "Unidade de Medida", "Quantidade",
+    "Valor Unitário", "Desconto", "Valor Total do Item", "ICMS(%)", "ICMS (valor)", "IPI(%)", "IPI (valor)",
+]
+
+def _caminho(texto: str) -> tuple:
+    return tuple(NS_NFE + parte for parte in texto.split("/"))
+
+# Caminhos relativos à raiz (nfeProc), pré-compilados em tuplas de tags {ns}local.
+_CAMPOS_CABECALHO = {
+    _caminho("NFe/infNFe/ide/nNF"): "nNF",
+    _caminho("NFe/infNFe/ide/serie"): "serie",
+    _caminho("NFe/infNFe/ide/natOp"): "natOp",
+    _caminho("NFe/infNFe/ide/dhSaiEnt"): "dhSaiEnt",
+    _caminho("NFe/infNFe/ide/dhEmi"): "dhEmi",
+    _caminho("NFe/infNFe/total/ICMSTot/vFrete"): "vFrete",
+    _caminho("NFe/infNFe/total/ICMSTot/vDesc"): "vDesc",
+    _caminho("NFe/infNFe/total/ICMSTot/vOutro"): "vOutro",
+    _caminho("NFe/infNFe/total/ICMSTot/vNF"): "vNF",
+    _caminho("NFe/infNFe/total/ICMSTot/vProd"): "vProd",
+    _caminho("protNFe/infProt/chNFe"): "chNFe",
+    _caminho("NFe/infNFe/emit/CNPJ"): "CNPJ",
+    _caminho("NFe/infNFe/emit/xNome"): "xNome",
+}
+
+_CAMINHO_DET = _caminho("NFe/infNFe/det")
+
+# Caminhos relativos ao <det>.
+_CAMPOS_ITEM = {
+    _caminho("prod/cProd"): "cProd",
+    _caminho("prod/xProd"): "xProd",
+    _caminho("prod/uCom"): "uCom",
+    _caminho("prod/qCom"): "qCom",
+    _caminho("prod/vUnCom"): "vUnCom",
+    _caminho("prod/vDesc"): "vDesc",
+    _caminho("prod/vProd"): "vProd",
+    _caminho("imposto/ICMS/ICMS00/pICMS"): "pICMS",
+    _caminho("imposto/ICMS/ICMS00/vICMS"): "vICMS",
+    _caminho("imposto/IPI/IPITrib/pIPI"): "pIPI",
+    _caminho("imposto/IPI/IPITrib/vIPI"): "vIPI",
+}
+
+_AUSENTE = object()  # elemento não encontrado (difere de elemento presente sem texto)
+
+def _data_br(valor) -> str:
+    # "2024-01-31T10:00:00-03:00" -> "31/01/2024"
+    if valor is _AUSENTE or not valor:
+        return ""
+    return f"{valor[8:10]}/{valor[5:7]}/{valor[0:4]}"
+
+def _ou_zero(valor) -> str:
+    return valor if valor is not _AUSENTE and valor else "0"
+
+def _ou_vazio(valor) -> str:
+    return valor if valor is not _AUSENTE and valor else ""
+
+def _obrigatorio(valores: dict, campo: str) -> str:
+    valor = valores.get(campo, _AUSENTE)
+    if valor is _AUSENTE:
+        raise ValueError(f"XML de NF-e sem o campo obrigatório '{campo}'")
+    return str(valor)
+
+def iterar_linhas_xml(source) -> Iterator[List[str]]:
+    """
+    Lê um XML de NF-e (caminho ou file-like) e gera uma linha por item (<det>),
+    na ordem de COLUNAS_NFE, todos os valores como str.
+    Os elementos são liberados à medida que são lidos; como a chave (protNFe)
+    vem depois dos itens, as linhas são emitidas ao final do documento.
+    """
+    cabecalho: dict = {}
+    itens: list[dict] = []
+    item: dict | None = None
+    pilha: list[str] = []
+    n_det = len(_CAMINHO_DET)
+
+    for evento, elem in ET.iterparse(source, events=("start", "end")):
+        if evento == "start":
+            pilha.append(elem.tag)
+            if item is None and len(pilha) == n_det + 1 and tuple(pilha[1:]) == _CAMINHO_DET:
+                item = {}
+            continue
+
+        caminho = tuple(pilha[1:])
+        pilha.pop()
+        if item is not None:
+            if len(caminho) == n_det:
+                # fim do <det>
+                itens.append(item)
+                item = None
+            else:
+                campo = _CAMPOS_ITEM.get(caminho[n_det:])
+                if campo and campo not in item:
+                    item[campo] = elem.text
+        else:
+            campo = _CAMPOS_CABECALHO.get(caminho)
+            if campo and campo not in cabecalho:
+                cabecalho[campo] = elem.text
+        # no "end" todos os descendentes já foram lidos: pode liberar
+        elem.clear()
+
+    if not itens:
+        return
+
+    fixos = [
+        _obrigatorio(cabecalho, "nNF"), _obrigatorio(cabecalho, "serie"), _obrigatorio(cabecalho, "natOp"),
+        _data_br(cabecalho.get("dhEmi", _AUSENTE)), _data_br(cabecalho.get("dhSaiEnt", _AUSENTE)),
+        _obrigatorio(cabecalho, "vFrete"), _obrigatorio(cabecalho, "chNFe"),
+        _obrigatorio(cabecalho, "CNPJ"), _obrigatorio(cabecalho, "xNome"),
+        _obrigatorio(cabecalho, "vNF"), _obrigatorio(cabecalho, "vProd"),
+        _obrigatorio(cabecalho, "vDesc"), _obrigatorio(cabecalho, "vOutro"),
+    ]
+    for item_num, it in enumerate(itens, start=1):
+        yield fixos + [
+            str(item_num),
+            _obrigatorio(it, "cProd"), _obrigatorio(it, "xProd"), _obrigatorio(it, "uCom"),
+            _obrigatorio(it, "qCom"), _obrigatorio(it, "vUnCom"),
+            _ou_vazio(it.get("vDesc", _AUSENTE)), _obrigatorio(it, "vProd"),
+            _ou_zero(it.get("pICMS", _AUSENTE)), _ou_zero(it.get("vICMS", _AUSENTE)),
+            _ou_zero(it.get("pIPI", _AUSENTE)), _ou_zero(it.get("vIPI", _AUSENTE)),
+        ]
+
+def extract_info_from_xml(file, result_list: list) -> None:
+    """Compatível com a função original dos apps: acrescenta as linhas em result_list."""
+    result_list.extend(iterar_linhas_xml(file))
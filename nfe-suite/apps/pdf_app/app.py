@@ -1,11 +1,8 @@
-import os
-import io
-import zipfile
 import tempfile
-import pandas as pd
 import streamlit as st
 
-from extractor import extrair_chaves_de_pdf
+# pandas e o extrator (pdf2image + libzbar) só são importados quando chega um .zip:
+# a primeira renderização não espera por eles
 
 st.set_page_config(page_title="Chaves de NF-e (PDF)", layout="wide")
 st.title("Extrair chaves de acesso de PDFs")
@@ -17,23 +14,43 @@ with st.expander("Configurações (opcional)"):
     poppler_path = st.text_input("poppler_path (somente Windows/local se precisar)", value="")
     poppler_path = poppler_path or None
     dpi = st.number_input("DPI para conversão de página (pdf2image)", min_value=100, max_value=600, value=300, step=50)
+    max_chaves = st.number_input("Parar após N chaves por PDF (0 = ler todas as páginas)", min_value=0, value=0, step=1)
+    uma_por_pagina = st.checkbox("Considerar só a primeira chave de cada página", value=False)
+
+def extrair_pdfs_do_zip(zip_file, destino: str) -> tuple[list[tuple[str, str]], list[tuple[str, str]]]:
+    """
+    Copia (em blocos, sem ler o membro inteiro em RAM) só os PDFs do ZIP para `destino`,
+    mantendo as pastas e descendo em ZIPs internos, com o leitor de lotes do combo_app
+    (processors.lote_zip): nomes repetidos viram "a~2.pdf", profundidade e entradas limitadas.
+    Retorna ([(nome relativo, caminho)], [(entrada ignorada, motivo)]).
+    """
+    from processors.lote_zip import LeitorZip
+
+    with LeitorZip(zip_file) as leitor:
+        pdfs = [(m.nome, str(leitor.copiar(m, destino))) for m in leitor.membros(extensoes=(".pdf",))]
+        return pdfs, leitor.ignorados
 
 zip_file = st.file_uploader("Selecione um arquivo .zip com PDFs", type=["zip"])
 
 if zip_file is not None:
+    import pandas as pd
+    from extractor import extrair_chaves_de_pdf
+
     with tempfile.TemporaryDirectory() as td:
-        zf = zipfile.ZipFile(io.BytesIO(zip_file.read()))
-        zf.extractall(td)
+        # pastas e ZIPs internos preservados: PDFs homônimos não se sobrescrevem
+        pdfs, ignorados = extrair_pdfs_do_zip(zip_file, td)
+        if ignorados:
+            st.warning(f"{len(ignorados)} entrada(s) do ZIP ficaram de fora: "
+                       + "; ".join(f"{nome} ({motivo})" for nome, motivo in ignorados[:20]))
 
         linhas = []
         resumo = []
 
-        for nome in sorted(os.listdir(td)):
-            if not nome.lower().endswith(".pdf"):
-                continue
-            caminho_pdf = os.path.join(td, nome)
+        for nome, caminho_pdf in sorted(pdfs, key=lambda x: x[0].lower()):
             try:
-                chaves, outras = extrair_chaves_de_pdf(caminho_pdf, dpi=dpi, poppler_path=poppler_path)
+                chaves, outras = extrair_chaves_de_pdf(caminho_pdf, dpi=dpi, poppler_path=poppler_path,
+                                                      max_chaves=max_chaves or None,
+                                                      uma_por_pagina=uma_por_pagina)
                 for c in chaves:
                     linhas.append({"arquivo": nome, "chave_44": c})
                 resumo.append({
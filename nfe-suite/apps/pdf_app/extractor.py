@@ -1,29 +1,50 @@
-import os
 from typing import List, Tuple, Set
 
-from pdf2image import convert_from_path
-from pyzbar.pyzbar import decode
+from pdf2image import convert_from_path, pdfinfo_from_path
 
-def extrair_chaves_de_pdf(caminho_pdf: str, dpi: int = 300, poppler_path: str | None = None) -> Tuple[List[str], List[str]]:
+# Decodificação: a cadeia de backends do combo_app (pyzbar/zxing-cpp com fallback, ordem pelo
+# benchmark); processors/ é uma cópia de combo_app/processors gerada por nfe-suite/vendorizar.py,
+# para o app subir só com esta pasta
+from processors.decodificadores import decodificador
+
+def _ler_codigos(img) -> List[str]:
+    return [l.texto for l in decodificador().decodificar(img)]
+
+def extrair_chaves_de_pdf(caminho_pdf: str, dpi: int = 300, poppler_path: str | None = None,
+                          janela: int = 1, max_chaves: int | None = None,
+                          uma_por_pagina: bool = False, thread_count: int = 1) -> Tuple[List[str], List[str]]:
     """
     Lê todas as páginas de um PDF, decodifica códigos de barras/QR e retorna:
       - lista de chaves de 44 dígitos (sem duplicatas, ordenadas)
       - outras leituras (que não têm 44 dígitos), para conferência
+    As páginas são rasterizadas em janelas de `janela` páginas (não o PDF inteiro em RAM).
+    Opcional: `max_chaves` para de ler ao atingir N chaves; `uma_por_pagina` fica só
+    com a primeira chave de cada página.
+    O Poppler já entrega a página em tons de cinza (o zbar só usa luminância), sem a
+    conversão para RGB; `thread_count` divide a janela entre vários pdftoppm.
     """
-    imagens = convert_from_path(caminho_pdf, dpi=dpi, poppler_path=poppler_path)
+    total = int(pdfinfo_from_path(caminho_pdf, poppler_path=poppler_path)["Pages"])
+    janela = max(1, janela)
 
     chaves: Set[str] = set()
     outras: Set[str] = set()
 
-    for img in imagens:
-        if img.mode != "RGB":
-            img = img.convert("RGB")
-        for code in decode(img):
-            texto = (code.data or b"").decode("utf-8", errors="ignore").strip()
-            if texto.isdigit() and len(texto) == 44:
-                chaves.add(texto)
-            elif texto:
-                outras.add(texto)
+    for primeira in range(1, total + 1, janela):
+        imagens = convert_from_path(caminho_pdf, dpi=dpi, poppler_path=poppler_path, grayscale=True,
+                                    thread_count=thread_count,
+                                    first_page=primeira, last_page=min(total, primeira + janela - 1))
+        for img in imagens:
+            achou = False
+            for texto in _ler_codigos(img):
+                texto = texto.strip()
+                if texto.isdigit() and len(texto) == 44:
+                    if uma_por_pagina and achou:
+                        continue
+                    achou = True
+                    chaves.add(texto)
+                elif texto:
+                    outras.add(texto)
+            if max_chaves and len(chaves) >= max_chaves:
+                return sorted(chaves), sorted(outras)
 
     return sorted(chaves), sorted(outras)
-
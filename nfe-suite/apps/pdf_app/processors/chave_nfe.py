@@ -0,0 +1,47 @@
+# nfe-suite/apps/combo_app/processors/chave_nfe.py
+# Validação da chave de acesso (44 dígitos) da NF-e e busca de chaves em texto livre.
+# Layout: cUF(2) AAMM(4) CNPJ(14) mod(2) serie(3) nNF(9) tpEmis(1) cNF(8) cDV(1).
+
+from __future__ import annotations
+import re
+from typing import List
+
+# Códigos IBGE das UFs
+_UFS = {
+    "11", "12", "13", "14", "15", "16", "17", "21", "22", "23", "24", "25", "26", "27",
+    "28", "29", "31", "32", "33", "35", "41", "42", "43", "50", "51", "52", "53",
+}
+
+# Sequências de dígitos possivelmente separadas por espaço/ponto (DANFE imprime em grupos de 4)
+_CANDIDATO = re.compile(r"\d(?:[ .\u00a0]?\d){43,}")
+_ONLY_DIGITS = re.compile(r"\D+")
+
+def digito_verificador(chave43: str) -> int:
+    """Módulo 11 com pesos 2..9 aplicados da direita para a esquerda."""
+    soma = 0
+    peso = 2
+    for d in reversed(chave43):
+        soma += int(d) * peso
+        peso = 2 if peso == 9 else peso + 1
+    resto = soma % 11
+    return 0 if resto < 2 else 11 - resto
+
+def chave_valida(chave: str) -> bool:
+    """44 dígitos com dígito verificador (mod-11) correto."""
+    return len(chave) == 44 and chave.isdigit() and digito_verificador(chave[:43]) == int(chave[43])
+
+def chave_plausivel(chave: str) -> bool:
+    """chave_valida + UF e mês coerentes (evita falsos positivos ao varrer texto)."""
+    return chave_valida(chave) and chave[:2] in _UFS and 1 <= int(chave[4:6]) <= 12
+
+def chaves_no_texto(texto: str) -> List[str]:
+    """Chaves plausíveis encontradas em um texto (ordem de aparição, sem repetição)."""
+    achadas: list[str] = []
+    for m in _CANDIDATO.finditer(texto or ""):
+        dig = _ONLY_DIGITS.sub("", m.group())
+        # sequência maior que 44 (números colados): testa todas as janelas
+        for i in range(len(dig) - 43):
+            c = dig[i:i + 44]
+            if chave_plausivel(c) and c not in achadas:
+                achadas.append(c)
+    return achadas
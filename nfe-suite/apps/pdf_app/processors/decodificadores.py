@@ -0,0 +1,292 @@
+# nfe-suite/apps/combo_app/processors/decodificadores.py
+# Backends de leitura de código de barras, trocáveis: pyzbar (libzbar) e zxing-cpp, ambos
+# restritos às simbologias do DANFE/NFC-e (Code128 da chave e QR Code), em vez de varrer
+# a página procurando todas. CadeiaDecodificadores tenta um backend por vez e passa ao
+# seguinte quando o anterior falha ou não acha chave válida.
+# Ordem da cadeia: NFE_DECODIFICADORES="zxing,pyzbar" (explícita); senão a do ranking
+# gravado pelo modo benchmark (menor ms/página ÷ taxa de leitura primeiro); senão pyzbar,
+# zxing. Backends sem a biblioteca instalada ficam de fora.
+# Benchmark (na pasta combo_app): roda todos os backends sobre um corpus de PDFs/imagens:
+#   python -m processors.decodificadores corpus/ --dpi 300
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Sequence
+
+import numpy as np
+from PIL import Image
+
+from processors.cache import PASTA_PADRAO
+from processors.chave_nfe import chave_valida
+from processors.raster import MODO_CINZA, Pagina
+
+PYZBAR = "pyzbar"
+ZXING = "zxing"
+ORDEM_PADRAO = (PYZBAR, ZXING)
+
+ARQUIVO_RANKING = Path(os.environ.get("NFE_DECODIFICADORES_RANKING") or PASTA_PADRAO / "decodificadores.json")
+
+_NAO_DIGITOS = re.compile(r"\D+")
+_IMAGENS = (".png", ".jpg", ".jpeg", ".pgm", ".pbm", ".tif", ".tiff", ".bmp")
+
+class Leitura(NamedTuple):
+    texto: str
+    caixa: tuple | None   # (x, y, largura, altura) em pixels da imagem lida
+    backend: str
+
+def tem_chave_valida(leituras: Iterable[Leitura]) -> bool:
+    return any(chave_valida(_NAO_DIGITOS.sub("", l.texto)) for l in leituras)
+
+def _cinza(img) -> np.ndarray:
+    """Página como array 2D uint8 (sem cópia para Pagina)."""
+    if isinstance(img, Pagina):
+        return img.como_array()
+    if isinstance(img, Image.Image):
+        return np.asarray(img.convert("L"))
+    img = np.asarray(img)
+    return img if img.ndim == 2 else np.asarray(Image.fromarray(img).convert("L"))
+
+class Decodificador(ABC):
+    """Interface: `nome`, disponivel() e decodificar(imagem) -> [Leitura]."""
+
+    nome = ""
+
+    def disponivel(self) -> bool:
+        return True
+
+    @abstractmethod
+    def decodificar(self, img) -> List[Leitura]:
+        ...
+
+class DecodificadorPyzbar(Decodificador):
+    """libzbar via pyzbar; Pagina (Y800 do pdftoppm) vai direto, sem PIL."""
+
+    nome = PYZBAR
+
+    def __init__(self):
+        self._decode = self._simbolos = None
+
+    def _carregar(self) -> None:
+        if self._decode is None:
+            from pyzbar.pyzbar import ZBarSymbol, decode
+            self._decode, self._simbolos = decode, [ZBarSymbol.CODE128, ZBarSymbol.QRCODE]
+
+    def disponivel(self) -> bool:
+        try:
+            self._carregar()
+            return True
+        except Exception:  # ImportError, ou a libzbar ausente (ImportError/OSError)
+            return False
+
+    def decodificar(self, img) -> List[Leitura]:
+        self._carregar()
+        if isinstance(img, Pagina):
+            dados = (img.pixels, img.largura, img.altura)
+        elif isinstance(img, Image.Image):
+            dados = img.convert("L")
+        else:
+            dados = Image.fromarray(_cinza(img))
+        return [Leitura(d.data.decode(errors="ignore"), (d.rect.left, d.rect.top, d.rect.width, d.rect.height),
+                        self.nome) for d in self._decode(dados, symbols=self._simbolos) if d.data]
+
+class DecodificadorZxing(Decodificador):
+    """zxing-cpp (pip install zxing-cpp); lê o array em tons de cinza sem cópia."""
+
+    nome = ZXING
+
+    def __init__(self):
+        self._zx = self._formatos = None
+
+    def _carregar(self) -> None:
+        if self._zx is None:
+            import zxingcpp
+            self._zx = zxingcpp
+            self._formatos = zxingcpp.BarcodeFormat.Code128 | zxingcpp.BarcodeFormat.QRCode
+
+    def disponivel(self) -> bool:
+        try:
+            self._carregar()
+            return True
+        except ImportError:
+            return False
+
+    def decodificar(self, img) -> List[Leitura]:
+        self._carregar()
+        leituras = []
+        for b in self._zx.read_barcodes(_cinza(img), formats=self._formatos):
+            if not b.text:
+                continue
+            p = b.position
+            xs = [p.top_left.x, p.top_right.x, p.bottom_left.x, p.bottom_right.x]
+            ys = [p.top_left.y, p.top_right.y, p.bottom_left.y, p.bottom_right.y]
+            leituras.append(Leitura(b.text, (min(xs), min(ys), max(xs) - min(xs) + 1, max(ys) - min(ys) + 1),
+                                    self.nome))
+        return leituras
+
+BACKENDS = {PYZBAR: DecodificadorPyzbar, ZXING: DecodificadorZxing}
+
+class CadeiaDecodificadores(Decodificador):
+    """
+    Tenta os backends em ordem: devolve as leituras do primeiro que achar chave válida.
+    Um backend que levanta erro ou não acha chave passa a vez ao seguinte; sem chave em
+    nenhum, devolve as leituras do primeiro que leu alguma coisa. `falhas` conta os erros.
+    """
+
+    def __init__(self, backends: Sequence[Decodificador]):
+        if not backends:
+            raise RuntimeError("nenhum decodificador de código de barras disponível "
+                               "(instale pyzbar + libzbar0 ou zxing-cpp)")
+        self.backends = list(backends)
+        self.nome = "+".join(b.nome for b in self.backends)
+        self.falhas: Dict[str, int] = {b.nome: 0 for b in self.backends}
+
+    def decodificar(self, img) -> List[Leitura]:
+        primeiras: List[Leitura] = []
+        erros = []
+        for b in self.backends:
+            try:
+                leituras = b.decodificar(img)
+            except Exception as e:
+                self.falhas[b.nome] += 1
+                erros.append(e)
+                continue
+            if tem_chave_valida(leituras):
+                return leituras
+            primeiras = primeiras or leituras
+        if len(erros) == len(self.backends):
+            raise erros[-1]  # todos falharam: é erro da página, não "sem chave"
+        return primeiras
+
+def ordem_por_ranking(ranking: dict) -> List[str]:
+    """
+    Ordem da cadeia pelo resultado do benchmark: custo esperado menor primeiro
+    (ms/página ÷ taxa de leitura; quem quase nunca lê vai para o fim).
+    """
+    backends = ranking.get("backends", {})
+    return sorted(backends, key=lambda n: backends[n]["ms_pagina"] / max(backends[n]["taxa"], 1e-3))
+
+def _ler_ranking(caminho: Path) -> List[str] | None:
+    try:
+        return ordem_por_ranking(json.loads(caminho.read_text(encoding="utf-8"))) or None
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+def ordem_configurada() -> List[str]:
+    """Nomes dos backends na ordem configurada (disponíveis ou não)."""
+    explicita = os.environ.get("NFE_DECODIFICADORES", "").strip()
+    if explicita and explicita != "auto":
+        return [n.strip() for n in explicita.split(",") if n.strip()]
+    ordem = [n for n in _ler_ranking(ARQUIVO_RANKING) or ORDEM_PADRAO if n in BACKENDS]
+    return ordem + [n for n in ORDEM_PADRAO if n not in ordem]
+
+def disponiveis(nomes: Iterable[str] = ORDEM_PADRAO) -> List[Decodificador]:
+    backends = []
+    for nome in nomes:
+        if nome not in BACKENDS:
+            raise ValueError(f"decodificador desconhecido: {nome} (use {', '.join(BACKENDS)})")
+        b = BACKENDS[nome]()
+        if b.disponivel():
+            backends.append(b)
+    return backends
+
+@lru_cache(maxsize=None)
+def decodificador() -> CadeiaDecodificadores:
+    """Cadeia do processo (uma por worker), montada na primeira leitura."""
+    return CadeiaDecodificadores(disponiveis(ordem_configurada()))
+
+def nome_cadeia() -> str:
+    """Identifica a cadeia configurada (entra na chave do cache de resultados)."""
+    try:
+        return decodificador().nome
+    except RuntimeError:
+        return "nenhum"
+
+# ---- modo benchmark ----
+def _paginas_corpus(arquivos: Sequence[Path], dpi: int) -> Iterator[tuple]:
+    from processors.raster import renderizar
+    from processors.extractor_pyzbar import contar_paginas
+    for arq in arquivos:
+        if arq.suffix.lower() == ".pdf":
+            for n in range(1, contar_paginas(str(arq)) + 1):
+                yield f"{arq.name}:{n}", renderizar(str(arq), n, n, dpi=dpi, modo=MODO_CINZA)[0].como_array()
+        else:
+            yield arq.name, _cinza(Image.open(arq))
+
+def benchmark(corpus: Sequence[Path], backends: Sequence[Decodificador], dpi: int = 300,
+              repeticoes: int = 1) -> dict:
+    """
+    Roda cada backend sobre cada página do corpus (rasterizada uma vez, fora do cronômetro).
+    Por backend: páginas, páginas com chave válida, taxa, ms/página (melhor de `repeticoes`)
+    e erros; `ordem` é a cadeia recomendada.
+    """
+    stats = {b.nome: {"paginas": 0, "com_chave": 0, "erros": 0, "segundos": 0.0} for b in backends}
+    for _, pagina in _paginas_corpus(corpus, dpi):
+        for b in backends:
+            s = stats[b.nome]
+            melhor, leituras = float("inf"), []
+            for _ in range(max(1, repeticoes)):
+                t0 = time.perf_counter()
+                try:
+                    leituras = b.decodificar(pagina)
+                except Exception:
+                    s["erros"] += 1
+                    leituras = []
+                melhor = min(melhor, time.perf_counter() - t0)
+            s["paginas"] += 1
+            s["segundos"] += melhor
+            s["com_chave"] += tem_chave_valida(leituras)
+    resultado = {"backends": {}, "dpi": dpi, "arquivos": len(corpus)}
+    for nome, s in stats.items():
+        n = max(1, s["paginas"])
+        resultado["backends"][nome] = {"paginas": s["paginas"], "com_chave": s["com_chave"],
+                                       "taxa": round(s["com_chave"] / n, 4), "erros": s["erros"],
+                                       "ms_pagina": round(1e3 * s["segundos"] / n, 2)}
+    resultado["ordem"] = ordem_por_ranking(resultado)
+    return resultado
+
+def _arquivos_corpus(entradas: Sequence[str]) -> List[Path]:
+    arquivos: List[Path] = []
+    for e in map(Path, entradas):
+        candidatos = sorted(e.rglob("*")) if e.is_dir() else [e]
+        arquivos += [p for p in candidatos if p.is_file() and p.suffix.lower() in (".pdf",) + _IMAGENS]
+    return arquivos
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m processors.decodificadores",
+                                 description="Compara os decodificadores de código de barras num corpus.")
+    ap.add_argument("corpus", nargs="+", help="pastas (recursivo) ou arquivos .pdf / imagens")
+    ap.add_argument("--dpi", type=int, default=300, help="DPI da rasterização dos PDFs")
+    ap.add_argument("--repeticoes", type=int, default=1, help="usa o melhor tempo de N leituras por página")
+    ap.add_argument("--backends", default=",".join(BACKENDS), help="lista separada por vírgula")
+    ap.add_argument("--saida", default=str(ARQUIVO_RANKING),
+                    help="grava o ranking (usado para ordenar a cadeia; padrão: NFE_DECODIFICADORES_RANKING)")
+    ap.add_argument("--nao-gravar", action="store_true", help="só imprime o resultado")
+    args = ap.parse_args(argv)
+
+    arquivos = _arquivos_corpus(args.corpus)
+    backends = disponiveis([n.strip() for n in args.backends.split(",") if n.strip()])
+    if not arquivos or not backends:
+        print("corpus vazio" if not arquivos else "nenhum backend disponível", file=sys.stderr)
+        return 2
+    resultado = benchmark(arquivos, backends, dpi=args.dpi, repeticoes=args.repeticoes)
+    for nome, r in resultado["backends"].items():
+        print(f"{nome:8s} {r['com_chave']:5d}/{r['paginas']:<5d} páginas com chave ({100 * r['taxa']:5.1f}%)  "
+              f"{r['ms_pagina']:8.2f} ms/página  {r['erros']} erro(s)")
+    print("Ordem recomendada: " + ", ".join(resultado["ordem"]))
+    if not args.nao_gravar:
+        destino = Path(args.saida)
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        destino.write_text(json.dumps(resultado, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"Ranking gravado em {destino}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
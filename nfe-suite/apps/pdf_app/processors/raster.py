@@ -0,0 +1,148 @@
+# nfe-suite/apps/combo_app/processors/raster.py
+# Rasterização direta com pdftoppm (Poppler) em tons de cinza (-gray, PGM) ou 1 bit (-mono, PBM).
+# Os bytes da página vão direto para o zbar como (pixels, largura, altura), sem PIL
+# e sem converter RGB -> L. Páginas podem ser divididas entre vários pdftoppm
+# (thread_count) e escritas numa pasta (ex.: /dev/shm) em vez de passar pelo pipe.
+
+from __future__ import annotations
+import os
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import List, NamedTuple
+
+import numpy as np
+
+MODO_CINZA = "gray"
+MODO_MONO = "mono"
+
+class Pagina(NamedTuple):
+    largura: int
+    altura: int
+    pixels: bytes  # 8 bits por pixel (Y800), 0 = preto
+
+    def como_array(self) -> np.ndarray:
+        return np.frombuffer(self.pixels, dtype=np.uint8).reshape(self.altura, self.largura)
+
+def _token(buf: bytes, pos: int) -> tuple[bytes, int]:
+    # pula espaços e comentários do cabeçalho PNM; no fim do buffer, devolve b""
+    while True:
+        while buf[pos:pos + 1].isspace():
+            pos += 1
+        if buf[pos:pos + 1] == b"#":
+            fim_linha = buf.find(b"\n", pos)
+            pos = len(buf) if fim_linha < 0 else fim_linha + 1
+            continue
+        break
+    fim = pos
+    while fim < len(buf) and not buf[fim:fim + 1].isspace():
+        fim += 1
+    return buf[pos:fim], fim
+
+def _numero(buf: bytes, pos: int) -> tuple[int, int]:
+    token, pos = _token(buf, pos)
+    if not token.isdigit():
+        raise ValueError(f"cabeçalho PNM incompleto ou inválido: {token!r}")
+    return int(token), pos
+
+def ler_pnm(buf: bytes) -> List[Pagina]:
+    """Lê um ou mais PGM (P5, 8 bits) / PBM (P4) concatenados, como o pdftoppm escreve no stdout."""
+    paginas = []
+    pos = 0
+    while pos < len(buf):
+        magico, pos = _token(buf, pos)
+        if not magico:
+            break
+        w, pos = _numero(buf, pos)
+        h, pos = _numero(buf, pos)
+        if magico == b"P5":
+            maxval, pos = _numero(buf, pos)
+            if maxval > 255:
+                raise ValueError("PGM de 16 bits não suportado")
+            pos += 1  # um único espaço separa o cabeçalho dos dados
+            n = w * h
+            if pos + n > len(buf):
+                raise ValueError(f"PGM truncado: {len(buf) - pos} de {n} bytes")
+            paginas.append(Pagina(w, h, buf[pos:pos + n]))
+            pos += n
+        elif magico == b"P4":
+            pos += 1
+            linha = (w + 7) // 8
+            n = linha * h
+            if pos + n > len(buf):
+                raise ValueError(f"PBM truncado: {len(buf) - pos} de {n} bytes")
+            bits = np.unpackbits(np.frombuffer(buf, dtype=np.uint8, count=n, offset=pos).reshape(h, linha), axis=1)
+            # PBM: 1 = preto; zbar quer Y800 com 0 = preto
+            paginas.append(Pagina(w, h, ((1 - bits[:, :w]) * 255).astype(np.uint8).tobytes()))
+            pos += n
+        else:
+            raise ValueError(f"formato PNM inesperado: {magico!r}")
+    return paginas
+
+def _comando(pdf_path: str, primeira: int, ultima: int, dpi: int, modo: str,
+             caixa: tuple | None = None) -> list[str]:
+    cmd = ["pdftoppm", "-mono" if modo == MODO_MONO else "-gray", "-r", str(dpi),
+           "-f", str(primeira), "-l", str(ultima)]
+    if caixa is not None:
+        x, y, w, h = caixa
+        cmd += ["-x", str(x), "-y", str(y), "-W", str(w), "-H", str(h)]
+    return cmd + [pdf_path]
+
+def renderizar(pdf_path: str, primeira: int, ultima: int, dpi: int = 300, modo: str = MODO_CINZA,
+               thread_count: int = 1, pasta_saida: str | None = None,
+               caixa: tuple | None = None) -> List[Pagina]:
+    """
+    Rasteriza as páginas [primeira, ultima] (1-based) direto em 8 bits por pixel.
+    - thread_count: divide a faixa entre até N processos pdftoppm simultâneos.
+    - pasta_saida: pdftoppm grava os arquivos lá (ex.: /dev/shm) em vez de usar o pipe.
+    - caixa: (x, y, w, h) em pixels do `dpi`, para rasterizar só um recorte.
+    """
+    total = ultima - primeira + 1
+    n = max(1, min(thread_count, total))
+    passo = -(-total // n)
+    faixas = [(a, min(ultima, a + passo - 1)) for a in range(primeira, ultima + 1, passo)]
+
+    procs: List[subprocess.Popen] = []
+    if pasta_saida is None:
+        try:
+            for a, b in faixas:
+                procs.append(subprocess.Popen(_comando(pdf_path, a, b, dpi, modo, caixa),
+                                              stdout=subprocess.PIPE, stderr=subprocess.PIPE))
+            paginas: List[Pagina] = []
+            for proc in procs:
+                out, err = proc.communicate()
+                if proc.returncode != 0:
+                    raise RuntimeError(f"pdftoppm falhou: {err.decode(errors='ignore').strip()}")
+                paginas.extend(ler_pnm(out))
+            return paginas
+        finally:
+            _encerrar(procs)
+
+    with tempfile.TemporaryDirectory(dir=pasta_saida) as td:
+        try:
+            for i, (a, b) in enumerate(faixas):
+                cmd = _comando(pdf_path, a, b, dpi, modo, caixa) + [os.path.join(td, f"p{i:03d}")]
+                procs.append(subprocess.Popen(cmd, stderr=subprocess.PIPE))
+            for proc in procs:
+                _, err = proc.communicate()
+                if proc.returncode != 0:
+                    raise RuntimeError(f"pdftoppm falhou: {err.decode(errors='ignore').strip()}")
+        finally:
+            # antes de apagar a pasta: nenhum pdftoppm pode continuar gravando nela
+            _encerrar(procs)
+        paginas = []
+        for arq in sorted(Path(td).iterdir()):  # p000-01.pgm, p000-02.pgm, p001-03.pgm ...
+            paginas.extend(ler_pnm(arq.read_bytes()))
+            arq.unlink()
+        return paginas
+
+def _encerrar(procs: List[subprocess.Popen]) -> None:
+    """Mata e espera os pdftoppm que ainda rodam (outro falhou); os que já terminaram só fecham os pipes."""
+    for proc in procs:
+        if proc.returncode is None:
+            proc.kill()
+    for proc in procs:
+        for f in (proc.stdout, proc.stderr):
+            if f is not None:
+                f.close()
+        proc.wait()
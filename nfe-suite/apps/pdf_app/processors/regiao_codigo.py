@@ -0,0 +1,52 @@
+# nfe-suite/apps/combo_app/processors/regiao_codigo.py
+# Localiza a região do código de barras (Code128 do DANFE) numa página em baixa resolução.
+# Heurística: linhas do código têm muitas transições claro/escuro e são praticamente
+# iguais à linha de baixo (barras verticais); linhas de texto não.
+
+from __future__ import annotations
+from typing import Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+Caixa = Tuple[int, int, int, int]  # (x, y, largura, altura) em pixels da imagem analisada
+
+def localizar_codigo_barras(img: Image.Image | np.ndarray, min_transicoes: int = 40,
+                            min_semelhanca: float = 0.9, min_altura: int = 12,
+                            margem: int = 10) -> Optional[Caixa]:
+    """Retorna a caixa do maior bloco com cara de código de barras, ou None (img: PIL ou array 8 bits)."""
+    a = (np.asarray(img.convert("L")) if isinstance(img, Image.Image) else img) < 128
+    if a.shape[0] < 2 or a.shape[1] < 2:
+        return None
+
+    transicoes = np.count_nonzero(a[:, 1:] != a[:, :-1], axis=1)
+    semelhanca = np.empty(a.shape[0])
+    semelhanca[:-1] = np.count_nonzero(a[1:] == a[:-1], axis=1) / a.shape[1]
+    semelhanca[-1] = semelhanca[-2]
+    candidata = (transicoes >= min_transicoes) & (semelhanca >= min_semelhanca)
+
+    # maior sequência contínua de linhas candidatas
+    melhor, inicio = (0, 0), None
+    for y, ok in enumerate(np.append(candidata, False)):
+        if ok and inicio is None:
+            inicio = y
+        elif not ok and inicio is not None:
+            if y - inicio > melhor[1] - melhor[0]:
+                melhor = (inicio, y)
+            inicio = None
+    y0, y1 = melhor
+    if y1 - y0 < min_altura:
+        return None
+
+    colunas = np.flatnonzero(a[y0:y1].any(axis=0))
+    if colunas.size == 0:
+        return None
+    x0, x1 = int(colunas[0]), int(colunas[-1]) + 1
+    h, w = a.shape
+    x0, y0 = max(0, x0 - margem), max(0, y0 - margem)
+    x1, y1 = min(w, x1 + margem), min(h, y1 + margem)
+    return x0, y0, x1 - x0, y1 - y0
+
+def escalar_caixa(caixa: Caixa, fator: float) -> Caixa:
+    x, y, w, h = caixa
+    return int(x * fator), int(y * fator), int(round(w * fator)), int(round(h * fator))
@@ -0,0 +1,67 @@
+# nfe-suite/apps/combo_app/processors/esquema.py
+# Esquema tipado das 25 colunas da NF-e. O extrator (xml_nfe) continua gerando str;
+# a conversão acontece UMA vez, vetorizada por coluna, ao montar o DataFrame:
+# dinheiro/quantidade/percentual em float64, datas em datetime64, nº do item em int32
+# e colunas repetidas por nota (CNPJ, emitente, natureza...) como category.
+
+from __future__ import annotations
+from typing import Iterable, Sequence
+
+import pandas as pd
+
+from processors.xml_nfe import COLUNAS_NFE
+
+TIPO_TEXTO = "texto"
+TIPO_CATEGORIA = "categoria"
+TIPO_DECIMAL = "decimal"
+TIPO_DATA = "data"
+TIPO_INTEIRO = "inteiro"
+
+ESQUEMA_NFE = {
+    "NFe": TIPO_TEXTO,
+    "Série": TIPO_CATEGORIA,
+    "Natureza da Operação": TIPO_CATEGORIA,
+    "Data de emissão": TIPO_DATA,
+    "Data de Saída/Entrada": TIPO_DATA,
+    "Valor do Frete": TIPO_DECIMAL,
+    "Chave": TIPO_TEXTO,
+    "CNPJ do Emitente": TIPO_CATEGORIA,
+    "Nome do Emitente": TIPO_CATEGORIA,
+    "Valor Total da Nota": TIPO_DECIMAL,
+    "Valor Total dos Produtos": TIPO_DECIMAL,
+    "Descontos Aplicados": TIPO_DECIMAL,
+    "Outras Despesas Acessórias": TIPO_DECIMAL,
+    "Nº Item na Nota": TIPO_INTEIRO,
+    "Cód. Produto": TIPO_TEXTO,
+    "Descrição": TIPO_TEXTO,
+    "Unidade de Medida": TIPO_CATEGORIA,
+    "Quantidade": TIPO_DECIMAL,
+    "Valor Unitário": TIPO_DECIMAL,
+    "Desconto": TIPO_DECIMAL,
+    "Valor Total do Item": TIPO_DECIMAL,
+    "ICMS(%)": TIPO_DECIMAL,  # em pontos percentuais (18.0 = 18%), como no XML
+    "ICMS (valor)": TIPO_DECIMAL,
+    "IPI(%)": TIPO_DECIMAL,
+    "IPI (valor)": TIPO_DECIMAL,
+}
+
+def _converter(serie: pd.Series, tipo: str) -> pd.Series:
+    if tipo == TIPO_DECIMAL:
+        # vazio ("" de vDesc ausente) vira NaN
+        return pd.to_numeric(serie, errors="coerce").astype("float64")
+    if tipo == TIPO_DATA:
+        return pd.to_datetime(serie, format="%d/%m/%Y", errors="coerce")
+    if tipo == TIPO_INTEIRO:
+        return pd.to_numeric(serie, errors="coerce").fillna(0).astype("int32")
+    if tipo == TIPO_CATEGORIA:
+        return serie.astype("category")
+    return serie
+
+def tipar_dataframe(df: pd.DataFrame, esquema: dict | None = None) -> pd.DataFrame:
+    """Converte (vetorizado, coluna a coluna) as colunas de `df` presentes no esquema."""
+    esquema = ESQUEMA_NFE if esquema is None else esquema
+    return df.assign(**{c: _converter(df[c], t) for c, t in esquema.items() if c in df.columns})
+
+def dataframe_nfe(linhas: Iterable[Sequence[str]], colunas: list[str] = COLUNAS_NFE) -> pd.DataFrame:
+    """Linhas de str do extrator -> DataFrame tipado conforme ESQUEMA_NFE."""
+    return tipar_dataframe(pd.DataFrame(columns=colunas, data=list(linhas)))
@@ -0,0 +1,206 @@
+# nfe-suite/apps/combo_app/processors/excel.py
+# Excel das NF-e em UMA passada: xlsxwriter em modo constant_memory (linha a linha,
+# memória constante), cada célula já sai com o tipo e o number_format finais.
+# Substitui o ciclo to_excel -> load_workbook -> formatar célula a célula -> salvar de novo.
+# Compartilhado por combo_app e xml_app. Aceita tanto as linhas de str do extrator
+# quanto o DataFrame tipado (processors.esquema): números e datas já prontos vão direto.
+# EscritorExcel recebe as linhas em blocos (várias abas), para lotes que não cabem na RAM.
+# Uma aba que passaria do limite do Excel (1.048.576 linhas) continua em "Aba (2)", "Aba (3)"...,
+# cada parte com o cabeçalho.
+
+from __future__ import annotations
+from datetime import date, datetime
+from io import BytesIO
+from numbers import Real
+from pathlib import Path
+from typing import Callable, Iterable, List, Sequence
+
+import xlsxwriter
+
+MOEDA = "R$ #,##0.00"
+PERCENTUAL = "0.00%"
+DATA = "DD/MM/YYYY"
+TEXTO = "@"
+
+LINHAS_EXCEL = 1_048_576   # limite de linhas por aba, contando o cabeçalho
+
+FORMATOS_COLUNAS = {
+    "Valor do Frete": MOEDA,
+    "Valor Total da Nota": MOEDA,
+    "Valor Total dos Produtos": MOEDA,
+    "Descontos Aplicados": MOEDA,
+    "Outras Despesas Acessórias": MOEDA,
+    "Valor Unitário": MOEDA,
+    "Desconto": MOEDA,
+    "Valor Total do Item": MOEDA,
+    "ICMS (valor)": MOEDA,
+    "IPI (valor)": MOEDA,
+    "Data de emissão": DATA,
+    "Data de Saída/Entrada": DATA,
+    "ICMS(%)": PERCENTUAL,
+    "IPI(%)": PERCENTUAL,
+    "Quantidade": "0.00",
+    "NFe": TEXTO,
+    "Série": TEXTO,
+    "Chave": TEXTO,
+    "CNPJ do Emitente": TEXTO,
+    "Cód. Produto": TEXTO,
+}
+
+# Mesmo estilo de cabeçalho que o pandas.to_excel aplica
+_ESTILO_CABECALHO = {"bold": True, "border": 1, "align": "center", "valign": "top"}
+
+def mascarar_cnpj(valor: str) -> str:
+    cnpj = "".join(filter(str.isdigit, valor))
+    if len(cnpj) == 14:
+        return f"{cnpj[:2]}.{cnpj[2:5]}.{cnpj[5:8]}/{cnpj[8:12]}-{cnpj[12:]}"
+    return valor
+
+def _vazio(v) -> bool:
+    # None, NaN e NaT (NaN != NaN)
+    return v is None or (not isinstance(v, str) and v != v)
+
+def _numero(v) -> bool:
+    return isinstance(v, Real) and not isinstance(v, bool)
+
+def _limpo(v) -> str:
+    return str(v or "").replace("R$", "").replace("%", "").replace(",", ".").strip()
+
+def _conversor(nome: str, formato: str | None) -> Callable:
+    """
+    Devolve f(valor) -> (valor_final, number_format | None), com as mesmas regras do
+    antigo format_excel: vazio fica vazio; o que não converte fica como veio, sem formato.
+    """
+    if formato is None:
+        return lambda v: (v, None)
+    if formato == TEXTO:
+        if nome == "CNPJ do Emitente":
+            return lambda v: (mascarar_cnpj(str(v).strip()), TEXTO) if not _vazio(v) and _limpo(v) else (v, None)
+        return lambda v: (str(v).strip(), TEXTO) if not _vazio(v) and _limpo(v) else (v, None)
+    divisor = 100 if formato.endswith("%") else 1
+
+    def numero(v):
+        if _vazio(v):
+            return None, None
+        if _numero(v):  # já tipado (float64/int do DataFrame)
+            return float(v) / divisor, formato
+        if isinstance(v, (date, datetime)):
+            return v, formato
+        val = _limpo(v)
+        if val == "":
+            return v, None
+        try:
+            return float(val) / divisor, formato
+        except ValueError:  # ex.: datas "DD/MM/AAAA" continuam texto, como antes
+            return v, None
+    return numero
+
+class PlanilhaExcel:
+    """
+    Uma aba do EscritorExcel; recebe linhas em quantos blocos forem precisos, em ordem.
+    Passando de `max_linhas` linhas de dados, abre a parte seguinte; `abas` lista os nomes.
+    """
+
+    def __init__(self, wb, estilos: dict, titulo: str, colunas: List[str], formatos: dict,
+                 max_linhas: int = LINHAS_EXCEL - 1):
+        self._wb = wb
+        self._estilos = estilos
+        self._titulo = titulo or "Planilha"
+        self._colunas = colunas
+        self._max_linhas = max(1, max_linhas)
+        self._conversores = [_conversor(str(nome).strip(), formatos.get(str(nome).strip())) for nome in colunas]
+        self.abas: List[str] = []
+        self.linhas = 0
+        self._nova_aba()
+
+    def _nova_aba(self) -> None:
+        sufixo = f" ({len(self.abas) + 1})" if self.abas else ""
+        nome = self._titulo[:31 - len(sufixo)] + sufixo
+        self._ws = self._wb.add_worksheet(nome)
+        cab = self._estilo_cabecalho()
+        for c, col in enumerate(self._colunas):
+            self._ws.write_string(0, c, str(col), cab)
+        self.abas.append(nome)
+        self._linhas_aba = 0
+
+    def _estilo_cabecalho(self):
+        if "cabecalho" not in self._estilos:
+            self._estilos["cabecalho"] = self._wb.add_format(_ESTILO_CABECALHO)
+        return self._estilos["cabecalho"]
+
+    def _estilo(self, fmt: str):
+        estilo = self._estilos.get(fmt)
+        if estilo is None:
+            estilo = self._estilos[fmt] = self._wb.add_format({"num_format": fmt})
+        return estilo
+
+    def escrever(self, linhas: Iterable[Sequence]) -> int:
+        """Acrescenta as linhas (na ordem das colunas); devolve quantas foram escritas."""
+        ws = self._ws
+        r0 = self.linhas
+        r = self._linhas_aba
+        for linha in linhas:
+            if r == self._max_linhas:
+                self.linhas += r - self._linhas_aba
+                self._nova_aba()
+                ws, r = self._ws, 0
+            r += 1
+            for c, (conv, v) in enumerate(zip(self._conversores, linha)):
+                valor, fmt = conv(v)
+                if _vazio(valor) or valor == "":
+                    continue
+                if fmt is None and isinstance(valor, (date, datetime)):
+                    fmt = DATA
+                estilo = None if fmt is None else self._estilo(fmt)
+                if _numero(valor):
+                    ws.write_number(r, c, valor, estilo)
+                elif isinstance(valor, (date, datetime)):
+                    ws.write_datetime(r, c, valor, estilo)
+                else:
+                    ws.write_string(r, c, str(valor), estilo)
+        self.linhas += r - self._linhas_aba
+        self._linhas_aba = r
+        return self.linhas - r0
+
+    def escrever_df(self, df) -> int:
+        return self.escrever(df.itertuples(index=False, name=None))
+
+class EscritorExcel:
+    """
+    xlsx escrito aos poucos (constant_memory): cada aba recebe blocos de linhas e só a
+    linha corrente fica em memória. `destino`: caminho ou BytesIO. Use como context manager.
+    """
+
+    def __init__(self, destino: str | Path | BytesIO, max_linhas: int = LINHAS_EXCEL - 1):
+        self._wb = xlsxwriter.Workbook(str(destino) if isinstance(destino, Path) else destino,
+                                       {"constant_memory": True})
+        self._estilos: dict = {}
+        self._max_linhas = max_linhas
+        self.arquivos: List[Path] = [Path(destino)] if isinstance(destino, (str, Path)) else []
+
+    def planilha(self, titulo: str, colunas: List[str], formatos: dict | None = None) -> PlanilhaExcel:
+        """Nova aba; `formatos` por nome de coluna (padrão FORMATOS_COLUNAS; {} = sem formatação)."""
+        return PlanilhaExcel(self._wb, self._estilos, titulo, colunas,
+                             FORMATOS_COLUNAS if formatos is None else formatos, self._max_linhas)
+
+    def fechar(self) -> None:
+        self._wb.close()
+
+    def __enter__(self) -> "EscritorExcel":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.fechar()
+
+def escrever_excel_formatado(linhas: Iterable[Sequence], colunas: List[str],
+                             formatos: dict | None = None, titulo: str = "Sheet1") -> BytesIO:
+    """Grava as linhas (na ordem de `colunas`) num xlsx formatado, em uma passada."""
+    output = BytesIO()
+    with EscritorExcel(output) as escritor:
+        escritor.planilha(titulo, colunas, formatos).escrever(linhas)
+    output.seek(0)
+    return output
+
+def format_excel(df) -> BytesIO:
+    """Mesma assinatura do format_excel antigo dos apps (DataFrame -> BytesIO do xlsx)."""
+    return escrever_excel_formatado(df.itertuples(index=False, name=None), [str(c) for c in df.columns])
@@ -0,0 +1,64 @@
+# nfe-suite/apps/combo_app/processors/pipeline.py
+# Linhas do extrator -> blocos de tamanho fixo -> DataFrame tipado do bloco -> saída
+# (aba do xlsx, CSV ou Parquet).
+# O pico de memória depende do tamanho do bloco, não do lote: nenhuma lista com todas as
+# linhas, nenhum DataFrame do lote inteiro. Só a prévia (primeiras linhas) e os totais ficam.
+
+from __future__ import annotations
+from itertools import islice
+from typing import Iterable, Iterator, List, NamedTuple, Sequence
+
+import pandas as pd
+
+from processors import metricas
+from processors.esquema import tipar_dataframe
+from processors.xml_nfe import COLUNAS_NFE
+
+TAMANHO_BLOCO = 5000
+LINHAS_PREVIA = 50
+
+class ResumoExportacao(NamedTuple):
+    previa: pd.DataFrame   # primeiras LINHAS_PREVIA linhas, já tipadas
+    linhas: int
+    notas: int             # notas na saída: trocas de chave entre linhas consecutivas (as linhas
+                           # de uma nota vêm juntas); a mesma nota em dois arquivos conta duas vezes
+    valor_itens: float     # soma de "Valor Total do Item"
+
+def em_blocos(itens: Iterable, tamanho: int = TAMANHO_BLOCO) -> Iterator[list]:
+    it = iter(itens)
+    while bloco := list(islice(it, max(1, tamanho))):
+        yield bloco
+
+def exportar_nfe(linhas: Iterable[Sequence[str]], saida,
+                 tamanho_bloco: int = TAMANHO_BLOCO, n_previa: int = LINHAS_PREVIA,
+                 colunas: List[str] = COLUNAS_NFE) -> ResumoExportacao:
+    """
+    Consome o gerador de linhas escrevendo em blocos de `tamanho_bloco` linhas.
+    `saida`: qualquer objeto com escrever_df(df) — aba do xlsx (excel.PlanilhaExcel),
+    exportacao.SaidaCSV ou exportacao.SaidaParquet.
+    """
+    previas: list[pd.DataFrame] = []
+    faltam = n_previa
+    total = 0
+    notas = 0
+    ultima = None   # chave da última linha do bloco anterior
+    valor = 0.0
+    for bloco in em_blocos(linhas, tamanho_bloco):
+        with metricas.medir(metricas.DATAFRAME) as m:
+            df = tipar_dataframe(pd.DataFrame(columns=colunas, data=bloco))
+            m["itens"] = len(df)
+        del bloco
+        with metricas.medir(metricas.ESCRITA) as m:
+            saida.escrever_df(df)
+            m["itens"] = len(df)
+        total += len(df)
+        if len(df):
+            chave = df["Chave"]
+            notas += int((chave != chave.shift()).sum()) - (chave.iat[0] == ultima)
+            ultima = chave.iat[-1]
+        valor += float(df["Valor Total do Item"].sum())
+        if faltam > 0:
+            previas.append(df.head(faltam))
+            faltam -= len(previas[-1])
+    previa = pd.concat(previas, ignore_index=True) if previas else tipar_dataframe(pd.DataFrame(columns=colunas))
+    return ResumoExportacao(previa, total, notas, valor)
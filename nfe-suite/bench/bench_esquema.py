@@ -0,0 +1,65 @@
+# nfe-suite/bench/bench_esquema.py
+# DataFrame de str (object) x DataFrame tipado (processors.esquema): memória por linha,
+# custo da conversão e de um total/agrupamento típico. Uso:
+#   python nfe-suite/bench/bench_esquema.py --arquivos 200 --itens 50
+
+from __future__ import annotations
+import argparse
+import sys
+import time
+from io import BytesIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "apps" / "combo_app"))
+
+import pandas as pd  # noqa: E402
+
+from processors.esquema import dataframe_nfe  # noqa: E402
+from processors.excel import format_excel  # noqa: E402
+from processors.xml_nfe import COLUNAS_NFE, iterar_linhas_xml  # noqa: E402
+from sintetico import gerar_nfe_xml  # noqa: E402
+
+def _tempo(func, *args):
+    t0 = time.perf_counter()
+    out = func(*args)
+    return time.perf_counter() - t0, out
+
+def _total_por_emitente_str(df: pd.DataFrame) -> pd.Series:
+    # o que era preciso com tudo em str: reconverter a cada consulta
+    valores = pd.to_numeric(df["Valor Total do Item"], errors="coerce")
+    return valores.groupby(df["CNPJ do Emitente"]).sum()
+
+def _total_por_emitente_tipado(df: pd.DataFrame) -> pd.Series:
+    return df.groupby("CNPJ do Emitente", observed=True)["Valor Total do Item"].sum()
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--arquivos", type=int, default=200)
+    ap.add_argument("--itens", type=int, default=50)
+    args = ap.parse_args(argv)
+
+    linhas = []
+    for i in range(args.arquivos):
+        linhas.extend(iterar_linhas_xml(BytesIO(gerar_nfe_xml(itens=args.itens, seed=i, ipi=i % 2 == 0))))
+
+    t_str, df_str = _tempo(lambda: pd.DataFrame(columns=COLUNAS_NFE, data=linhas))
+    t_tip, df_tip = _tempo(dataframe_nfe, linhas)
+    n = len(df_str)
+    b_str = df_str.memory_usage(deep=True).sum() / n
+    b_tip = df_tip.memory_usage(deep=True).sum() / n
+
+    t_tot_str, tot_str = _tempo(_total_por_emitente_str, df_str)
+    t_tot_tip, tot_tip = _tempo(_total_por_emitente_tipado, df_tip)
+    t_x_str, _ = _tempo(format_excel, df_str)
+    t_x_tip, _ = _tempo(format_excel, df_tip)
+    iguais = tot_str.round(2).to_dict() == tot_tip.round(2).to_dict()
+
+    print(f"linhas={n}")
+    print(f"montagem : str {t_str * 1000:.0f} ms   tipado {t_tip * 1000:.0f} ms")
+    print(f"memória  : str {b_str:.0f} B/linha   tipado {b_tip:.0f} B/linha  ({b_str / b_tip:.1f}x menor)")
+    print(f"total/CNPJ: str {t_tot_str * 1000:.1f} ms   tipado {t_tot_tip * 1000:.1f} ms  (iguais: {iguais})")
+    print(f"excel    : str {t_x_str:.2f} s   tipado {t_x_tip:.2f} s")
+    return 0 if iguais else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+# nfe-suite/bench/bench_excel.py
+# Compara o format_excel antigo (to_excel -> load_workbook -> formata célula a célula ->
+# salva de novo) com o escritor de passada única (processors.excel). Uso:
+#   python nfe-suite/bench/bench_excel.py --arquivos 200 --itens 50
+
+from __future__ import annotations
+import argparse
+import sys
+import time
+import tracemalloc
+from io import BytesIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "apps" / "combo_app"))
+
+import pandas as pd  # noqa: E402
+from openpyxl import load_workbook  # noqa: E402
+
+from processors.excel import FORMATOS_COLUNAS, format_excel  # noqa: E402
+from processors.xml_nfe import COLUNAS_NFE, iterar_linhas_xml  # noqa: E402
+from sintetico import gerar_nfe_xml  # noqa: E402
+
+# ---- referência: cópia do format_excel original dos apps ----
+def format_excel_original(df: pd.DataFrame) -> BytesIO:
+    output = BytesIO()
+    df.to_excel(output, index=False, engine="openpyxl")
+    output.seek(0)
+    wb = load_workbook(output)
+    ws = wb.active
+    cab = {cell.value.strip(): i + 1 for i, cell in enumerate(ws[1]) if cell.value}
+    for nome, fmt in FORMATOS_COLUNAS.items():
+        if nome in cab:
+            col = cab[nome]
+            for row in ws.iter_rows(min_row=2, min_col=col, max_col=col):
+                cell = row[0]
+                try:
+                    val = str(cell.value or "").replace("R$", "").replace("%", "").replace(",", ".").strip()
+                    if val == "":
+                        continue
+                    if fmt == "0":
+                        cell.value = int(float(val))
+                    elif fmt.endswith("%"):
+                        cell.value = float(val) / 100
+                    elif fmt == "@":
+                        cell.value = str(cell.value).strip()
+                    else:
+                        cell.value = float(val)
+                    cell.number_format = fmt
+                    if nome == "CNPJ do Emitente":
+                        cnpj = "".join(filter(str.isdigit, str(cell.value)))
+                        if len(cnpj) == 14:
+                            cell.value = f"{cnpj[:2]}.{cnpj[2:5]}.{cnpj[5:8]}/{cnpj[8:12]}-{cnpj[12:]}"
+                except:  # noqa: E722
+                    pass
+    final_output = BytesIO()
+    wb.save(final_output)
+    final_output.seek(0)
+    return final_output
+
+def _celulas(xlsx: BytesIO) -> list:
+    ws = load_workbook(xlsx).active
+    return [[(c.value if c.value != "" else None, c.number_format if c.row > 1 else None) for c in row]
+            for row in ws.iter_rows()]
+
+def _medir(func, df) -> tuple[float, int, BytesIO]:
+    t0 = time.perf_counter()
+    out = func(df)
+    dt = time.perf_counter() - t0
+    # pico de memória numa segunda execução (tracemalloc distorce o tempo)
+    tracemalloc.start()
+    func(df)
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return dt, pico, out
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--arquivos", type=int, default=200)
+    ap.add_argument("--itens", type=int, default=50)
+    args = ap.parse_args(argv)
+
+    linhas = []
+    for i in range(args.arquivos):
+        linhas.extend(iterar_linhas_xml(BytesIO(gerar_nfe_xml(itens=args.itens, seed=i, ipi=i % 2 == 0))))
+    df = pd.DataFrame(columns=COLUNAS_NFE, data=linhas)
+
+    t_orig, m_orig, x_orig = _medir(format_excel_original, df)
+    t_novo, m_novo, x_novo = _medir(format_excel, df)
+    iguais = _celulas(x_orig) == _celulas(x_novo)
+
+    print(f"linhas={len(df)}")
+    print(f"original : {t_orig:.2f} s  pico Python {m_orig / 2**20:.0f} MB")
+    print(f"1 passada: {t_novo:.2f} s  pico Python {m_novo / 2**20:.0f} MB")
+    print(f"speedup  : {t_orig / t_novo:.2f}x  células idênticas: {iguais}")
+    return 0 if iguais else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
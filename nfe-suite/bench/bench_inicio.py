@@ -0,0 +1,166 @@
+# nfe-suite/bench/bench_inicio.py
+# Partida a frio dos apps: tempo de importação dos módulos (cada um num interpretador novo),
+# do aquecimento (processors.aquecimento) e da primeira renderização de cada app Streamlit
+# (streamlit.testing AppTest: primeira execução do script e um rerun). Saída em JSON,
+# comparável entre commits como a suite.py:
+#   python nfe-suite/bench/bench_inicio.py --saida base.json
+#   python nfe-suite/bench/bench_inicio.py --saida novo.json --comparar base.json
+# Sem streamlit instalado, a renderização é pulada com o motivo.
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from suite import _meta
+
+APPS = Path(__file__).resolve().parents[1] / "apps"
+COMBO = APPS / "combo_app"
+
+# o que o combo_app importa no topo do script (sem o streamlit)
+TOPO_COMBO = ("processors.sessao", "processors.base_notas", "processors.metricas", "processors.exportacao",
+              "processors.xml_nfe", "processors.paralelo", "processors.lote_zip", "processors.cache",
+              "processors.conciliacao", "processors.jobs", "processors.aquecimento")
+
+IMPORTACOES = {
+    "streamlit": ("streamlit",),
+    "pandas": ("pandas",),
+    "xlsxwriter": ("xlsxwriter",),
+    "pdf2image": ("pdf2image",),
+    "combo_app_topo": TOPO_COMBO,
+    "pipeline": ("processors.pipeline",),
+    "extrator_pdf": ("processors.extractor_pyzbar",),
+    "decodificadores": ("processors.decodificadores",),
+}
+
+_CODIGO_IMPORT = """
+import importlib, json, sys, time
+t0 = time.perf_counter()
+for m in {modulos!r}:
+    importlib.import_module(m)
+ms = (time.perf_counter() - t0) * 1e3
+pesados = [m for m in ("pandas", "pyarrow", "pdf2image", "PIL", "numpy") if m in sys.modules]
+print(json.dumps({{"ms": ms, "carregados": pesados}}))
+"""
+
+_CODIGO_AQUECIMENTO = """
+import json
+from processors.aquecimento import aquecer
+print(json.dumps(aquecer()))
+"""
+
+_CODIGO_RENDER = """
+import json, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+importacao = (time.perf_counter() - t0) * 1e3
+at = AppTest.from_file({app!r}, default_timeout={timeout})
+t0 = time.perf_counter()
+at.run()
+primeira = (time.perf_counter() - t0) * 1e3
+t0 = time.perf_counter()
+at.run()
+rerun = (time.perf_counter() - t0) * 1e3
+print(json.dumps({{"importacao_teste_ms": importacao, "primeira_ms": primeira, "rerun_ms": rerun,
+                  "excecoes": [str(e.value) for e in at.exception]}}))
+"""
+
+def _rodar(codigo: str, env: dict, timeout: float) -> dict:
+    # interpretador novo a cada medição: nada em sys.modules, como num contêiner recém-criado
+    proc = subprocess.run([sys.executable, "-c", codigo], cwd=COMBO, env=env, capture_output=True,
+                          text=True, timeout=timeout)
+    if proc.returncode != 0:
+        ultima = (proc.stderr.strip().splitlines() or ["?"])[-1]
+        raise RuntimeError(ultima)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def _resumo(valores: list[float]) -> dict:
+    return {"min_ms": round(min(valores), 1), "mediana_ms": round(statistics.median(valores), 1)}
+
+def medir_importacoes(env: dict, repeticoes: int, timeout: float) -> dict:
+    saida = {}
+    for nome, modulos in IMPORTACOES.items():
+        try:
+            rodadas = [_rodar(_CODIGO_IMPORT.format(modulos=modulos), env, timeout) for _ in range(repeticoes)]
+        except (RuntimeError, subprocess.SubprocessError) as e:
+            saida[nome] = {"pulado": str(e)}
+            continue
+        saida[nome] = {**_resumo([r["ms"] for r in rodadas]), "carregados": rodadas[-1]["carregados"]}
+    return saida
+
+def medir_aquecimento(env: dict, timeout: float) -> dict:
+    try:
+        return _rodar(_CODIGO_AQUECIMENTO, env, timeout)
+    except (RuntimeError, subprocess.SubprocessError) as e:
+        return {"erro": str(e)}
+
+def medir_renderizacao(env: dict, repeticoes: int, timeout: float) -> dict:
+    apps = {"combo_app": COMBO / "app.py", "xml_app": APPS / "xml_app" / "app.py", "pdf_app": APPS / "pdf_app" / "app.py"}
+    saida = {}
+    for nome, app in apps.items():
+        codigo = _CODIGO_RENDER.format(app=str(app), timeout=timeout)
+        try:
+            rodadas = [_rodar(codigo, env, timeout * 2) for _ in range(repeticoes)]
+        except (RuntimeError, subprocess.SubprocessError) as e:
+            saida[nome] = {"pulado": str(e)}
+            continue
+        saida[nome] = {"primeira": _resumo([r["primeira_ms"] for r in rodadas]),
+                       "rerun": _resumo([r["rerun_ms"] for r in rodadas]),
+                       "importacao_teste_ms": round(min(r["importacao_teste_ms"] for r in rodadas), 1),
+                       "excecoes": rodadas[-1]["excecoes"]}
+    return saida
+
+def comparar(atual: dict, anterior: dict) -> list[str]:
+    """Variação da mediana (positivo = mais rápido que `anterior`)."""
+    saida = [f"comparando com {anterior['meta'].get('commit')} ({anterior['meta'].get('data')})"]
+    pares = [(f"import {n}", r, anterior["importacoes"].get(n)) for n, r in atual["importacoes"].items()]
+    pares += [(f"{n} {fase}", r.get(fase), (anterior["renderizacao"].get(n) or {}).get(fase))
+              for n, r in atual["renderizacao"].items() for fase in ("primeira", "rerun")]
+    for nome, r, a in pares:
+        if not r or not a or "mediana_ms" not in r or "mediana_ms" not in a:
+            continue
+        var = (a["mediana_ms"] / max(r["mediana_ms"], 1e-9) - 1) * 100
+        saida.append(f"  {nome:28s} {a['mediana_ms']:8.1f} ms -> {r['mediana_ms']:8.1f} ms  ({var:+6.1f}%)")
+    return saida
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Partida a frio: importações, aquecimento e primeira renderização (JSON).")
+    ap.add_argument("--repeticoes", type=int, default=5, help="interpretadores novos por medição")
+    ap.add_argument("--sem-renderizacao", action="store_true", help="não mede os apps Streamlit")
+    ap.add_argument("--sem-aquecimento", action="store_true",
+                    help="NFE_AQUECIMENTO=0 na renderização (isola a primeira tela do aquecimento)")
+    ap.add_argument("--timeout", type=float, default=60, help="segundos por execução")
+    ap.add_argument("--saida", help="grava o JSON neste arquivo (senão só imprime)")
+    ap.add_argument("--comparar", help="JSON de uma execução anterior para comparar")
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="nfe_inicio_") as td:
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(COMBO), os.environ.get("PYTHONPATH")])),
+               "NFE_BASE_NOTAS": str(Path(td) / "notas.sqlite3"), "NFE_CACHE_DIR": str(Path(td) / "cache")}
+        if args.sem_aquecimento:
+            env["NFE_AQUECIMENTO"] = "0"
+        resultado = {"meta": _meta(), "parametros": {k: v for k, v in vars(args).items() if k not in ("saida", "comparar")}}
+        resultado["importacoes"] = medir_importacoes(env, args.repeticoes, args.timeout)
+        print(f"importacoes: {json.dumps(resultado['importacoes'], ensure_ascii=False)}", file=sys.stderr)
+        resultado["aquecimento"] = medir_aquecimento(env, args.timeout)
+        print(f"aquecimento: {json.dumps(resultado['aquecimento'], ensure_ascii=False)}", file=sys.stderr)
+        resultado["renderizacao"] = ({} if args.sem_renderizacao
+                                     else medir_renderizacao(env, args.repeticoes, args.timeout))
+
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.saida:
+        Path(args.saida).write_text(texto + "\n", encoding="utf-8")
+    else:
+        print(texto)
+    if args.comparar:
+        anterior = json.loads(Path(args.comparar).read_text(encoding="utf-8"))
+        print("\n".join(comparar(resultado, anterior)), file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+# nfe-suite/bench/bench_pipeline.py
+# Lote de XMLs -> xlsx: caminho antigo (lista de todas as linhas -> DataFrame do lote ->
+# xlsx num BytesIO -> getvalue) x pipeline em blocos (gerador -> blocos tipados -> xlsx em
+# disco). Compara pico de memória Python (tracemalloc) e confere as células. Uso:
+#   python nfe-suite/bench/bench_pipeline.py --arquivos 400 --itens 50 --bloco 5000
+
+from __future__ import annotations
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from io import BytesIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "apps" / "combo_app"))
+
+from openpyxl import load_workbook  # noqa: E402
+
+from processors.esquema import dataframe_nfe  # noqa: E402
+from processors.excel import EscritorExcel, format_excel  # noqa: E402
+from processors.paralelo import iterar_xmls, processar_xmls  # noqa: E402
+from processors.pipeline import exportar_nfe  # noqa: E402
+from processors.xml_nfe import COLUNAS_NFE  # noqa: E402
+from sintetico import gerar_lote_xml  # noqa: E402
+
+def _antigo(paths, destino: Path) -> int:
+    notas, _ = processar_xmls(paths, workers=1)
+    df = dataframe_nfe(notas)
+    dados = format_excel(df).getvalue()
+    destino.write_bytes(dados)
+    return len(df)
+
+def _pipeline(paths, destino: Path, bloco: int) -> int:
+    with EscritorExcel(destino) as escritor:
+        resumo = exportar_nfe(iterar_xmls(paths, workers=1, arquivos_por_lote=64),
+                              escritor.planilha("Sheet1", COLUNAS_NFE), tamanho_bloco=bloco)
+    return resumo.linhas
+
+def _medir(func, *args) -> tuple[float, int, int]:
+    t0 = time.perf_counter()
+    n = func(*args)
+    dt = time.perf_counter() - t0
+    tracemalloc.start()
+    func(*args)
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return dt, pico, n
+
+def _celulas(caminho: Path) -> list:
+    ws = load_workbook(BytesIO(caminho.read_bytes()), read_only=True).active
+    return [[(c.value, c.number_format) for c in row] for row in ws.iter_rows()]
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--arquivos", type=int, default=400)
+    ap.add_argument("--itens", type=int, default=50)
+    ap.add_argument("--bloco", type=int, default=5000)
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as td:
+        paths = gerar_lote_xml(Path(td) / "xml", arquivos=args.arquivos, itens=args.itens)
+        t_a, m_a, n_a = _medir(_antigo, paths, Path(td) / "antigo.xlsx")
+        t_p, m_p, n_p = _medir(_pipeline, paths, Path(td) / "pipeline.xlsx", args.bloco)
+        iguais = _celulas(Path(td) / "antigo.xlsx") == _celulas(Path(td) / "pipeline.xlsx")
+
+    print(f"linhas={n_a}  bloco={args.bloco}")
+    print(f"lote inteiro: {t_a:.2f} s  pico Python {m_a / 2**20:.0f} MB")
+    print(f"em blocos   : {t_p:.2f} s  pico Python {m_p / 2**20:.0f} MB  (linhas={n_p})")
+    print(f"células idênticas: {iguais}")
+    return 0 if iguais else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
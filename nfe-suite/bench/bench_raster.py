@@ -0,0 +1,71 @@
+# nfe-suite/bench/bench_raster.py
+# Compara, por página, o tempo e o pico de RSS dos backends de rasterização:
+#   pil  : pdf2image.convert_from_path (RGB) + img.convert("L")  (caminho antigo)
+#   gray : pdftoppm -gray direto, bytes Y800 entregues ao zbar
+#   mono : pdftoppm -mono (1 bit) expandido para Y800
+# Cada backend roda num processo novo para o pico de RSS ser dele.
+# Uso:
+#   python nfe-suite/bench/bench_raster.py [--pdf arquivo.pdf] [--paginas 20] [--dpi 300]
+
+from __future__ import annotations
+import argparse
+import json
+import multiprocessing as mp
+import random
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "apps" / "combo_app"))
+
+def _medir(backend: str, pdf: str, dpi: int, threads: int, fila) -> None:
+    import processors.extractor_pyzbar as ex
+    ex.POPPLER_THREADS = threads
+    total = ex.contar_paginas(pdf)
+    t0 = time.perf_counter()
+    chaves = 0
+    for n in range(1, total + 1):
+        for leituras in ex.ler_paginas(pdf, n, n, dpi=dpi, raster=backend):
+            chaves += sum(1 for v in leituras if len(ex._only_digits(v)) == 44)
+    dt = time.perf_counter() - t0
+    fila.put({
+        "backend": backend,
+        "paginas": total,
+        "ms_por_pagina": round(dt / total * 1e3, 2),
+        "chaves": chaves,
+        "pico_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "pico_rss_poppler_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+    })
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pdf", help="PDF real para medir (padrão: DANFE sintético)")
+    ap.add_argument("--paginas", type=int, default=20)
+    ap.add_argument("--dpi", type=int, default=300)
+    ap.add_argument("--threads", type=int, default=1, help="processos pdftoppm (gray/mono)")
+    ap.add_argument("--backends", default="pil,gray,mono")
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as td:
+        pdf = args.pdf
+        if not pdf:
+            from sintetico import chave_sintetica, gerar_danfe_pdf
+            rnd = random.Random(0)
+            pdf = str(gerar_danfe_pdf(Path(td) / "danfes.pdf", [chave_sintetica(rnd) for _ in range(args.paginas)]))
+
+        ctx = mp.get_context("spawn")
+        resultados = []
+        for backend in args.backends.split(","):
+            fila = ctx.Queue()
+            proc = ctx.Process(target=_medir, args=(backend, pdf, args.dpi, args.threads, fila))
+            proc.start()
+            resultados.append(fila.get())
+            proc.join()
+
+    print(json.dumps(resultados, indent=2, ensure_ascii=False))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+# nfe-suite/bench/bench_servico.py
+# Extração pelo serviço HTTP (processors.remoto, NFE_SERVICO_URLS=local: serviço numa thread
+# deste processo) x pool local (processors.paralelo), no mesmo lote: confere que as saídas são
+# iguais (linhas e erros dos XMLs, chaves/outras/erro dos PDFs) e mede o custo do caminho HTTP.
+# Sai com 1 se alguma saída difere.
+# Uso:
+#   python nfe-suite/bench/bench_servico.py --arquivos 500 --itens 20 --workers 4
+#   python nfe-suite/bench/bench_servico.py --pdfs 10      # PDFs: reportlab + Poppler + libzbar
+
+from __future__ import annotations
+import argparse
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "apps" / "combo_app"))
+
+from processors import paralelo  # noqa: E402
+from processors.lote_zip import LeitorZip  # noqa: E402
+from processors.remoto import backend_configurado, encerrar_servico_local, servico_local  # noqa: E402
+from processors.sessao import ArquivoSessao  # noqa: E402
+from sintetico import gerar_lote_pdf, gerar_lote_xml  # noqa: E402
+
+def _cronometrar(funcao):
+    t0 = time.perf_counter()
+    saida = funcao()
+    return saida, time.perf_counter() - t0
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--arquivos", type=int, default=500)
+    ap.add_argument("--itens", type=int, default=20)
+    ap.add_argument("--pdfs", type=int, default=0, help="DANFEs sintéticos no lote (0 = só XMLs)")
+    ap.add_argument("--workers", type=int, default=2)
+    args = ap.parse_args(argv)
+
+    diferencas = []
+    with tempfile.TemporaryDirectory() as td:
+        pasta = Path(td)
+        xmls = gerar_lote_xml(pasta / "xml", arquivos=args.arquivos, itens=args.itens)
+        (pasta / "xml" / "ruim.xml").write_bytes(b"<nfeProc><NFe>")   # o erro também tem de bater
+        zip_path = pasta / "lote.zip"
+        with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+            for i, p in enumerate(xmls + [pasta / "xml" / "ruim.xml"]):
+                zf.write(p, f"filial{i % 3}/{p.name}")
+        with LeitorZip(zip_path) as leitor:
+            membros = leitor.membros()
+            sessao = []
+            for m in membros:
+                with leitor.abrir(m) as f:
+                    sessao.append(ArquivoSessao(m.nome, m.tamanho, f.read(), None))
+
+        backend = backend_configurado("local", fabrica_local=lambda: servico_local(
+            pasta=pasta / "servico", workers=args.workers, usar_cache=False))
+        try:
+            casos = [
+                ("xml zip", lambda: paralelo.processar_xmls_zip(zip_path, membros, workers=args.workers),
+                 lambda: _com_erros(backend.iterar_xmls_zip, zip_path, membros)),
+                ("xml sessao", lambda: _com_erros(paralelo.iterar_xmls_sessao, sessao, workers=args.workers),
+                 lambda: _com_erros(backend.iterar_xmls_sessao, sessao)),
+            ]
+            if args.pdfs:
+                pdfs, _ = gerar_lote_pdf(pasta / "pdf", arquivos=args.pdfs)
+                casos.append(("pdf", lambda: _pdfs(paralelo.processar_pdfs(pdfs, workers=args.workers)),
+                              lambda: _pdfs(backend.processar_pdfs(pdfs))))
+            for nome, local, remoto in casos:
+                saida_local, t_local = _cronometrar(local)
+                saida_remota, t_remoto = _cronometrar(remoto)
+                igual = saida_local == saida_remota
+                if not igual:
+                    diferencas.append(nome)
+                print(f"{nome:<10}: local {t_local:.2f} s  serviço {t_remoto:.2f} s  "
+                      f"({t_remoto / max(t_local, 1e-9):.2f}x)  saídas {'iguais' if igual else 'DIFERENTES'}")
+        finally:
+            encerrar_servico_local()
+
+    if diferencas:
+        print(f"saídas diferentes: {', '.join(diferencas)}", file=sys.stderr)
+        return 1
+    return 0
+
+def _com_erros(iterar, *fontes, **kw):
+    erros: list = []
+    linhas = list(iterar(*fontes, erros=erros, **kw))
+    return linhas, erros
+
+def _pdfs(resultados) -> list:
+    return [(r.chaves, r.outras, r.erro) for r in resultados]
+
+if __name__ == "__main__":
+    sys.exit(main())
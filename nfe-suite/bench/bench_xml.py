@@ -0,0 +1,103 @@
+# nfe-suite/bench/bench_xml.py
+# Compara, por arquivo, o extract_info_from_xml original (ET.parse + find) com o
+# extrator de passada única (processors.xml_nfe). Uso:
+#   python nfe-suite/bench/bench_xml.py --arquivos 500 --itens 30
+
+from __future__ import annotations
+import argparse
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "apps" / "combo_app"))
+
+from processors.xml_nfe import iterar_linhas_xml  # noqa: E402
+from sintetico import gerar_lote_xml  # noqa: E402
+
+# ---- referência: cópia da implementação original dos apps ----
+def _get_text_or_zero(elem):
+    return elem.text if elem is not None and elem.text else "0"
+
+def extract_info_from_xml_original(file, result_list):
+    root = ET.parse(file).getroot()
+    ns = {"ns": "http://www.portalfiscal.inf.br/nfe"}
+    nfe = root.find("./ns:NFe/ns:infNFe/ns:ide/ns:nNF", ns)
+    serie = root.find("./ns:NFe/ns:infNFe/ns:ide/ns:serie", ns)
+    nat_operacao = root.find("./ns:NFe/ns:infNFe/ns:ide/ns:natOp", ns)
+    data_saida_entrada = root.find("./ns:NFe/ns:infNFe/ns:ide/ns:dhSaiEnt", ns)
+    if data_saida_entrada is not None and data_saida_entrada.text:
+        data_saida_entrada = f"{data_saida_entrada.text[8:10]}/{data_saida_entrada.text[5:7]}/{data_saida_entrada.text[0:4]}"
+    else:
+        data_saida_entrada = ""
+    data_emissao = root.find("./ns:NFe/ns:infNFe/ns:ide/ns:dhEmi", ns)
+    if data_emissao is not None and data_emissao.text:
+        data_emissao = f"{data_emissao.text[8:10]}/{data_emissao.text[5:7]}/{data_emissao.text[0:4]}"
+    else:
+        data_emissao = ""
+    valor_frete = root.find("./ns:NFe/ns:infNFe/ns:total/ns:ICMSTot/ns:vFrete", ns)
+    valor_desc = root.find("./ns:NFe/ns:infNFe/ns:total/ns:ICMSTot/ns:vDesc", ns)
+    valor_outro = root.find("./ns:NFe/ns:infNFe/ns:total/ns:ICMSTot/ns:vOutro", ns)
+    valor_tot_nota = root.find("./ns:NFe/ns:infNFe/ns:total/ns:ICMSTot/ns:vNF", ns)
+    valor_tot_prod = root.find("./ns:NFe/ns:infNFe/ns:total/ns:ICMSTot/ns:vProd", ns)
+    chave = root.find("./ns:protNFe/ns:infProt/ns:chNFe", ns)
+    cnpj_emitente = root.find("./ns:NFe/ns:infNFe/ns:emit/ns:CNPJ", ns)
+    nome_emitente = root.find("./ns:NFe/ns:infNFe/ns:emit/ns:xNome", ns)
+    item_num = 1
+    for item in root.findall("./ns:NFe/ns:infNFe/ns:det", ns):
+        cod = item.find(".ns:prod/ns:cProd", ns)
+        descricao = item.find(".ns:prod/ns:xProd", ns)
+        unidade = item.find(".ns:prod/ns:uCom", ns)
+        quantidade = item.find(".ns:prod/ns:qCom", ns)
+        valor_unit = item.find(".ns:prod/ns:vUnCom", ns)
+        desconto_item = item.find(".ns:prod/ns:vDesc", ns)
+        desconto_item = desconto_item.text if desconto_item is not None and desconto_item.text else ""
+        valor_total_item = item.find(".ns:prod/ns:vProd", ns)
+        icms_percent = item.find(".ns:imposto/ns:ICMS/ns:ICMS00/ns:pICMS", ns)
+        icms_valor = item.find(".ns:imposto/ns:ICMS/ns:ICMS00/ns:vICMS", ns)
+        ipi_percent = item.find(".ns:imposto/ns:IPI/ns:IPITrib/ns:pIPI", ns)
+        ipi_valor = item.find(".ns:imposto/ns:IPI/ns:IPITrib/ns:vIPI", ns)
+        linha = [
+            nfe.text, serie.text, nat_operacao.text, data_emissao, data_saida_entrada,
+            valor_frete.text, chave.text, cnpj_emitente.text, nome_emitente.text,
+            valor_tot_nota.text, valor_tot_prod.text, valor_desc.text, valor_outro.text,
+            item_num, cod.text, descricao.text, unidade.text, quantidade.text,
+            valor_unit.text, desconto_item, valor_total_item.text,
+            _get_text_or_zero(icms_percent), _get_text_or_zero(icms_valor),
+            _get_text_or_zero(ipi_percent), _get_text_or_zero(ipi_valor),
+        ]
+        result_list.append([str(i) for i in linha])
+        item_num += 1
+
+def _medir(func, paths) -> tuple[float, list]:
+    linhas: list = []
+    t0 = time.perf_counter()
+    for p in paths:
+        func(p, linhas)
+    return time.perf_counter() - t0, linhas
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--arquivos", type=int, default=300)
+    ap.add_argument("--itens", type=int, default=30)
+    ap.add_argument("--repeticoes", type=int, default=3)
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as td:
+        paths = gerar_lote_xml(Path(td), arquivos=args.arquivos, itens=args.itens)
+        novo = lambda p, out: out.extend(iterar_linhas_xml(p))  # noqa: E731
+
+        t_orig = min(_medir(extract_info_from_xml_original, paths)[0] for _ in range(args.repeticoes))
+        t_novo = min(_medir(novo, paths)[0] for _ in range(args.repeticoes))
+        iguais = _medir(extract_info_from_xml_original, paths)[1] == _medir(novo, paths)[1]
+
+    n = len(paths)
+    print(f"arquivos={n} itens/arquivo={args.itens}")
+    print(f"original : {t_orig / n * 1e3:.3f} ms/arquivo")
+    print(f"iterparse: {t_novo / n * 1e3:.3f} ms/arquivo")
+    print(f"speedup  : {t_orig / t_novo:.2f}x  saída idêntica: {iguais}")
+    return 0 if iguais else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
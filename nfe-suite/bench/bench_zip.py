@@ -0,0 +1,71 @@
+# nfe-suite/bench/bench_zip.py
+# Lote .zip de XMLs: extrair tudo para o disco e ler (extract_zip_to antigo) x ler os
+# membros direto do stream (processors.lote_zip). Reporta MB/s sobre os bytes descompactados.
+# Uso:
+#   python nfe-suite/bench/bench_zip.py --arquivos 2000 --itens 20 --workers 4
+
+from __future__ import annotations
+import argparse
+import io
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "apps" / "combo_app"))
+
+from processors.lote_zip import LeitorZip  # noqa: E402
+from processors.paralelo import processar_xmls, processar_xmls_zip  # noqa: E402
+from sintetico import gerar_nfe_xml  # noqa: E402
+
+# ---- referência: cópia do extract_zip_to original do combo_app ----
+def extract_zip_to_original(zip_bytes: bytes, dest_dir: Path) -> list[Path]:
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    saved = []
+    with zipfile.ZipFile(io.BytesIO(zip_bytes)) as zf:
+        for member in zf.infolist():
+            if member.is_dir():
+                continue
+            target = dest_dir / Path(member.filename).name
+            with zf.open(member, "r") as src, open(target, "wb") as dst:
+                dst.write(src.read())
+            saved.append(target)
+    return saved
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--arquivos", type=int, default=2000)
+    ap.add_argument("--itens", type=int, default=20)
+    ap.add_argument("--workers", type=int, default=1)
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as td:
+        zip_path = Path(td) / "lote.zip"
+        with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+            for i in range(args.arquivos):
+                # pastas diferentes, mesmo nome de arquivo: o caminho antigo sobrescreve
+                zf.writestr(f"filial{i % 10}/nfe{i // 10:05d}.xml", gerar_nfe_xml(itens=args.itens, seed=i))
+        zip_bytes = zip_path.read_bytes()
+
+        t0 = time.perf_counter()
+        paths = extract_zip_to_original(zip_bytes, Path(td) / "extraido")
+        linhas_antigo, _ = processar_xmls(paths, workers=args.workers)
+        t_antigo = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        with LeitorZip(zip_path) as leitor:
+            membros = leitor.membros()
+        linhas_novo, _ = processar_xmls_zip(zip_path, membros, workers=args.workers)
+        t_novo = time.perf_counter() - t0
+
+    mb = sum(m.tamanho for m in membros) / 2**20
+    notas = lambda linhas: len({linha[6] for linha in linhas})  # coluna "Chave"
+    print(f"membros={len(membros)}  {mb:.1f} MB descompactados")
+    print(f"extrair + ler: {t_antigo:.2f} s  ({mb / t_antigo:.1f} MB/s)  notas distintas={notas(linhas_antigo)}")
+    print(f"stream       : {t_novo:.2f} s  ({mb / t_novo:.1f} MB/s)  notas distintas={notas(linhas_novo)}")
+    print(f"speedup      : {t_antigo / t_novo:.2f}x")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+# nfe-suite/bench/sintetico.py
+# Gera XMLs de NF-e sintéticos (nfeProc) e DANFEs em PDF (Code128 real da chave de 44
+# dígitos, via reportlab) para benchmarks reprodutíveis e offline.
+
+from __future__ import annotations
+import random
+from pathlib import Path
+
+NS = "http://www.portalfiscal.inf.br/nfe"
+
+def _det(n: int, rnd: random.Random, com_icms: bool, com_ipi: bool) -> str:
+    q = rnd.randint(1, 50)
+    vun = round(rnd.uniform(1, 500), 2)
+    vprod = round(q * vun, 2)
+    icms = (f"<ICMS><ICMS00><orig>0</orig><CST>00</CST><pICMS>18.00</pICMS>"
+            f"<vICMS>{vprod * 0.18:.2f}</vICMS></ICMS00></ICMS>") if com_icms else \
+           "<ICMS><ICMS40><orig>0</orig><CST>40</CST></ICMS40></ICMS>"
+    ipi = (f"<IPI><cEnq>999</cEnq><IPITrib><CST>50</CST><pIPI>5.00</pIPI>"
+           f"<vIPI>{vprod * 0.05:.2f}</vIPI></IPITrib></IPI>") if com_ipi else ""
+    desc = f"<vDesc>{rnd.uniform(0, 5):.2f}</vDesc>" if n % 3 == 0 else ""
+    return (
+        f'<det nItem="{n}"><prod><cProd>{rnd.randint(1000, 99999)}</cProd>'
+        f"<xProd>PRODUTO SINTETICO {n}</xProd><uCom>UN</uCom><qCom>{q}.0000</qCom>"
+        f"<vUnCom>{vun:.10f}</vUnCom><vProd>{vprod:.2f}</vProd>{desc}</prod>"
+        f"<imposto>{icms}{ipi}</imposto></det>"
+    )
+
+def chave_sintetica(rnd: random.Random) -> str:
+    # cUF(35) AAMM CNPJ(14) mod(55) serie(3) nNF(9) tpEmis(1) cNF(8) + DV mod-11
+    digitos = lambda n: "".join(str(rnd.randint(0, 9)) for _ in range(n))  # noqa: E731
+    corpo = f"352403{digitos(14)}55001{digitos(9)}1{digitos(8)}"
+    pesos = [2, 3, 4, 5, 6, 7, 8, 9]
+    soma = sum(int(d) * pesos[i % 8] for i, d in enumerate(reversed(corpo)))
+    dv = 11 - soma % 11
+    return corpo + str(0 if dv >= 10 else dv)
+
+def gerar_nfe_xml(itens: int = 10, seed: int = 0, icms: bool = True, ipi: bool = True) -> bytes:
+    rnd = random.Random(seed)
+    dets = "".join(_det(i, rnd, icms, ipi) for i in range(1, itens + 1))
+    chave = chave_sintetica(rnd)
+    xml = (
+        f'<?xml version="1.0" encoding="UTF-8"?><nfeProc xmlns="{NS}" versao="4.00">'
+        f'<NFe><infNFe Id="NFe{chave}" versao="4.00">'
+        f"<ide><cUF>35</cUF><natOp>VENDA DE MERCADORIA</natOp><mod>55</mod><serie>1</serie>"
+        f"<nNF>{rnd.randint(1, 999999)}</nNF><dhEmi>2024-03-15T10:00:00-03:00</dhEmi>"
+        f"<dhSaiEnt>2024-03-16T08:00:00-03:00</dhSaiEnt></ide>"
+        f"<emit><CNPJ>{rnd.randint(10**13, 10**14 - 1)}</CNPJ><xNome>EMITENTE SINTETICO LTDA</xNome></emit>"
+        f"{dets}"
+        f"<total><ICMSTot><vProd>1000.00</vProd><vFrete>15.00</vFrete><vDesc>0.00</vDesc>"
+        f"<vOutro>0.00</vOutro><vNF>1015.00</vNF></ICMSTot></total>"
+        f"</infNFe></NFe>"
+        f"<protNFe versao=\"4.00\"><infProt><chNFe>{chave}</chNFe></infProt></protNFe></nfeProc>"
+    )
+    return xml.encode("utf-8")
+
+# Variantes de imposto do lote: "misto" alterna ICMS00/ICMS40 e com/sem IPI por arquivo
+VARIANTES = {
+    "misto": None,
+    "icms": (True, False),
+    "icms_ipi": (True, True),
+    "isento": (False, False),
+}
+
+def gerar_lote_xml(destino: Path, arquivos: int = 100, itens: int = 10, seed: int = 0,
+                   variante: str = "misto") -> list[Path]:
+    destino.mkdir(parents=True, exist_ok=True)
+    fixo = VARIANTES[variante]
+    paths = []
+    for i in range(arquivos):
+        icms, ipi = fixo if fixo is not None else (i % 2 == 0, i % 3 != 0)
+        p = destino / f"nfe_{i:05d}.xml"
+        p.write_bytes(gerar_nfe_xml(itens=itens, seed=seed + i, icms=icms, ipi=ipi))
+        paths.append(p)
+    return paths
+
+def gerar_danfe_pdf(destino: Path, chaves: list[str], com_texto: bool = False, linhas_itens: int = 40) -> Path:
+    """
+    PDF com uma página "DANFE" por chave: Code128 da chave no cabeçalho e um corpo de
+    texto de itens. com_texto=True também imprime a chave como texto selecionável.
+    Requer reportlab (só para o benchmark).
+    """
+    from reportlab.graphics.barcode.code128 import Code128
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import mm
+    from reportlab.pdfgen import canvas
+
+    cv = canvas.Canvas(str(destino), pagesize=A4)
+    largura, altura = A4
+    for chave in chaves:
+        cv.setFont("Helvetica-Bold", 12)
+        cv.drawString(15 * mm, altura - 20 * mm, "DANFE - DOCUMENTO AUXILIAR DA NOTA FISCAL ELETRONICA")
+        Code128(chave, barHeight=13 * mm, barWidth=0.30 * mm).drawOn(cv, 100 * mm, altura - 45 * mm)
+        cv.setFont("Helvetica", 8)
+        if com_texto:
+            cv.drawString(100 * mm, altura - 50 * mm, "CHAVE DE ACESSO " + " ".join(chave[i:i + 4] for i in range(0, 44, 4)))
+        for i in range(linhas_itens):
+            cv.drawString(15 * mm, altura - (65 + i * 5) * mm,
+                          f"{i + 1:03d}  PRODUTO SINTETICO {i}  UN  1,0000  10,00  10,00  18,00%")
+        cv.showPage()
+    cv.save()
+    return destino
+
+def gerar_lote_pdf(destino: Path, arquivos: int = 10, paginas: int = 2, com_texto: bool = False,
+                   seed: int = 0) -> tuple[list[Path], list[list[str]]]:
+    """Lote de DANFEs (uma chave válida por página). Retorna (paths, chaves de cada arquivo)."""
+    destino.mkdir(parents=True, exist_ok=True)
+    rnd = random.Random(seed)
+    paths, chaves = [], []
+    for i in range(arquivos):
+        ch = [chave_sintetica(rnd) for _ in range(paginas)]
+        paths.append(gerar_danfe_pdf(destino / f"danfe_{i:05d}.pdf", ch, com_texto=com_texto))
+        chaves.append(ch)
+    return paths, chaves
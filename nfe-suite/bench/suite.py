@@ -0,0 +1,266 @@
+# nfe-suite/bench/suite.py
+# Suíte de benchmark por estágio, reprodutível e offline (Linux, só CPU): gera um lote
+# sintético (XMLs de NF-e com variantes de ICMS/IPI, ZIP e DANFEs com Code128 real),
+# roda cada estágio num processo novo e mede arquivos/s, itens/s, páginas/s, MB/s e
+# pico de RSS. O resultado vai em JSON para comparar entre commits:
+#   python nfe-suite/bench/suite.py --saida base.json
+#   (muda o código)
+#   python nfe-suite/bench/suite.py --saida novo.json --comparar base.json
+# Estágios que dependem de Poppler/decodificador (pdf_texto, pdf_raster) ou do pyarrow (exportacao_parquet)
+# são pulados, com o motivo, se faltarem.
+
+from __future__ import annotations
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import queue
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "apps" / "combo_app"))
+
+from sintetico import VARIANTES, gerar_lote_pdf, gerar_lote_xml  # noqa: E402
+
+# ---- estágios: cada um recebe o lote e devolve os contadores do que processou ----
+# O preparo (ex.: linhas para o estágio "dataframe") roda antes do cronômetro.
+
+def _xml_extract_info(lote: dict, args) -> dict:
+    from processors.xml_nfe import extract_info_from_xml
+    linhas: list = []
+    for p in lote["xmls"]:
+        extract_info_from_xml(p, linhas)
+    return {"arquivos": len(lote["xmls"]), "itens": len(linhas), "bytes": lote["bytes_xml"]}
+
+def _xml_paralelo(lote: dict, args) -> dict:
+    from processors.paralelo import iterar_xmls
+    itens = sum(1 for _ in iterar_xmls(lote["xmls"], workers=args.workers))
+    return {"arquivos": len(lote["xmls"]), "itens": itens, "bytes": lote["bytes_xml"]}
+
+def _zip(lote: dict, args) -> dict:
+    from processors.lote_zip import LeitorZip
+    from processors.paralelo import iterar_xmls_zip
+    with LeitorZip(lote["zip"]) as leitor:
+        membros = leitor.membros()
+    itens = sum(1 for _ in iterar_xmls_zip(lote["zip"], membros, workers=args.workers))
+    return {"arquivos": len(membros), "itens": itens, "bytes": sum(m.tamanho for m in membros)}
+
+def _preparar_linhas(lote: dict) -> list:
+    from processors.paralelo import iterar_xmls
+    return list(iterar_xmls(lote["xmls"], workers=1))
+
+def _dataframe(lote: dict, args, linhas: list) -> dict:
+    from processors.esquema import dataframe_nfe
+    df = dataframe_nfe(linhas)
+    return {"arquivos": len(lote["xmls"]), "itens": len(df)}
+
+def _preparar_df(lote: dict):
+    from processors.esquema import dataframe_nfe
+    return dataframe_nfe(_preparar_linhas(lote))
+
+def _excel(lote: dict, args, df) -> dict:
+    from processors.excel import format_excel
+    dados = format_excel(df).getbuffer().nbytes
+    return {"arquivos": len(lote["xmls"]), "itens": len(df), "bytes_saida": dados}
+
+def _exportacao(lote: dict, args, formato: str = "xlsx", compactar: bool = False) -> dict:
+    # ponta a ponta: XMLs -> linhas -> blocos tipados -> saída em disco
+    from processors.exportacao import abrir_escritor
+    from processors.paralelo import iterar_xmls
+    from processors.pipeline import exportar_nfe
+    from processors.xml_nfe import COLUNAS_NFE
+    with abrir_escritor(Path(lote["pasta"]) / "exportacao", formato, compactar) as escritor:
+        resumo = exportar_nfe(iterar_xmls(lote["xmls"], workers=args.workers),
+                              escritor.planilha("XMLs", COLUNAS_NFE))
+    return {"arquivos": len(lote["xmls"]), "itens": resumo.linhas, "bytes": lote["bytes_xml"],
+            "bytes_saida": sum(p.stat().st_size for p in escritor.arquivos)}
+
+def _exportacao_csv_zip(lote: dict, args) -> dict:
+    return _exportacao(lote, args, "csv", compactar=True)
+
+def _exportacao_parquet(lote: dict, args) -> dict:
+    return _exportacao(lote, args, "parquet")
+
+def _conferir_pdfs(lote: dict, resultados: list) -> bool:
+    return all(sorted(set(r)) == sorted(esperado) for r, esperado in zip(resultados, lote["chaves_pdf"]))
+
+def _pdf_texto(lote: dict, args) -> dict:
+    from processors.paralelo import processar_pdfs
+    rs = processar_pdfs(lote["pdfs_texto"], workers=args.workers, camada_texto=True)
+    return {"arquivos": len(rs), "paginas": sum(sum(r.niveis.values()) for r in rs),
+            "bytes": lote["bytes_pdf_texto"], "chaves_ok": _conferir_pdfs(lote, [r.chaves for r in rs])}
+
+def _pdf_raster(lote: dict, args) -> dict:
+    from processors.extractor_pyzbar import extrair_chaves_de_pdf
+    chaves = [extrair_chaves_de_pdf(str(p), dpi=args.dpi)[0] for p in lote["pdfs"]]
+    return {"arquivos": len(chaves), "paginas": args.paginas * len(chaves),
+            "bytes": lote["bytes_pdf"], "chaves_ok": _conferir_pdfs(lote, chaves)}
+
+def _falta_decodificador() -> str | None:
+    from processors.decodificadores import disponiveis
+    if not disponiveis():
+        return "nenhum decodificador de código de barras (pyzbar/libzbar ou zxing-cpp)"
+    return None
+
+def _falta_pyarrow() -> str | None:
+    from processors.exportacao import parquet_disponivel
+    return None if parquet_disponivel() else "pyarrow não instalado"
+
+def _falta_raster() -> str | None:
+    if shutil.which("pdftoppm") is None:
+        return "Poppler (pdftoppm) não encontrado"
+    return _falta_decodificador()
+
+# nome -> (função, preparo fora do cronômetro, pré-requisito)
+ESTAGIOS = {
+    "xml_extract_info": (_xml_extract_info, None, None),
+    "xml_paralelo": (_xml_paralelo, None, None),
+    "zip": (_zip, None, None),
+    "dataframe": (_dataframe, _preparar_linhas, None),
+    "excel": (_excel, _preparar_df, None),
+    "exportacao": (_exportacao, None, None),
+    "exportacao_csv_zip": (_exportacao_csv_zip, None, None),
+    "exportacao_parquet": (_exportacao_parquet, None, _falta_pyarrow),
+    "pdf_texto": (_pdf_texto, None, _falta_decodificador),
+    "pdf_raster": (_pdf_raster, None, _falta_raster),
+}
+
+def _mb(kb: int) -> float:
+    return round(kb / 1024, 1)  # ru_maxrss em KB no Linux
+
+def _medir(nome: str, lote: dict, args, fila) -> None:
+    # roda num processo novo (spawn): o pico de RSS é só deste estágio
+    func, preparo, requisito = ESTAGIOS[nome]
+    motivo = requisito() if requisito else None
+    if motivo:
+        fila.put({"estagio": nome, "pulado": motivo})
+        return
+    try:
+        # importações fora do cronômetro (pandas etc.): o estágio mede só o trabalho
+        import processors.esquema, processors.excel, processors.paralelo, processors.pipeline  # noqa: E401,F401
+        extra = (preparo(lote),) if preparo else ()
+        base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        melhor = None
+        for _ in range(max(1, args.repeticoes)):
+            t0 = time.perf_counter()
+            contagem = func(lote, args, *extra)
+            dt = time.perf_counter() - t0
+            melhor = dt if melhor is None else min(melhor, dt)
+    except Exception as e:
+        fila.put({"estagio": nome, "erro": f"{type(e).__name__}: {e}"})
+        return
+    r = {"estagio": nome, "segundos": round(melhor, 4), **contagem}
+    for campo, rotulo in (("arquivos", "arquivos_s"), ("itens", "itens_s"), ("paginas", "paginas_s")):
+        if contagem.get(campo):
+            r[rotulo] = round(contagem[campo] / melhor, 1)
+    if contagem.get("bytes"):
+        r["mb_s"] = round(contagem["bytes"] / 2**20 / melhor, 2)
+    r["rss_base_mb"] = _mb(base)
+    r["pico_rss_mb"] = _mb(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+    r["pico_rss_filhos_mb"] = _mb(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    fila.put(r)
+
+def _git(*cmd: str) -> str | None:
+    try:
+        return subprocess.run(["git", *cmd], cwd=Path(__file__).parent, capture_output=True,
+                              text=True, timeout=10, check=True).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def _meta() -> dict:
+    return {
+        "commit": _git("rev-parse", "--short", "HEAD"),
+        "alteracoes_locais": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "data": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+def gerar_lote(pasta: Path, args) -> dict:
+    xmls = gerar_lote_xml(pasta / "xml", arquivos=args.arquivos, itens=args.itens, variante=args.variante)
+    zip_path = pasta / "lote.zip"
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for p in xmls:
+            zf.write(p, f"notas/{p.name}")
+    pdfs, chaves = gerar_lote_pdf(pasta / "pdf", arquivos=args.pdfs, paginas=args.paginas, seed=1)
+    pdfs_texto, _ = gerar_lote_pdf(pasta / "pdf_texto", arquivos=args.pdfs, paginas=args.paginas,
+                                   com_texto=True, seed=1)
+    tamanho = lambda ps: sum(p.stat().st_size for p in ps)  # noqa: E731
+    return {"pasta": str(pasta), "xmls": [str(p) for p in xmls], "zip": str(zip_path),
+            "pdfs": [str(p) for p in pdfs], "pdfs_texto": [str(p) for p in pdfs_texto], "chaves_pdf": chaves,
+            "bytes_xml": tamanho(xmls), "bytes_pdf": tamanho(pdfs), "bytes_pdf_texto": tamanho(pdfs_texto)}
+
+def comparar(atual: dict, anterior: dict) -> list[str]:
+    """Linhas com a variação de vazão por estágio (positivo = mais rápido que `anterior`)."""
+    saida = [f"comparando com {anterior['meta'].get('commit')} ({anterior['meta'].get('data')})"]
+    for nome, r in atual["estagios"].items():
+        a = anterior["estagios"].get(nome)
+        if not a or "segundos" not in r or "segundos" not in a:
+            continue
+        var = (a["segundos"] / r["segundos"] - 1) * 100
+        rss = r["pico_rss_mb"] - a["pico_rss_mb"]
+        saida.append(f"  {nome:18s} {a['segundos']:8.3f} s -> {r['segundos']:8.3f} s  ({var:+6.1f}% vazão, "
+                     f"{rss:+.1f} MB RSS)")
+    return saida
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark por estágio com lote sintético (saída JSON).")
+    ap.add_argument("--arquivos", type=int, default=300, help="XMLs no lote")
+    ap.add_argument("--itens", type=int, default=30, help="itens por XML")
+    ap.add_argument("--variante", choices=sorted(VARIANTES), default="misto", help="impostos dos itens")
+    ap.add_argument("--pdfs", type=int, default=10, help="DANFEs em PDF no lote")
+    ap.add_argument("--paginas", type=int, default=2, help="páginas (chaves) por PDF")
+    ap.add_argument("--dpi", type=int, default=300)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--repeticoes", type=int, default=1, help="usa o melhor tempo de N execuções")
+    ap.add_argument("--estagios", default=",".join(ESTAGIOS), help="lista separada por vírgula")
+    ap.add_argument("--saida", help="grava o JSON neste arquivo (senão só imprime)")
+    ap.add_argument("--comparar", help="JSON de uma execução anterior para comparar")
+    args = ap.parse_args(argv)
+
+    nomes = [n.strip() for n in args.estagios.split(",") if n.strip()]
+    desconhecidos = [n for n in nomes if n not in ESTAGIOS]
+    if desconhecidos:
+        ap.error(f"estágio(s) desconhecido(s): {', '.join(desconhecidos)}")
+
+    parametros = {k: v for k, v in vars(args).items() if k not in ("saida", "comparar", "estagios")}
+    resultado = {"meta": _meta(), "parametros": parametros, "estagios": {}}
+    ctx = mp.get_context("spawn")
+    with tempfile.TemporaryDirectory(prefix="nfe_bench_") as td:
+        lote = gerar_lote(Path(td), args)
+        for nome in nomes:
+            fila = ctx.Queue()
+            proc = ctx.Process(target=_medir, args=(nome, lote, args, fila))
+            proc.start()
+            r = None
+            while r is None:
+                try:
+                    r = fila.get(timeout=1)
+                except queue.Empty:
+                    if not proc.is_alive():  # morreu sem responder (ex.: OOM)
+                        r = {"erro": f"processo terminou com código {proc.exitcode}"}
+            proc.join()
+            resultado["estagios"][nome] = {k: v for k, v in r.items() if k != "estagio"}
+            print(f"{nome}: {json.dumps(resultado['estagios'][nome], ensure_ascii=False)}", file=sys.stderr)
+
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.saida:
+        Path(args.saida).write_text(texto + "\n", encoding="utf-8")
+    else:
+        print(texto)
+    if args.comparar:
+        anterior = json.loads(Path(args.comparar).read_text(encoding="utf-8"))
+        print("\n".join(comparar(resultado, anterior)), file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
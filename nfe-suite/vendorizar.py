@@ -0,0 +1,89 @@
+# nfe-suite/vendorizar.py
+# Copia para os outros apps os módulos de combo_app/processors que eles usam (com as dependências
+# internas de cada um), em <app>/processors/. Cada app é implantado só com a própria pasta
+# (App Service/Streamlit com a pasta do app, Docker com a pasta do app como contexto), então não
+# pode importar de ../combo_app. combo_app/processors é a fonte: as cópias não se editam à mão;
+# rode de novo depois de mudar um desses módulos.
+#   python nfe-suite/vendorizar.py               # atualiza as cópias
+#   python nfe-suite/vendorizar.py --verificar   # só confere; sai com 1 se alguma cópia está velha
+
+from __future__ import annotations
+import argparse
+import re
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Set, Tuple
+
+APPS_DIR = Path(__file__).resolve().parent / "apps"
+FONTE = APPS_DIR / "combo_app" / "processors"
+
+# app -> módulos importados diretamente pelo app
+APPS: Dict[str, Tuple[str, ...]] = {
+    "xml_app": ("xml_nfe", "excel", "pipeline"),
+    "pdf_app": ("decodificadores", "lote_zip"),
+}
+
+# imports de topo e locais (dentro de funções) contam: a cópia precisa funcionar inteira
+_IMPORT = re.compile(r"^\s*from processors(?:\.(\w+))? import ([\w, ()]+)", re.M)
+
+def dependencias(modulo: str) -> Set[str]:
+    texto = (FONTE / f"{modulo}.py").read_text(encoding="utf-8")
+    saida: Set[str] = set()
+    for sub, nomes in _IMPORT.findall(texto):
+        if sub:
+            saida.add(sub)
+        else:
+            saida.update(n.strip() for n in nomes.strip("()").split(",") if n.strip())
+    return saida
+
+def fecho(modulos: Iterable[str]) -> List[str]:
+    vistos: Set[str] = set()
+    pendentes = list(modulos)
+    while pendentes:
+        m = pendentes.pop()
+        if m not in vistos:
+            vistos.add(m)
+            pendentes.extend(dependencias(m))
+    return sorted(vistos)
+
+def diferencas(app: str) -> Tuple[List[str], List[str]]:
+    """(módulos a copiar/atualizar, arquivos que sobraram na cópia) de um app."""
+    destino = APPS_DIR / app / "processors"
+    modulos = fecho(APPS[app])
+    velhos = [m for m in modulos
+              if not (destino / f"{m}.py").is_file()
+              or (destino / f"{m}.py").read_bytes() != (FONTE / f"{m}.py").read_bytes()]
+    esperados = {f"{m}.py" for m in modulos}
+    sobras = sorted(p.name for p in destino.glob("*.py") if p.name not in esperados) if destino.is_dir() else []
+    return velhos, sobras
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(prog="python nfe-suite/vendorizar.py",
+                                 description="Copia módulos de combo_app/processors para os outros apps.")
+    ap.add_argument("--verificar", action="store_true", help="só confere as cópias (sai com 1 se diferem)")
+    args = ap.parse_args(argv)
+
+    pendente = False
+    for app in APPS:
+        destino = APPS_DIR / app / "processors"
+        velhos, sobras = diferencas(app)
+        if args.verificar:
+            for m in velhos:
+                print(f"{app}/processors/{m}.py difere de combo_app/processors/{m}.py", file=sys.stderr)
+            for nome in sobras:
+                print(f"{app}/processors/{nome} não vem de combo_app/processors", file=sys.stderr)
+            pendente = pendente or bool(velhos or sobras)
+            continue
+        destino.mkdir(parents=True, exist_ok=True)
+        for m in velhos:
+            (destino / f"{m}.py").write_bytes((FONTE / f"{m}.py").read_bytes())
+            print(f"{app}/processors/{m}.py")
+        for nome in sobras:
+            (destino / nome).unlink()
+            print(f"{app}/processors/{nome} (removido)")
+    if pendente:
+        print("rode: python nfe-suite/vendorizar.py", file=sys.stderr)
+    return 1 if pendente else 0
+
+if __name__ == "__main__":
+    sys.exit(main())